@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iam", "0002_assessment_assessmentversion_examinstance_and_more"),
+        ("assessment_core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="institution",
+            name="tenant",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="institutions",
+                to="iam.tenant",
+            ),
+        ),
+    ]
@@ -18,6 +18,12 @@ class Institution(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=200)
     code = models.CharField(max_length=20, unique=True)
+    tenant = models.ForeignKey(
+        'iam.Tenant',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='institutions')
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -1,7 +1,8 @@
 from assessment_core.models import Attempt
 from decimal import Decimal
-from grade_integrity.models import GradeSource, GradeRecord, GradeAuditLog
-from iam.models import Tenant
+from grade_integrity.models import GradeRecord, GradeAuditLog
+from grade_integrity.registry import GradeSourceRegistry
+from grade_integrity.tenancy import TenantResolver
 
 
 class AutoGrader:
@@ -48,19 +49,10 @@ class AutoGrader:
         """Create a grade record for the auto-grader source"""
         try:
             # Get or create tenant for the institution
-            institution = attempt.assessment.course.institution
-            tenant, created = Tenant.objects.get_or_create(
-                name=institution.name,
-                defaults={'admin_contact': {'institution_id': str(institution.id)}}
-            )
+            tenant = TenantResolver.for_attempt(attempt)
 
-            source, created = GradeSource.objects.get_or_create(
-                tenant=tenant,
-                name='Auto Grader',
-                defaults={
-                    'source_type': 'auto_grader',
-                    'description': 'Automated grading system'
-                }
+            source = GradeSourceRegistry.get_or_create(
+                tenant, 'Auto Grader', 'auto_grader', 'Automated grading system'
             )
 
             # Create grade record
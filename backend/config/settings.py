@@ -39,6 +39,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'iam.middleware.TenantContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -66,6 +67,54 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # External Policy Agent (OPA) URL - configured via environment in CI/deployment
 OPA_URL = os.environ.get('OPA_URL')
 
+# IAM permission caching. Snapshots and decisions are invalidated by bumping generation counters in
+# the Django cache (iam.signals), which only reaches other workers through a shared backend: with
+# REDIS_URL the cache is Redis and the TTL can be long; without it each process has its own LocMemCache
+# and the TTL stays short (the iam.W001 check warns when it is raised anyway). The in-process tier stays
+# short as the bound when Redis pub/sub is absent.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+IAM_CACHE_TTL = int(os.environ.get('IAM_CACHE_TTL', 3600 if REDIS_URL else 60))
+IAM_SNAPSHOT_TTL = int(os.environ.get('IAM_SNAPSHOT_TTL', 3600 if REDIS_URL else 60))
+IAM_LOCAL_CACHE_TTL = int(os.environ.get('IAM_LOCAL_CACHE_TTL', 5))
+IAM_LOCAL_CACHE_SIZE = int(os.environ.get('IAM_LOCAL_CACHE_SIZE', 10000))
+# Role permission changes bump each bound user up to this many, the whole tenant beyond it
+IAM_INVALIDATION_FANOUT = int(os.environ.get('IAM_INVALIDATION_FANOUT', 50))
+# Verified JWT payloads are cached until their exp; revoked jtis are screened by a bloom filter
+# rebuilt from RevokedToken every IAM_REVOCATION_REBUILD_INTERVAL seconds.
+IAM_JWT_CACHE_SIZE = int(os.environ.get('IAM_JWT_CACHE_SIZE', 10000))
+IAM_REVOCATION_REBUILD_INTERVAL = int(os.environ.get('IAM_REVOCATION_REBUILD_INTERVAL', 300))
+IAM_REVOCATION_FILTER_CAPACITY = int(os.environ.get('IAM_REVOCATION_FILTER_CAPACITY', 100000))
+IAM_REVOCATION_FILTER_FP_RATE = float(os.environ.get('IAM_REVOCATION_FILTER_FP_RATE', 0.01))
+# Public half of the key the token/ endpoint signs with (IAM_PRIVATE_KEY_PEM)
+IAM_PUBLIC_KEY_PEM = os.environ.get('IAM_PUBLIC_KEY_PEM')
+# Rows per INSERT for bulk provisioning imports (iam.provisioning.BulkProvisioner)
+IAM_PROVISION_BATCH_SIZE = int(os.environ.get('IAM_PROVISION_BATCH_SIZE', 1000))
+
+# Permission-check audit entries: a background thread chains and bulk-inserts them in batches, so
+# requests never wait on a tenant's chain tail (see iam.audit.AuditWriter). IAM_AUDIT_ASYNC=false
+# writes inline instead, inside the caller's transaction (config.test_settings does so).
+IAM_AUDIT_ASYNC = os.environ.get('IAM_AUDIT_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+IAM_AUDIT_BATCH_SIZE = int(os.environ.get('IAM_AUDIT_BATCH_SIZE', 500))
+IAM_AUDIT_FLUSH_INTERVAL = float(os.environ.get('IAM_AUDIT_FLUSH_INTERVAL', 0.2))
+IAM_AUDIT_QUEUE_SIZE = int(os.environ.get('IAM_AUDIT_QUEUE_SIZE', 100000))
+# Write open aggregate windows and queued entries when the process exits (iam.audit.shutdown)
+IAM_AUDIT_FLUSH_ON_EXIT = os.environ.get('IAM_AUDIT_FLUSH_ON_EXIT', 'true').lower() in ('1', 'true', 'yes')
+# Routine allows are counted into one summary entry per (user, permission, window) instead of a row
+# per check; modes are 'full', 'sample' ({'rate': 0.01}) and 'aggregate' ({'window': seconds}).
+# Denies and emergency access are always audited in full.
+IAM_AUDIT_POLICIES = {
+    'permission.check': {'mode': 'aggregate', 'window': 60},
+    'permission.check.batch': {'mode': 'aggregate', 'window': 60},
+}
+IAM_AUDIT_AGGREGATE_MAX_KEYS = int(os.environ.get('IAM_AUDIT_AGGREGATE_MAX_KEYS', 10000))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -106,6 +155,9 @@ CSRF_TRUSTED_ORIGINS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        # Bearer JWTs authenticate from their claims alone (no session cookie means no session lookup);
+        # listed second so unauthenticated requests keep getting 403 rather than a Bearer challenge
+        'iam.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
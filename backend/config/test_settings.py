@@ -0,0 +1,7 @@
+"""Settings for test runs: python manage.py test --settings=config.test_settings"""
+from .settings import *  # noqa: F401,F403
+
+# The test database is gone by interpreter exit; nothing may write audit entries then
+IAM_AUDIT_FLUSH_ON_EXIT = False
+# Write audit entries inline, inside the test transaction, rather than from the background writer
+IAM_AUDIT_ASYNC = False
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam_integrity", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="evidence",
+            index=models.Index(
+                fields=["tenant", "auto_delete", "retention_until"],
+                name="exam_integr_tenant__7dd020_idx",
+            ),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from assessment_core.models import Attempt
+from iam.context import TenantScopedManager
 from iam.models import Tenant
 
 User = get_user_model()
@@ -38,6 +39,10 @@ class IntegrityEvent(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
 
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     # Event metadata
     event_type = models.CharField(max_length=50, choices=EVENT_TYPES)
     severity = models.CharField(max_length=20, choices=SEVERITY_LEVELS, default='low')
@@ -96,6 +101,10 @@ class IntegrityIncident(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
 
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     # Incident details
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -162,6 +171,10 @@ class RiskRule(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
 
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     rule_type = models.CharField(max_length=20, choices=RULE_TYPES)
@@ -209,6 +222,10 @@ class Evidence(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
 
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     # Evidence details
     evidence_type = models.CharField(max_length=20, choices=EVIDENCE_TYPES)
     filename = models.CharField(max_length=255)
@@ -231,6 +248,10 @@ class Evidence(models.Model):
 
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            # Retention cleanup; equality columns before the retention_until range
+            models.Index(fields=['tenant', 'auto_delete', 'retention_until']),
+        ]
 
     def __str__(self):
         return f"{self.evidence_type}: {self.filename}"
@@ -257,6 +278,10 @@ class ReviewWorkflow(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
 
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     workflow_type = models.CharField(max_length=20, choices=WORKFLOW_TYPES)
     incident = models.ForeignKey(IntegrityIncident, on_delete=models.CASCADE, related_name='workflows')
 
@@ -23,7 +23,7 @@ class IntegrityEventIngestionService:
 
         # Find attempt if not provided
         if not attempt:
-            attempt = self._find_attempt_by_session(proctoring_session_id)
+            attempt = self._find_attempt_by_session(tenant, proctoring_session_id)
 
         if not attempt:
             raise ValueError(f"Could not find attempt for session {proctoring_session_id}")
@@ -43,21 +43,18 @@ class IntegrityEventIngestionService:
 
         return event
 
-    def _find_attempt_by_session(self, session_id: str) -> Attempt:
+    def _find_attempt_by_session(self, tenant: Tenant, session_id: str) -> Attempt:
         """
-        Find attempt by proctoring session ID.
-        This would integrate with the proctoring system.
+        Find the attempt of the tenant's exam session opened under this proctoring session ID
+        (see proctoring.adapter.start_session).
         """
-        # Placeholder - in real implementation, this would query
-        # the proctoring system or a mapping table
         from iam.models import ExamSession
-        try:
-            exam_session = ExamSession.objects.get(proctoring_session_id=session_id)
-            return exam_session.exam_instance.assessment_version.assessment.attempts.filter(
-                user=exam_session.user
-            ).first()
-        except ExamSession.DoesNotExist:
-            return None
+        exam_session = (
+            ExamSession.objects.select_related('attempt')
+            .filter(proctoring_session_id=session_id, exam_instance__assessment_version__assessment__tenant=tenant)
+            .first()
+        )
+        return exam_session.attempt if exam_session else None
 
     def _process_event(self, event: IntegrityEvent):
         """
@@ -89,7 +86,7 @@ class RiskScoringService:
         """
         Evaluate if an event should trigger incident creation.
         """
-        rules = RiskRule.objects.filter(
+        rules = RiskRule.all_tenants.filter(
             tenant=self.tenant,
             is_active=True,
             rule_type__in=['event_count', 'severity_weighted']
@@ -107,7 +104,7 @@ class RiskScoringService:
         """
         since = timezone.now() - timedelta(hours=time_window_hours)
 
-        events = IntegrityEvent.objects.filter(
+        events = IntegrityEvent.all_tenants.filter(
             tenant=self.tenant,
             attempt=attempt,
             timestamp__gte=since
@@ -120,7 +117,7 @@ class RiskScoringService:
         factors = []
 
         # Apply all active rules
-        rules = RiskRule.objects.filter(tenant=self.tenant, is_active=True)
+        rules = RiskRule.all_tenants.filter(tenant=self.tenant, is_active=True)
 
         for rule in rules:
             rule_score, rule_factors = self._calculate_rule_score(rule, events)
@@ -164,7 +161,7 @@ class RiskScoringService:
         time_window = rule.parameters.get('time_window_hours', 1)
         since = timezone.now() - timedelta(hours=time_window)
 
-        count = IntegrityEvent.objects.filter(
+        count = IntegrityEvent.all_tenants.filter(
             tenant=self.tenant,
             attempt=event.attempt,
             event_type=rule.event_type or event.event_type,
@@ -267,7 +264,7 @@ class IncidentManagementService:
         """
         time_window = timedelta(hours=1)  # Look at events within 1 hour
 
-        return list(IntegrityEvent.objects.filter(
+        return list(IntegrityEvent.all_tenants.filter(
             tenant=self.tenant,
             attempt=trigger_event.attempt,
             timestamp__gte=trigger_event.timestamp - time_window,
@@ -369,13 +366,13 @@ class EvidenceRetentionService:
         incident.save()
 
         # Update all evidence files
-        incident.evidence_files.update(retention_until=retention_until)
+        Evidence.all_tenants.filter(tenant=self.tenant, incident=incident).update(retention_until=retention_until)
 
     def cleanup_expired_evidence(self):
         """
         Clean up evidence that has exceeded retention period.
         """
-        expired_evidence = Evidence.objects.filter(
+        expired_evidence = Evidence.all_tenants.filter(
             tenant=self.tenant,
             retention_until__lt=timezone.now(),
             auto_delete=True
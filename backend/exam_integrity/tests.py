@@ -149,8 +149,10 @@ class IntegrityEventTestCase(TestCase):
 class APITestCase(TestCase):
     def setUp(self):
         self.tenant = Tenant.objects.create(name="API Test Tenant")
-        self.institution = Institution.objects.create(name="API Test University", code="ATU")
-        self.user = User.objects.create_user(username="apiuser", email="api@example.com")
+        self.institution = Institution.objects.create(name="API Test University", code="ATU", tenant=self.tenant)
+        self.user = User.objects.create_user(
+            username="apiuser", email="api@example.com", institution_id=self.institution.id
+        )
         self.course = Course.objects.create(
             institution=self.institution,
             course_code="APITEST",
@@ -214,3 +216,42 @@ class APITestCase(TestCase):
 
         response = client.post('/api/exam-integrity/events/ingest/', event_data, content_type='application/json')
         self.assertEqual(response.status_code, 201)  # Created
+
+
+class ProvisioningToIngestionTestCase(TestCase):
+    def test_events_of_a_started_session_reach_its_attempt(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from iam.models import ExamInstance, User as IAMUser
+        from proctoring.adapter import start_session
+        from .models import IntegrityEvent
+
+        call_command('provision_dry_run', stdout=StringIO())
+        instance = ExamInstance.objects.get()
+        tenant = instance.assessment_version.assessment.tenant
+        institution = Institution.objects.create(name="Provisioned University", code="PU", tenant=tenant)
+        course = Course.objects.create(institution=institution, course_code="PR101", title="Proctored")
+        assessment = Assessment.objects.create(
+            course=course,
+            title="Proctored Exam",
+            assessment_type="Q2_INST",
+            open_datetime=timezone.now(),
+            close_datetime=timezone.now() + timezone.timedelta(hours=2)
+        )
+        student = User.objects.create_user(username="candidate", email="candidate@example.com", institution_id=institution.id)
+        attempt = Attempt.objects.create(assessment=assessment, student=student)
+        session = start_session(instance, IAMUser.objects.create(tenant=tenant, username="candidate"), attempt)
+        self.assertTrue(session.proctoring_session_id)
+
+        self.client.force_login(student)
+        response = self.client.post('/api/exam-integrity/events/ingest/', {
+            'proctoring_session_id': session.proctoring_session_id,
+            'event_type': 'face_not_visible',
+            'event_data': {'confidence': 0.9},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(IntegrityEvent.all_tenants.get().attempt, attempt)
+
+        # The session id of another tenant's exam does not resolve
+        other = Tenant.objects.create(name="Other Tenant")
+        self.assertIsNone(IntegrityEventIngestionService()._find_attempt_by_session(other, session.proctoring_session_id))
@@ -2,9 +2,11 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from iam.context import TenantScopedViewMixin
 from .models import (
     IntegrityEvent, IntegrityIncident, RiskRule, Evidence,
     ReviewWorkflow
@@ -18,22 +20,25 @@ from .services import (
     IntegrityEventIngestionService, RiskScoringService,
     IncidentManagementService, EvidenceRetentionService
 )
-from iam.models import Tenant
 
 
-class IntegrityEventViewSet(viewsets.ModelViewSet):
-    queryset = IntegrityEvent.objects.all()
+def _request_tenant(request):
+    """The request's tenant (resolved once by iam.middleware.TenantContextMiddleware)."""
+    if request.tenant_context.tenant_id is None:
+        raise PermissionDenied('No tenant is associated with this request.')
+    return request.tenant
+
+
+class IntegrityEventViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
+    queryset = IntegrityEvent.objects.select_related('tenant')
     serializer_class = IntegrityEventSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = self.queryset
-        tenant_id = self.request.query_params.get('tenant_id')
+        queryset = super().get_queryset()
         attempt_id = self.request.query_params.get('attempt_id')
         processed = self.request.query_params.get('processed')
 
-        if tenant_id:
-            queryset = queryset.filter(tenant_id=tenant_id)
         if attempt_id:
             queryset = queryset.filter(attempt_id=attempt_id)
         if processed is not None:
@@ -48,8 +53,7 @@ class IntegrityEventViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get tenant (in real implementation, this would be from authentication)
-        tenant = self._get_tenant_from_request(request)
+        tenant = _request_tenant(request)
 
         service = IntegrityEventIngestionService()
         try:
@@ -73,28 +77,17 @@ class IntegrityEventViewSet(viewsets.ModelViewSet):
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    def _get_tenant_from_request(self, request):
-        """Get tenant from request - placeholder implementation."""
-        # In real implementation, this would be from user authentication/tenant context
-        tenant = Tenant.objects.first()
-        if not tenant:
-            tenant = Tenant.objects.create(name="Default Tenant")
-        return tenant
-
 
-class IntegrityIncidentViewSet(viewsets.ModelViewSet):
-    queryset = IntegrityIncident.objects.all()
+class IntegrityIncidentViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
+    queryset = IntegrityIncident.objects.select_related('tenant')
     serializer_class = IntegrityIncidentSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = self.queryset
-        tenant_id = self.request.query_params.get('tenant_id')
+        queryset = super().get_queryset()
         status_filter = self.request.query_params.get('status')
         risk_level = self.request.query_params.get('risk_level')
 
-        if tenant_id:
-            queryset = queryset.filter(tenant_id=tenant_id)
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         if risk_level:
@@ -146,48 +139,34 @@ class IntegrityIncidentViewSet(viewsets.ModelViewSet):
         return Response(risk_data)
 
 
-class RiskRuleViewSet(viewsets.ModelViewSet):
-    queryset = RiskRule.objects.all()
+class RiskRuleViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
+    queryset = RiskRule.objects.select_related('tenant')
     serializer_class = RiskRuleSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = self.queryset
-        tenant_id = self.request.query_params.get('tenant_id')
+        queryset = super().get_queryset()
         is_active = self.request.query_params.get('is_active')
 
-        if tenant_id:
-            queryset = queryset.filter(tenant_id=tenant_id)
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
 
         return queryset
 
     def perform_create(self, serializer):
-        # Set tenant from request context
-        tenant = self._get_tenant_from_request(self.request)
+        tenant = _request_tenant(self.request)
         serializer.save(tenant=tenant)
 
-    def _get_tenant_from_request(self, request):
-        """Get tenant from request - placeholder implementation."""
-        tenant = Tenant.objects.first()
-        if not tenant:
-            tenant = Tenant.objects.create(name="Default Tenant")
-        return tenant
 
-
-class EvidenceViewSet(viewsets.ModelViewSet):
-    queryset = Evidence.objects.all()
+class EvidenceViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
+    queryset = Evidence.objects.select_related('tenant')
     serializer_class = EvidenceSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = self.queryset
-        tenant_id = self.request.query_params.get('tenant_id')
+        queryset = super().get_queryset()
         incident_id = self.request.query_params.get('incident_id')
 
-        if tenant_id:
-            queryset = queryset.filter(tenant_id=tenant_id)
         if incident_id:
             queryset = queryset.filter(incident_id=incident_id)
 
@@ -196,33 +175,23 @@ class EvidenceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def cleanup_expired(self, request):
         """Clean up expired evidence files."""
-        tenant = self._get_tenant_from_request(request)
+        tenant = _request_tenant(request)
         service = EvidenceRetentionService(tenant)
         deleted_count = service.cleanup_expired_evidence()
 
         return Response({'deleted_count': deleted_count})
 
-    def _get_tenant_from_request(self, request):
-        """Get tenant from request - placeholder implementation."""
-        tenant = Tenant.objects.first()
-        if not tenant:
-            tenant = Tenant.objects.create(name="Default Tenant")
-        return tenant
-
 
-class ReviewWorkflowViewSet(viewsets.ModelViewSet):
-    queryset = ReviewWorkflow.objects.all()
+class ReviewWorkflowViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
+    queryset = ReviewWorkflow.objects.select_related('tenant')
     serializer_class = ReviewWorkflowSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = self.queryset
-        tenant_id = self.request.query_params.get('tenant_id')
+        queryset = super().get_queryset()
         status_filter = self.request.query_params.get('status')
         workflow_type = self.request.query_params.get('workflow_type')
 
-        if tenant_id:
-            queryset = queryset.filter(tenant_id=tenant_id)
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         if workflow_type:
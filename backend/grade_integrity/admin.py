@@ -2,7 +2,8 @@ from django.contrib import admin
 
 from .models import (
     GradeSource, GradeRecord, GradeConflict, GradeFreeze,
-    GradeAmendment, ApprovalWorkflow, ApprovalStep, GradeAuditLog
+    GradeAmendment, ApprovalWorkflow, ApprovalStep, GradeAuditLog,
+    ReconciliationWeightProfile, GradeStatistics
 )
 
 
@@ -13,6 +14,13 @@ class GradeSourceAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
 
 
+@admin.register(ReconciliationWeightProfile)
+class ReconciliationWeightProfileAdmin(admin.ModelAdmin):
+    list_display = ['name', 'tenant', 'assessment_type', 'default_weight', 'is_active', 'updated_at']
+    list_filter = ['assessment_type', 'is_active', 'tenant']
+    search_fields = ['name']
+
+
 @admin.register(GradeRecord)
 class GradeRecordAdmin(admin.ModelAdmin):
     list_display = ['attempt', 'source', 'score', 'max_score', 'percentage', 'is_final', 'graded_at']
@@ -21,6 +29,14 @@ class GradeRecordAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'graded_at']
 
 
+@admin.register(GradeStatistics)
+class GradeStatisticsAdmin(admin.ModelAdmin):
+    list_display = ['assessment', 'source', 'count', 'mean', 'stdev', 'updated_at']
+    list_filter = ['tenant']
+    search_fields = ['assessment__title']
+    readonly_fields = [f.name for f in GradeStatistics._meta.fields]
+
+
 @admin.register(GradeConflict)
 class GradeConflictAdmin(admin.ModelAdmin):
     list_display = ['attempt', 'conflict_type', 'severity', 'detected_at', 'resolved']
@@ -6,4 +6,4 @@ class GradeIntegrityConfig(AppConfig):
     name = "grade_integrity"
 
     def ready(self):
-        pass
+        from . import item_analysis, reconciliation, registry, statistics, tenancy  # noqa: F401
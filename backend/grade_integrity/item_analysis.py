@@ -0,0 +1,215 @@
+import time
+import numpy as np
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from assessment_core.models import Attempt, Question, Response
+
+CACHE_PREFIX = 'item_analysis:'
+CACHE_TTL = 24 * 3600  # entries are keyed by generation, the TTL only bounds memory
+UPPER_LOWER_FRACTION = 0.27  # Kelley's upper/lower 27% groups for distractor analysis
+
+
+def _generation_key(assessment_id):
+    return f"{CACHE_PREFIX}gen:{assessment_id}"
+
+
+def _seed():
+    # Time-based start, as for the IAM cache generations: a counter lost to eviction or a cache
+    # restart comes back larger than any value it held, so it never revives stale results.
+    return time.time_ns() // 1000
+
+
+def current_generation(assessment_id):
+    key = _generation_key(assessment_id)
+    generation = cache.get(key)
+    if generation is None:
+        seed = _seed()
+        generation = seed if cache.add(key, seed, None) else cache.get(key, seed)
+    return generation
+
+
+def bump_generation(assessment_id):
+    """Invalidate cached item analysis for an assessment (new or re-scored responses)."""
+    key = _generation_key(assessment_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, _seed(), None):
+            cache.incr(key)
+
+
+class ItemAnalysisService:
+    """
+    Classical test theory item analysis for an assessment.
+
+    Builds an (attempts x questions) response matrix from a single streamed query
+    over `Response` and computes with NumPy:
+    - p-value (difficulty): mean fraction of the question's points awarded
+    - point-biserial discrimination: correlation between the item score and the
+      rest score (total minus the item), so an item does not correlate with itself
+    - distractor analysis over `Question.options`: choice counts and the
+      upper/lower 27% group proportions per option
+    - KR-20 reliability over dichotomized item scores
+
+    Results are cached until a response or question of the assessment changes.
+    """
+
+    def __init__(self, assessment):
+        self.assessment = assessment
+
+    def analyze(self):
+        generation = current_generation(self.assessment.id)
+        key = f"{CACHE_PREFIX}{self.assessment.id}:{generation}"
+        result = cache.get(key)
+        if result is None:
+            result = self.compute()
+            cache.set(key, result, CACHE_TTL)
+        return result
+
+    def compute(self):
+        questions = list(
+            Question.objects.filter(assessment=self.assessment)
+            .order_by('order_index')
+            .values_list('id', 'order_index', 'points', 'options')
+        )
+        q_index = {qid: j for j, (qid, _, _, _) in enumerate(questions)}
+        points = np.array([float(p or 0) for _, _, p, _ in questions], dtype=np.float64)
+        option_index = [
+            {opt.get('text'): i for i, opt in enumerate(options or []) if isinstance(opt, dict)}
+            for _, _, _, options in questions
+        ]
+
+        attempt_index = {}
+        rows, cols, awarded, choices = [], [], [], []
+        responses = (
+            Response.objects.filter(attempt__assessment=self.assessment)
+            .values_list('attempt_id', 'question_id', 'points_awarded', 'response_data')
+            .iterator(chunk_size=5000)
+        )
+        for attempt_id, question_id, points_awarded, response_data in responses:
+            j = q_index.get(question_id)
+            if j is None:
+                continue
+            rows.append(attempt_index.setdefault(attempt_id, len(attempt_index)))
+            cols.append(j)
+            awarded.append(float(points_awarded or 0))
+            selected = response_data.get('selected') if isinstance(response_data, dict) else None
+            try:
+                choices.append(option_index[j].get(selected, -1))
+            except TypeError:
+                # Multi-select lists and other unhashable answers name no single option
+                choices.append(-1)
+
+        n, k = len(attempt_index), len(questions)
+        scores = np.zeros((n, k), dtype=np.float64)      # points awarded
+        chosen = np.full((n, k), -1, dtype=np.int64)     # option index, -1 = omitted/unknown
+        if rows:
+            r, c = np.asarray(rows), np.asarray(cols)
+            scores[r, c] = awarded
+            chosen[r, c] = choices
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(points > 0, scores / points, 0.0)
+        totals = scores.sum(axis=1)
+
+        p_values = fraction.mean(axis=0) if n else np.full(k, np.nan)
+        discrimination = _point_biserial(fraction, totals[:, None] - scores)
+        kr20 = _kr20(fraction >= 1.0) if n else None
+
+        upper, lower = _upper_lower_groups(totals)
+        items = []
+        for j, (qid, order_index, _, options) in enumerate(questions):
+            items.append({
+                'question_id': str(qid),
+                'order_index': order_index,
+                'p_value': _clean(p_values[j]),
+                'point_biserial': _clean(discrimination[j]),
+                'omitted': int((chosen[:, j] < 0).sum()),
+                'distractors': _distractors(options or [], chosen[:, j], upper, lower),
+            })
+
+        return {
+            'assessment_id': str(self.assessment.id),
+            'attempts': n,
+            'items': k,
+            'mean_total': _clean(totals.mean()) if n else None,
+            'stdev_total': _clean(totals.std(ddof=1)) if n > 1 else None,
+            'kr20': kr20,
+            'questions': items,
+        }
+
+
+def _clean(value):
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+
+def _point_biserial(item_scores, rest_scores):
+    """Column-wise Pearson correlation between item scores and rest scores."""
+    if item_scores.shape[0] < 2:
+        return np.full(item_scores.shape[1], np.nan)
+    x = item_scores - item_scores.mean(axis=0)
+    y = rest_scores - rest_scores.mean(axis=0)
+    denom = np.sqrt((x * x).sum(axis=0) * (y * y).sum(axis=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denom > 0, (x * y).sum(axis=0) / denom, np.nan)
+
+
+def _kr20(correct):
+    n, k = correct.shape
+    if k < 2 or n < 2:
+        return None
+    p = correct.mean(axis=0)
+    variance = correct.sum(axis=1).var()
+    if variance == 0:
+        return None
+    return _clean(k / (k - 1) * (1 - (p * (1 - p)).sum() / variance))
+
+
+def _upper_lower_groups(totals):
+    n = len(totals)
+    size = max(int(round(n * UPPER_LOWER_FRACTION)), 1) if n else 0
+    order = np.argsort(totals, kind='stable')
+    return order[n - size:], order[:size]
+
+
+def _distractors(options, chosen, upper, lower):
+    n_options = len(options)
+    if not n_options:
+        return []
+    n = len(chosen)
+    counts = np.bincount(chosen[chosen >= 0], minlength=n_options)
+    upper_counts = np.bincount(chosen[upper][chosen[upper] >= 0], minlength=n_options)
+    lower_counts = np.bincount(chosen[lower][chosen[lower] >= 0], minlength=n_options)
+    result = []
+    for i, option in enumerate(options):
+        upper_p = upper_counts[i] / len(upper) if len(upper) else 0.0
+        lower_p = lower_counts[i] / len(lower) if len(lower) else 0.0
+        result.append({
+            'option': option.get('text') if isinstance(option, dict) else option,
+            'correct': bool(option.get('correct')) if isinstance(option, dict) else False,
+            'count': int(counts[i]),
+            'proportion': _clean(counts[i] / n) if n else None,
+            'upper': _clean(upper_p),
+            'lower': _clean(lower_p),
+            'discrimination': _clean(upper_p - lower_p),
+        })
+    return result
+
+
+@receiver(post_save, sender=Response)
+@receiver(post_delete, sender=Response)
+def _invalidate_on_response(sender, instance, **kwargs):
+    if Response.attempt.is_cached(instance):
+        assessment_id = instance.attempt.assessment_id
+    else:
+        assessment_id = Attempt.objects.filter(pk=instance.attempt_id).values_list('assessment_id', flat=True).first()
+    if assessment_id:
+        bump_generation(assessment_id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def _invalidate_on_question(sender, instance, **kwargs):
+    bump_generation(instance.assessment_id)
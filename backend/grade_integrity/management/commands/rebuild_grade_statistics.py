@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from assessment_core.models import Assessment
+from grade_integrity.statistics import GradeStatisticsService
+
+
+class Command(BaseCommand):
+    help = 'Recompute materialized grade statistics from grade records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assessment', type=str, help='assessment id (default: all assessments)')
+
+    def handle(self, *args, **options):
+        assessments = Assessment.objects.all()
+        if options.get('assessment'):
+            assessments = assessments.filter(id=options['assessment'])
+
+        total = 0
+        for assessment in assessments.iterator():
+            rows = GradeStatisticsService.rebuild(assessment)
+            total += rows
+            self.stdout.write(f'Rebuilt {rows} statistics rows for {assessment.title}')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuild complete: {total} statistics rows'))
@@ -7,20 +7,29 @@ class Command(BaseCommand):
     help = 'Sync institutions to tenants for grade integrity system'
 
     def handle(self, *args, **options):
-        institutions = Institution.objects.all()
+        institutions = Institution.objects.select_related('tenant').all()
         created_count = 0
         updated_count = 0
+        linked_count = 0
 
         for institution in institutions:
-            tenant, created = Tenant.objects.get_or_create(
-                name=institution.name,
-                defaults={
-                    'admin_contact': {
-                        'institution_id': str(institution.id),
-                        'code': institution.code
-                    }
-                }
-            )
+            if institution.tenant_id:
+                tenant, created = institution.tenant, False
+            else:
+                tenant = Tenant.objects.filter(name=institution.name).first()
+                created = tenant is None
+                if created:
+                    tenant = Tenant.objects.create(
+                        name=institution.name,
+                        admin_contact={
+                            'institution_id': str(institution.id),
+                            'code': institution.code
+                        }
+                    )
+                # Backfill the direct institution -> tenant link
+                institution.tenant = tenant
+                institution.save(update_fields=['tenant'])
+                linked_count += 1
 
             if created:
                 created_count += 1
@@ -41,6 +50,7 @@ class Command(BaseCommand):
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'Sync complete: {created_count} created, {updated_count} updated'
+                f'Sync complete: {created_count} created, {updated_count} updated, '
+                f'{linked_count} institutions linked'
             )
         )
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iam", "0002_assessment_assessmentversion_examinstance_and_more"),
+        ("grade_integrity", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReconciliationWeightProfile",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                (
+                    "assessment_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("Q1_CA", "Continuous Assessment"),
+                            ("Q2_INST", "Institutional Exam"),
+                            ("Q3_CENTRAL", "Central Exam"),
+                        ],
+                        max_length=20,
+                        null=True,
+                    ),
+                ),
+                ("weights", models.JSONField(blank=True, default=dict)),
+                (
+                    "default_weight",
+                    models.DecimalField(decimal_places=2, default=0.5, max_digits=4),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="iam.tenant"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("tenant", "assessment_type")},
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iam", "0002_assessment_assessmentversion_examinstance_and_more"),
+        ("assessment_core", "0002_institution_tenant"),
+        ("grade_integrity", "0002_reconciliationweightprofile"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GradeStatistics",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("mean", models.FloatField(default=0.0)),
+                ("m2", models.FloatField(default=0.0)),
+                ("stdev", models.FloatField(default=0.0)),
+                ("percentiles", models.JSONField(blank=True, default=dict)),
+                ("histogram", models.JSONField(blank=True, default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "assessment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="grade_statistics",
+                        to="assessment_core.assessment",
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="grade_integrity.gradesource",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="iam.tenant"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="gradestatistics",
+            constraint=models.UniqueConstraint(
+                fields=("assessment", "source"), name="uniq_grade_statistics_source"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="gradestatistics",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("source__isnull", True)),
+                fields=("assessment",),
+                name="uniq_grade_statistics_overall",
+            ),
+        ),
+    ]
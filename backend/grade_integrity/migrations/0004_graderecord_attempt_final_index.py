@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grade_integrity", "0003_gradestatistics"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="graderecord",
+            index=models.Index(
+                fields=["attempt", "is_final"], name="grade_integ_attempt_2a624e_idx"
+            ),
+        ),
+    ]
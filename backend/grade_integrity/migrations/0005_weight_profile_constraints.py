@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("grade_integrity", "0004_graderecord_attempt_final_index"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="reconciliationweightprofile",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="reconciliationweightprofile",
+            constraint=models.UniqueConstraint(
+                fields=("tenant", "assessment_type"), name="uniq_weight_profile_type"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="reconciliationweightprofile",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("assessment_type__isnull", True)),
+                fields=("tenant",),
+                name="uniq_weight_profile_default",
+            ),
+        ),
+    ]
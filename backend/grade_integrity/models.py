@@ -2,7 +2,8 @@ from django.db import models
 
 import uuid
 from django.utils import timezone
-from assessment_core.models import Attempt, User
+from assessment_core.models import Assessment, Attempt, User
+from iam.context import TenantScopedManager
 from iam.models import Tenant, AuditLog
 
 
@@ -15,8 +16,22 @@ class GradeSource(models.Model):
         ('reconciliation', 'Reconciliation Override'),
     ]
 
+    # Reliability weights used by weighted-average reconciliation
+    RELIABILITY_WEIGHTS = {
+        'auto_grader': 0.6,
+        'manual': 0.9,
+        'external': 0.7,
+        'reconciliation': 1.0,
+    }
+    DEFAULT_WEIGHT = 0.5
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     name = models.CharField(max_length=255)
     source_type = models.CharField(max_length=20, choices=SOURCE_TYPES)
     description = models.TextField(blank=True)
@@ -27,10 +42,49 @@ class GradeSource(models.Model):
         return f"{self.name} ({self.source_type})"
 
 
+class ReconciliationWeightProfile(models.Model):
+    """Per-tenant source weights for weighted-average reconciliation.
+
+    `weights` maps a source type (e.g. 'manual') or a GradeSource id to a weight;
+    source ids take precedence over types. A profile without `assessment_type`
+    applies to every assessment type the tenant has no specific profile for.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
+    name = models.CharField(max_length=255)
+    assessment_type = models.CharField(max_length=20, choices=Assessment.TYPE_CHOICES, null=True, blank=True)
+    weights = models.JSONField(default=dict, blank=True)
+    default_weight = models.DecimalField(max_digits=4, decimal_places=2, default=0.5)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'assessment_type'], name='uniq_weight_profile_type'),
+            models.UniqueConstraint(
+                fields=['tenant'], condition=models.Q(assessment_type__isnull=True), name='uniq_weight_profile_default'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.assessment_type or 'all types'})"
+
+
 class GradeRecord(models.Model):
     """Individual grade record from a source"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     attempt = models.ForeignKey(Attempt, on_delete=models.CASCADE, related_name='grade_records')
     source = models.ForeignKey(GradeSource, on_delete=models.CASCADE)
     score = models.DecimalField(max_digits=5, decimal_places=2)
@@ -43,11 +97,54 @@ class GradeRecord(models.Model):
 
     class Meta:
         unique_together = ('attempt', 'source')
+        indexes = [
+            models.Index(fields=['attempt', 'is_final']),
+        ]
 
     def __str__(self):
         return f"Grade for {self.attempt} from {self.source}: {self.score}/{self.max_score}"
 
 
+class GradeStatistics(models.Model):
+    """Materialized grade statistics per assessment and source.
+
+    Rows with a source cover that source's records; the row without a source
+    covers every record of the assessment except reconciled grades. Values are
+    grade percentages and are maintained incrementally, after each transaction
+    that writes, amends or deletes grade records commits.
+    """
+    HISTOGRAM_BINS = 20  # 5 percentage points per bin
+    PERCENTILES = (10, 25, 50, 75, 90)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
+    assessment = models.ForeignKey(Assessment, on_delete=models.CASCADE, related_name='grade_statistics')
+    source = models.ForeignKey(GradeSource, null=True, blank=True, on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0.0)
+    m2 = models.FloatField(default=0.0)  # Sum of squared deviations from the mean (Welford)
+    stdev = models.FloatField(default=0.0)
+    percentiles = models.JSONField(default=dict, blank=True)
+    histogram = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['assessment', 'source'], name='uniq_grade_statistics_source'),
+            models.UniqueConstraint(
+                fields=['assessment'], condition=models.Q(source__isnull=True), name='uniq_grade_statistics_overall'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Statistics for {self.assessment} ({self.source or 'all sources'})"
+
+
 class GradeConflict(models.Model):
     """Detected conflicts between grade records"""
     CONFLICT_TYPES = [
@@ -58,6 +155,11 @@ class GradeConflict(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     attempt = models.ForeignKey(Attempt, on_delete=models.CASCADE)
     conflict_type = models.CharField(max_length=20, choices=CONFLICT_TYPES)
     description = models.TextField()
@@ -76,6 +178,11 @@ class GradeFreeze(models.Model):
     """Freezing of grades for an assessment"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     assessment = models.ForeignKey('assessment_core.Assessment', on_delete=models.CASCADE)
     frozen_at = models.DateTimeField(default=timezone.now)
     frozen_by = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -96,6 +203,11 @@ class GradeAmendment(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     grade_record = models.ForeignKey(GradeRecord, on_delete=models.CASCADE, related_name='amendments')
     amendment_type = models.CharField(max_length=20, choices=AMENDMENT_TYPES)
     old_score = models.DecimalField(max_digits=5, decimal_places=2)
@@ -120,6 +232,11 @@ class ApprovalWorkflow(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+
+    # Scoped to the request's tenant (iam.middleware.TenantContextMiddleware)
+    objects = TenantScopedManager()
+    all_tenants = models.Manager()
+
     workflow_type = models.CharField(max_length=20, choices=WORKFLOW_TYPES)
     resource_id = models.UUIDField()  # ID of the resource (amendment, freeze, etc.)
     required_approvers = models.JSONField()  # List of role/user IDs that need to approve
@@ -0,0 +1,142 @@
+import threading
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import GradeSource, ReconciliationWeightProfile
+from .registry import GradeSourceRegistry, bump_generation, current_generation
+
+
+class ReconciliationPlan:
+    """
+    Compiled weighted-average reconciliation for one tenant and assessment type.
+
+    The weights of all of the tenant's grade sources are kept in a NumPy vector
+    indexed by source, so a batch of attempts is reconciled with one
+    matrix-vector product over an (attempts x sources) score matrix. Plans are
+    cached per process and keyed on the tenant's shared grade-source generation,
+    so a profile or source saved by any process makes every process recompile.
+    """
+
+    _plans = {}  # (tenant_id, assessment_type) -> (generation, ReconciliationPlan)
+    _lock = threading.Lock()
+
+    def __init__(self, tenant_id, assessment_type, source_ids, weights, default_weight):
+        self.tenant_id = tenant_id
+        self.assessment_type = assessment_type
+        self.index = {source_id: i for i, source_id in enumerate(source_ids)}
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.default_weight = float(default_weight)
+
+    @classmethod
+    def for_tenant(cls, tenant_id, assessment_type=None):
+        key = (tenant_id, assessment_type)
+        generation = current_generation(tenant_id)
+        entry = cls._plans.get(key)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        plan = cls.compile(tenant_id, assessment_type)
+        with cls._lock:
+            cls._plans[key] = (generation, plan)
+        return plan
+
+    @classmethod
+    def compile(cls, tenant_id, assessment_type=None):
+        profile = (
+            ReconciliationWeightProfile.all_tenants
+            .filter(tenant_id=tenant_id, is_active=True)
+            .filter(Q(assessment_type=assessment_type) | Q(assessment_type__isnull=True))
+            .order_by(F('assessment_type').asc(nulls_last=True))
+            .first()
+        )
+        if profile:
+            by_key = {str(k): float(v) for k, v in profile.weights.items()}
+            default_weight = float(profile.default_weight)
+        else:
+            by_key = dict(GradeSource.RELIABILITY_WEIGHTS)
+            default_weight = GradeSource.DEFAULT_WEIGHT
+
+        sources = list(GradeSourceRegistry.sources_for(tenant_id).values())
+        weights = [
+            by_key.get(str(s.id), by_key.get(s.source_type, default_weight))
+            for s in sources
+        ]
+        return cls(tenant_id, assessment_type, [s.id for s in sources], weights, default_weight)
+
+    @classmethod
+    def invalidate(cls, tenant_id=None):
+        with cls._lock:
+            if tenant_id is None:
+                cls._plans.clear()
+            else:
+                for key in [k for k in cls._plans if k[0] == tenant_id]:
+                    del cls._plans[key]
+
+    def weight(self, source_id):
+        i = self.index.get(source_id)
+        return self.default_weight if i is None else float(self.weights[i])
+
+    def weighted_scores(self, scores, mask):
+        """
+        Reconcile a batch.
+
+        `scores` is an (attempts x sources) matrix holding each attempt's score per
+        source (0 where the source has no record) and `mask` the matching 0/1
+        presence matrix. Returns the weighted averages and the summed weights per
+        attempt; rows without any weight get NaN.
+        """
+        totals = scores @ self.weights
+        weight_sums = mask @ self.weights
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = np.where(weight_sums > 0, totals / weight_sums, np.nan)
+        return averages, weight_sums
+
+    def build_matrix(self, rows):
+        """
+        Build the score and mask matrices from (attempt_id, source_id, score) rows.
+        Returns (attempt_ids, scores, mask). Sources unknown to the plan raise KeyError.
+        """
+        attempt_index = {}
+        cells = []
+        for attempt_id, source_id, score in rows:
+            r = attempt_index.setdefault(attempt_id, len(attempt_index))
+            cells.append((r, self.index[source_id], float(score)))
+        scores = np.zeros((len(attempt_index), len(self.index)), dtype=np.float64)
+        mask = np.zeros_like(scores)
+        if cells:
+            r, c, v = (np.asarray(x) for x in zip(*cells))
+            scores[r, c] = v
+            mask[r, c] = 1.0
+        return list(attempt_index), scores, mask
+
+    def reconcile_rows(self, rows, recompile=True):
+        """Reconcile (attempt_id, source_id, score) rows; returns {attempt_id: weighted score}."""
+        rows = list(rows)
+        try:
+            attempt_ids, scores, mask = self.build_matrix(rows)
+        except KeyError:
+            if not recompile:
+                raise
+            # A source was added after this plan was compiled (possibly by another process)
+            ReconciliationPlan.invalidate(self.tenant_id)
+            GradeSourceRegistry.invalidate(self.tenant_id)
+            plan = ReconciliationPlan.for_tenant(self.tenant_id, self.assessment_type)
+            return plan.reconcile_rows(rows, recompile=False)
+        averages, _ = self.weighted_scores(scores, mask)
+        return {
+            attempt_id: (None if np.isnan(avg) else float(avg))
+            for attempt_id, avg in zip(attempt_ids, averages)
+        }
+
+
+@receiver(post_save, sender=ReconciliationWeightProfile)
+@receiver(post_delete, sender=ReconciliationWeightProfile)
+@receiver(post_save, sender=GradeSource)
+@receiver(post_delete, sender=GradeSource)
+def _invalidate_reconciliation_plans(sender, instance, **kwargs):
+    tenant_id = instance.tenant_id
+    ReconciliationPlan.invalidate(tenant_id)
+    if sender is ReconciliationWeightProfile:
+        # Other processes recompile once the change is visible to them (the registry bumps for sources)
+        transaction.on_commit(lambda: bump_generation(tenant_id))
@@ -0,0 +1,127 @@
+import threading
+import time
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import GradeSource
+
+GENERATION_PREFIX = 'grade_sources:gen:'
+
+
+def _seed():
+    # Time-based start, as for the IAM cache generations: a counter lost to eviction or a cache
+    # restart comes back larger than any value it held, so it never revives stale entries.
+    return time.time_ns() // 1000
+
+
+def current_generation(tenant_id):
+    """Shared counter of a tenant's grade sources and weight profiles, bumped by every process that changes them."""
+    key = f"{GENERATION_PREFIX}{tenant_id}"
+    generation = cache.get(key)
+    if generation is None:
+        seed = _seed()
+        generation = seed if cache.add(key, seed, None) else cache.get(key, seed)
+    return generation
+
+
+def bump_generation(tenant_id):
+    key = f"{GENERATION_PREFIX}{tenant_id}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, _seed(), None):
+            cache.incr(key)
+
+
+class GradeSourceRegistry:
+    """
+    In-memory registry of GradeSources per tenant.
+
+    All sources of a tenant are loaded with a single query the first time the
+    tenant is seen (or up front through `warm()`). Entries are keyed on the
+    tenant's shared generation, so a source saved or deleted by any process
+    reloads the tenant everywhere. Grading and reconciliation use it to resolve
+    the well-known sources by name and to map `record.source_id` to its type and
+    weight without touching `record.source`.
+    """
+
+    _by_tenant = {}  # tenant_id -> (generation, {name: GradeSource}, {source_id: GradeSource})
+    _lock = threading.Lock()
+
+    @classmethod
+    def warm(cls, tenant_ids=None):
+        """Load the sources of the given tenants (all tenants when omitted) in one query."""
+        if tenant_ids is None:
+            tenant_ids = GradeSource.all_tenants.values_list('tenant_id', flat=True).distinct()
+        tenant_ids = list(tenant_ids)
+        # Read the generations first: a change committed while loading leaves the entry behind
+        generations = {tid: current_generation(tid) for tid in tenant_ids}
+        loaded = {tid: {} for tid in tenant_ids}
+        for source in GradeSource.all_tenants.filter(tenant_id__in=tenant_ids):
+            loaded[source.tenant_id][source.name] = source
+        with cls._lock:
+            for tenant_id, sources in loaded.items():
+                by_id = {source.id: source for source in sources.values()}
+                cls._by_tenant[tenant_id] = (generations[tenant_id], sources, by_id)
+
+    @classmethod
+    def _entry(cls, tenant_id):
+        entry = cls._by_tenant.get(tenant_id)
+        if entry is None or entry[0] != current_generation(tenant_id):
+            cls.warm([tenant_id])
+            entry = cls._by_tenant[tenant_id]
+        return entry
+
+    @classmethod
+    def sources_for(cls, tenant_id):
+        return cls._entry(tenant_id)[1]
+
+    @classmethod
+    def get_or_create(cls, tenant, name, source_type, description=''):
+        source = cls.sources_for(tenant.id).get(name)
+        if source is None:
+            source, _ = GradeSource.all_tenants.get_or_create(
+                tenant=tenant,
+                name=name,
+                defaults={'source_type': source_type, 'description': description}
+            )
+            # post_save dropped the tenant entry; reload it on next access
+        return source
+
+    @classmethod
+    def get(cls, tenant_id, source_id):
+        source = cls._entry(tenant_id)[2].get(source_id)
+        if source is None:
+            # Created by another process whose generation bump has not committed yet
+            cls.warm([tenant_id])
+            source = cls._by_tenant[tenant_id][2].get(source_id)
+        return source
+
+    @classmethod
+    def source_type(cls, tenant_id, source_id):
+        source = cls.get(tenant_id, source_id)
+        return source.source_type if source else None
+
+    @classmethod
+    def weight(cls, tenant_id, source_id, assessment_type=None):
+        """Reconciliation weight of a source, including the tenant's weight profile."""
+        from .reconciliation import ReconciliationPlan
+        return ReconciliationPlan.for_tenant(tenant_id, assessment_type).weight(source_id)
+
+    @classmethod
+    def invalidate(cls, tenant_id=None):
+        with cls._lock:
+            if tenant_id is None:
+                cls._by_tenant.clear()
+            else:
+                cls._by_tenant.pop(tenant_id, None)
+
+
+@receiver(post_save, sender=GradeSource)
+@receiver(post_delete, sender=GradeSource)
+def _invalidate_grade_sources(sender, instance, **kwargs):
+    tenant_id = instance.tenant_id
+    GradeSourceRegistry.invalidate(tenant_id)
+    # Other processes reload the tenant once the change is visible to them
+    transaction.on_commit(lambda: bump_generation(tenant_id))
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import (
     GradeSource, GradeRecord, GradeConflict, GradeFreeze,
-    GradeAmendment, ApprovalWorkflow, ApprovalStep
+    GradeAmendment, ApprovalWorkflow, ApprovalStep, ReconciliationWeightProfile,
+    GradeStatistics
 )
 
 
@@ -9,6 +10,20 @@ class GradeSourceSerializer(serializers.ModelSerializer):
     class Meta:
         model = GradeSource
         fields = '__all__'
+        read_only_fields = ['tenant']  # The request's tenant
+
+
+class ReconciliationWeightProfileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReconciliationWeightProfile
+        fields = '__all__'
+        read_only_fields = ['tenant']  # The request's tenant
+
+    def validate_weights(self, value):
+        for key, weight in value.items():
+            if not isinstance(weight, (int, float)) or weight < 0:
+                raise serializers.ValidationError(f'Weight for {key} must be a non-negative number')
+        return value
 
 
 class GradeRecordSerializer(serializers.ModelSerializer):
@@ -18,6 +33,7 @@ class GradeRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = GradeRecord
         fields = '__all__'
+        read_only_fields = ['tenant']  # The request's tenant
 
     def get_attempt_details(self, obj):
         return {
@@ -27,6 +43,14 @@ class GradeRecordSerializer(serializers.ModelSerializer):
         }
 
 
+class GradeStatisticsSerializer(serializers.ModelSerializer):
+    source_name = serializers.CharField(source='source.name', read_only=True, default=None)
+
+    class Meta:
+        model = GradeStatistics
+        exclude = ['m2']
+
+
 class GradeConflictSerializer(serializers.ModelSerializer):
     involved_records_details = serializers.SerializerMethodField()
 
@@ -50,6 +74,7 @@ class GradeFreezeSerializer(serializers.ModelSerializer):
     class Meta:
         model = GradeFreeze
         fields = '__all__'
+        read_only_fields = ['tenant']  # The request's tenant
 
 
 class GradeAmendmentSerializer(serializers.ModelSerializer):
@@ -60,6 +85,7 @@ class GradeAmendmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = GradeAmendment
         fields = '__all__'
+        read_only_fields = ['tenant']  # The request's tenant
 
     def get_grade_record_details(self, obj):
         return {
@@ -91,7 +117,7 @@ class ApprovalWorkflowSerializer(serializers.ModelSerializer):
     def get_resource_details(self, obj):
         if obj.workflow_type == 'grade_amendment':
             try:
-                amendment = GradeAmendment.objects.get(id=obj.resource_id)
+                amendment = GradeAmendment.all_tenants.get(tenant_id=obj.tenant_id, id=obj.resource_id)
                 return {
                     'type': 'amendment',
                     'old_score': amendment.old_score,
@@ -1,7 +1,10 @@
 from decimal import Decimal, ROUND_HALF_UP
 from statistics import mean, stdev
 from typing import List, Dict, Tuple
-from .models import GradeRecord, GradeConflict, GradeSource, ApprovalWorkflow, ApprovalStep, GradeAmendment, GradeFreeze
+from .models import GradeRecord, GradeConflict, ApprovalWorkflow, ApprovalStep, GradeAmendment, GradeFreeze
+from .reconciliation import ReconciliationPlan
+from .registry import GradeSourceRegistry
+from .tenancy import TenantResolver
 from django.utils import timezone
 from iam.models import User
 from assessment_core.models import Attempt
@@ -17,65 +20,85 @@ class GradingCompletionService:
         Called when grading is complete for an assessment.
         Triggers reconciliation for all attempts.
         """
-        attempts = Attempt.objects.filter(assessment=assessment, status='GRADED')
+        attempts = list(Attempt.objects.filter(assessment=assessment, status='GRADED'))
+        results = self.reconcile_batch(assessment, attempts)
 
         for attempt in attempts:
-            self._reconcile_attempt_grades(attempt)
+            if attempt.id in results:
+                self._record_final_grade(attempt, results[attempt.id])
 
         # Optionally freeze grades after reconciliation
         # self._freeze_assessment_grades(assessment)
 
-    def _reconcile_attempt_grades(self, attempt):
+    def reconcile_batch(self, assessment, attempts) -> Dict:
         """
-        Reconcile grades for a single attempt.
+        Weighted-average reconciliation for many attempts at once.
+        Loads all grade records in one query and reconciles each tenant's records
+        with a single matrix-vector product. Returns {attempt_id: result}.
         """
-        engine = GradeReconciliationEngine(attempt)
-        result = engine.reconcile_grades()
-
-        if 'error' not in result:
-            # Create final reconciled grade record
-            tenant = self._get_tenant_for_attempt(attempt)
-            if tenant:
-                source, _ = GradeSource.objects.get_or_create(
-                    tenant=tenant,
-                    name='Reconciliation',
-                    defaults={
-                        'source_type': 'reconciliation',
-                        'description': 'Final reconciled grade'
-                    }
-                )
+        by_tenant = {}
+        records = (
+            GradeRecord.all_tenants
+            .filter(tenant=TenantResolver.for_assessment(assessment), attempt__in=attempts, source__is_active=True)
+            .values_list('tenant_id', 'attempt_id', 'source_id', 'score', 'max_score')
+        )
+        max_scores = {}
+        scores = {}
+        for tenant_id, attempt_id, source_id, score, max_score in records.iterator():
+            by_tenant.setdefault(tenant_id, []).append((attempt_id, source_id, score))
+            max_scores.setdefault(attempt_id, max_score)
+            scores.setdefault(attempt_id, []).append(float(score))
+
+        results = {}
+        for tenant_id, rows in by_tenant.items():
+            plan = ReconciliationPlan.for_tenant(tenant_id, assessment.assessment_type)
+            for attempt_id, weighted in plan.reconcile_rows(rows).items():
+                if weighted is None:
+                    continue
+                avg_score = _to_decimal(weighted)
+                max_score = max_scores[attempt_id]
+                results[attempt_id] = {
+                    'reconciled_score': avg_score.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+                    'max_score': max_score,
+                    'percentage': ((avg_score / max_score) * 100).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+                    'algorithm': 'weighted_average',
+                    'sources_used': len(scores[attempt_id]),
+                    'confidence': _confidence(scores[attempt_id], max_score)
+                }
+        return results
+
+    def _record_final_grade(self, attempt, result):
+        """
+        Create the final reconciled grade record and copy it onto the attempt.
+        """
+        tenant = self._get_tenant_for_attempt(attempt)
+        if tenant:
+            source = GradeSourceRegistry.get_or_create(
+                tenant, 'Reconciliation', 'reconciliation', 'Final reconciled grade'
+            )
 
-                final_record = GradeRecord.objects.create(
-                    tenant=tenant,
-                    attempt=attempt,
-                    source=source,
-                    score=result['reconciled_score'],
-                    max_score=result['max_score'],
-                    percentage=result['percentage'],
-                    metadata={'algorithm': result['algorithm'], 'confidence': str(result['confidence'])},
-                    is_final=True
-                )
+            final_record = GradeRecord.objects.create(
+                tenant=tenant,
+                attempt=attempt,
+                source=source,
+                score=result['reconciled_score'],
+                max_score=result['max_score'],
+                percentage=result['percentage'],
+                metadata={'algorithm': result['algorithm'], 'confidence': str(result['confidence'])},
+                is_final=True
+            )
 
-                # Update attempt with final grade
-                attempt.raw_score = final_record.score
-                attempt.max_score = final_record.max_score
-                attempt.percentage = final_record.percentage
-                attempt.save()
+            # Update attempt with final grade
+            attempt.raw_score = final_record.score
+            attempt.max_score = final_record.max_score
+            attempt.percentage = final_record.percentage
+            attempt.save()
 
     def _get_tenant_for_attempt(self, attempt):
         """
         Get tenant for an attempt based on institution.
         """
-        from iam.models import Tenant
-        institution = attempt.assessment.course.institution
-        try:
-            return Tenant.objects.get(name=institution.name)
-        except Tenant.DoesNotExist:
-            # Create tenant if it doesn't exist
-            return Tenant.objects.create(
-                name=institution.name,
-                admin_contact={'institution_id': str(institution.id)}
-            )
+        return TenantResolver.for_attempt(attempt)
 
     def _freeze_assessment_grades(self, assessment):
         """
@@ -93,15 +116,7 @@ class GradingCompletionService:
         """
         Get tenant for an assessment.
         """
-        from iam.models import Tenant
-        institution = assessment.course.institution
-        try:
-            return Tenant.objects.get(name=institution.name)
-        except Tenant.DoesNotExist:
-            return Tenant.objects.create(
-                name=institution.name,
-                admin_contact={'institution_id': str(institution.id)}
-            )
+        return TenantResolver.for_assessment(assessment)
 
 
 class GradeReconciliationEngine:
@@ -112,7 +127,9 @@ class GradeReconciliationEngine:
 
     def __init__(self, attempt):
         self.attempt = attempt
-        self.grade_records = GradeRecord.objects.filter(attempt=attempt, source__is_active=True)
+        self.grade_records = GradeRecord.all_tenants.filter(
+            tenant=TenantResolver.for_attempt(attempt), attempt=attempt, source__is_active=True
+        )
 
     def detect_conflicts(self) -> List[Tuple[GradeConflict, List[GradeRecord]]]:
         """
@@ -240,25 +257,14 @@ class GradeReconciliationEngine:
 
     def _reconcile_weighted_average(self) -> Dict:
         """Calculate weighted average based on source reliability."""
-        weights = {
-            'auto_grader': 0.6,
-            'manual': 0.9,
-            'external': 0.7,
-            'reconciliation': 1.0,
-        }
-
-        total_weighted_score = Decimal('0.00')
-        total_weight = Decimal('0.00')
-
-        for record in self.grade_records:
-            weight = Decimal(str(weights.get(record.source.source_type, 0.5)))
-            total_weighted_score += record.score * weight
-            total_weight += weight
+        plan = ReconciliationPlan.for_tenant(self.grade_records[0].tenant_id, self.attempt.assessment.assessment_type)
+        rows = [(r.attempt_id, r.source_id, r.score) for r in self.grade_records]
+        weighted = plan.reconcile_rows(rows).get(self.attempt.id)
 
-        if total_weight == 0:
+        if weighted is None:
             return {'error': 'No valid weights'}
 
-        avg_score = total_weighted_score / total_weight
+        avg_score = _to_decimal(weighted)
         max_score = self.grade_records[0].max_score
 
         return {
@@ -272,10 +278,13 @@ class GradeReconciliationEngine:
 
     def _reconcile_manual_override(self) -> Dict:
         """Use manual grading if available, otherwise highest score."""
-        manual_records = self.grade_records.filter(source__source_type='manual')
+        manual_records = [
+            r for r in self.grade_records
+            if GradeSourceRegistry.source_type(r.tenant_id, r.source_id) == 'manual'
+        ]
         if manual_records:
             # Use the most recent manual grade
-            manual_record = manual_records.order_by('-graded_at').first()
+            manual_record = max(manual_records, key=lambda r: r.graded_at)
             return self._format_reconciled_result(manual_record, 'manual_override')
         else:
             return self._reconcile_highest()
@@ -297,22 +306,31 @@ class GradeReconciliationEngine:
         Calculate confidence in the reconciled score.
         Higher confidence when multiple sources agree, lower when they conflict.
         """
-        if len(self.grade_records) == 1:
-            return Decimal('0.8')  # Moderate confidence for single source
-
-        scores = [float(r.score) for r in self.grade_records]
-        std_dev = stdev(scores) if len(scores) > 1 else 0
-        variation_percent = (std_dev / float(max_score)) * 100
-
-        # Confidence decreases with variation
-        if variation_percent < 5:
-            return Decimal('0.95')
-        elif variation_percent < 10:
-            return Decimal('0.85')
-        elif variation_percent < 20:
-            return Decimal('0.70')
-        else:
-            return Decimal('0.50')
+        return _confidence([float(r.score) for r in self.grade_records], max_score)
+
+
+def _to_decimal(value: float) -> Decimal:
+    """Convert a float result back to Decimal without carrying binary noise into rounding."""
+    return Decimal(f'{value:.9f}')
+
+
+def _confidence(scores: List[float], max_score: Decimal) -> Decimal:
+    """Confidence decreases with the variation between source scores."""
+    if len(scores) == 1:
+        return Decimal('0.8')  # Moderate confidence for single source
+
+    std_dev = stdev(scores) if len(scores) > 1 else 0
+    variation_percent = (std_dev / float(max_score)) * 100
+
+    # Confidence decreases with variation
+    if variation_percent < 5:
+        return Decimal('0.95')
+    elif variation_percent < 10:
+        return Decimal('0.85')
+    elif variation_percent < 20:
+        return Decimal('0.70')
+    else:
+        return Decimal('0.50')
 
 
 class ApprovalWorkflowEngine:
@@ -406,7 +424,7 @@ class ApprovalWorkflowEngine:
         Apply the approved amendment to the grade record.
         """
 
-        amendment = GradeAmendment.objects.get(id=amendment_id)
+        amendment = GradeAmendment.all_tenants.get(tenant=self.tenant, id=amendment_id)
         grade_record = amendment.grade_record
 
         # Update the grade record
@@ -2,8 +2,9 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from assessment_core.models import Attempt
 from .services import GradeReconciliationEngine
-from .models import GradeRecord, GradeSource, GradeAuditLog
-from iam.models import Tenant
+from .models import GradeRecord, GradeAuditLog
+from .registry import GradeSourceRegistry
+from .tenancy import TenantResolver
 
 
 @receiver(post_save, sender=Attempt)
@@ -12,26 +13,15 @@ def handle_attempt_graded(sender, instance, created, **kwargs):
     Automatically trigger grade reconciliation when an attempt is marked as graded.
     """
     if instance.status == 'GRADED' and not created:
-        # Check if we already have a final grade record
-        if not GradeRecord.objects.filter(attempt=instance, is_final=True).exists():
-            try:
-                # Get tenant
-                institution = instance.assessment.course.institution
-                tenant = Tenant.objects.filter(name=institution.name).first()
-                if not tenant:
-                    tenant = Tenant.objects.create(
-                        name=institution.name,
-                        admin_contact={'institution_id': str(institution.id)}
-                    )
+        # Get tenant
+        tenant = TenantResolver.for_attempt(instance)
 
+        # Check if we already have a final grade record (unscoped: this may run outside any tenant context)
+        if not GradeRecord.all_tenants.filter(tenant=tenant, attempt=instance, is_final=True).exists():
+            try:
                 # Get or create reconciliation source
-                source, _ = GradeSource.objects.get_or_create(
-                    tenant=tenant,
-                    name='Reconciliation',
-                    defaults={
-                        'source_type': 'reconciliation',
-                        'description': 'Automatic reconciliation on grading'
-                    }
+                source = GradeSourceRegistry.get_or_create(
+                    tenant, 'Reconciliation', 'reconciliation', 'Automatic reconciliation on grading'
                 )
 
                 # Run reconciliation
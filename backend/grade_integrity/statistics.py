@@ -0,0 +1,216 @@
+import math
+import threading
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from assessment_core.models import Assessment, Attempt
+from .models import GradeRecord, GradeStatistics
+from .registry import GradeSourceRegistry
+
+
+class GradeStatisticsService:
+    """
+    Incremental maintenance of GradeStatistics.
+
+    Count, mean and variance use Welford's online update (which can also remove
+    values), the histogram holds fixed 5-point percentage bins and percentiles are
+    interpolated from it, so no update ever needs to read raw grade records.
+
+    Grade record receivers only queue their changes; each transaction's changes are
+    applied once it commits, locking every affected statistics row once per
+    transaction instead of once per record inside the grading transaction.
+    Reconciled grades are kept out of the assessment-wide row, which would
+    otherwise count an attempt both per source and again as its final grade.
+    """
+
+    _local = threading.local()
+
+    @staticmethod
+    def add(tenant_id, assessment_id, source_id, percentage):
+        GradeStatisticsService._queue(tenant_id, assessment_id, source_id, round(float(percentage), 2), +1)
+
+    @staticmethod
+    def remove(tenant_id, assessment_id, source_id, percentage):
+        GradeStatisticsService._queue(tenant_id, assessment_id, source_id, round(float(percentage), 2), -1)
+
+    @staticmethod
+    def _queue(tenant_id, assessment_id, source_id, value, direction):
+        connection = transaction.get_connection()
+        pending = getattr(GradeStatisticsService._local, 'pending', None)
+        started = pending is None or not pending.waits_on(connection)
+        if started:
+            pending = GradeStatisticsService._local.pending = _PendingChanges()
+        sources = (source_id,) if _is_reconciliation(tenant_id, source_id) else (source_id, None)
+        for sid in sources:
+            pending.changes[(assessment_id, sid)].append((tenant_id, value, direction))
+        if started:
+            # Runs right away outside a transaction
+            transaction.on_commit(pending.apply)
+
+    @staticmethod
+    def apply(changes):
+        """Apply {(assessment_id, source_id): [(tenant_id, value, direction), ...]} in one transaction."""
+        with transaction.atomic():
+            # Never create rows for removals only: the assessment may be mid cascade-delete
+            wanted = {key: values[0][0] for key, values in changes.items() if any(d > 0 for _, _, d in values)}
+            live = set(Assessment.objects.filter(id__in={a for a, _ in wanted}).values_list('id', flat=True))
+            GradeStatistics.all_tenants.bulk_create([
+                GradeStatistics(
+                    tenant_id=tenant_id, assessment_id=assessment_id, source_id=source_id,
+                    histogram=[0] * GradeStatistics.HISTOGRAM_BINS
+                )
+                for (assessment_id, source_id), tenant_id in wanted.items() if assessment_id in live
+            ], ignore_conflicts=True)
+
+            match = Q()
+            for assessment_id, source_id in changes:
+                match |= Q(assessment_id=assessment_id, source_id=source_id)
+            rows = list(GradeStatistics.all_tenants.select_for_update().filter(match).order_by('pk'))
+            for stats in rows:
+                for _, value, direction in changes.get((stats.assessment_id, stats.source_id), ()):
+                    if direction > 0:
+                        _welford_add(stats, value)
+                    elif stats.count:
+                        _welford_remove(stats, value)
+                _refresh_derived(stats)
+            GradeStatistics.all_tenants.bulk_update(
+                rows, ['count', 'mean', 'm2', 'stdev', 'percentiles', 'histogram', 'updated_at']
+            )
+
+    @staticmethod
+    def rebuild(assessment):
+        """Recompute an assessment's statistics from its grade records (backfill / repair)."""
+        rows = {}
+        records = (
+            GradeRecord.all_tenants
+            .filter(attempt__assessment=assessment)
+            .values_list('tenant_id', 'source_id', 'source__source_type', 'percentage')
+        )
+        for tenant_id, source_id, source_type, percentage in records.iterator():
+            for sid in (source_id,) if source_type == 'reconciliation' else (source_id, None):
+                stats = rows.get(sid)
+                if stats is None:
+                    stats = rows[sid] = GradeStatistics(
+                        tenant_id=tenant_id, assessment=assessment, source_id=sid,
+                        histogram=[0] * GradeStatistics.HISTOGRAM_BINS
+                    )
+                _welford_add(stats, float(percentage))
+        with transaction.atomic():
+            GradeStatistics.all_tenants.filter(assessment=assessment).delete()
+            for stats in rows.values():
+                _refresh_derived(stats)
+            GradeStatistics.all_tenants.bulk_create(rows.values())
+        return len(rows)
+
+
+class _PendingChanges:
+    """Statistics changes queued by one transaction, applied after it commits."""
+
+    def __init__(self):
+        self.changes = defaultdict(list)
+        self.applied = False
+
+    def waits_on(self, connection):
+        # Still registered with the current transaction and savepoint (a rollback drops the callback)
+        savepoints = set(connection.savepoint_ids)
+        return not self.applied and connection.in_atomic_block and any(
+            func == self.apply and sids == savepoints for sids, func, _ in connection.run_on_commit
+        )
+
+    def apply(self):
+        self.applied = True
+        GradeStatisticsService.apply(self.changes)
+
+
+def _is_reconciliation(tenant_id, source_id):
+    return GradeSourceRegistry.source_type(tenant_id, source_id) == 'reconciliation'
+
+
+def _bin_for(value):
+    bins = GradeStatistics.HISTOGRAM_BINS
+    return min(max(int(value * bins // 100), 0), bins - 1)
+
+
+def _welford_add(stats, value):
+    stats.count += 1
+    delta = value - stats.mean
+    stats.mean += delta / stats.count
+    stats.m2 += delta * (value - stats.mean)
+    stats.histogram[_bin_for(value)] += 1
+
+
+def _welford_remove(stats, value):
+    stats.histogram[_bin_for(value)] = max(stats.histogram[_bin_for(value)] - 1, 0)
+    if stats.count == 1:
+        stats.count, stats.mean, stats.m2 = 0, 0.0, 0.0
+        return
+    old_mean = stats.mean
+    stats.count -= 1
+    stats.mean = (old_mean * (stats.count + 1) - value) / stats.count
+    stats.m2 = max(stats.m2 - (value - old_mean) * (value - stats.mean), 0.0)
+
+
+def _refresh_derived(stats):
+    stats.stdev = math.sqrt(stats.m2 / (stats.count - 1)) if stats.count > 1 else 0.0
+    stats.percentiles = _percentiles(stats.histogram, stats.count)
+
+
+def _percentiles(histogram, count):
+    """Interpolate percentiles from the histogram, assuming values spread evenly within a bin."""
+    if not count:
+        return {}
+    width = 100 / len(histogram)
+    result = {}
+    for p in GradeStatistics.PERCENTILES:
+        target = p / 100 * count
+        seen = 0
+        for i, n in enumerate(histogram):
+            if n and seen + n >= target:
+                result[f'p{p}'] = round(i * width + (target - seen) / n * width, 2)
+                break
+            seen += n
+    return result
+
+
+def _assessment_id_for(record):
+    if GradeRecord.attempt.is_cached(record):
+        return record.attempt.assessment_id
+    return Attempt.objects.values_list('assessment_id', flat=True).get(pk=record.attempt_id)
+
+
+def _changes_grade(update_fields):
+    return update_fields is None or bool({'source', 'source_id', 'percentage'} & set(update_fields))
+
+
+@receiver(pre_save, sender=GradeRecord)
+def _remember_previous_grade(sender, instance, update_fields=None, **kwargs):
+    instance._stats_previous = None
+    if not instance._state.adding and _changes_grade(update_fields):
+        instance._stats_previous = (
+            GradeRecord.all_tenants
+            .filter(pk=instance.pk)
+            .values_list('source_id', 'percentage')
+            .first()
+        )
+
+
+@receiver(post_save, sender=GradeRecord)
+def _update_statistics_on_save(sender, instance, created, update_fields=None, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    if not created and (not _changes_grade(update_fields) or previous == (instance.source_id, instance.percentage)):
+        return
+    assessment_id = _assessment_id_for(instance)
+    if previous:
+        GradeStatisticsService.remove(instance.tenant_id, assessment_id, previous[0], previous[1])
+    GradeStatisticsService.add(instance.tenant_id, assessment_id, instance.source_id, instance.percentage)
+
+
+@receiver(post_delete, sender=GradeRecord)
+def _update_statistics_on_delete(sender, instance, **kwargs):
+    try:
+        assessment_id = _assessment_id_for(instance)
+    except Attempt.DoesNotExist:
+        return  # Cascading delete of the attempt; its statistics go with the assessment
+    GradeStatisticsService.remove(instance.tenant_id, assessment_id, instance.source_id, instance.percentage)
@@ -0,0 +1,92 @@
+import threading
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from assessment_core.models import Assessment, Course, Institution
+from iam.models import Tenant
+
+
+class TenantResolver:
+    """
+    Process-local cache resolving institutions, assessments and attempts to their Tenant.
+
+    Institutions link to their tenant through `Institution.tenant` (backfilled by
+    `sync_tenants`). Institutions that are not linked yet fall back to the legacy
+    name match and are linked on first use. After warm-up, resolving the tenant of
+    an attempt only needs `attempt.assessment_id` and never touches the database.
+    """
+
+    _by_institution = {}
+    _by_assessment = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def for_attempt(cls, attempt):
+        return cls.for_assessment_id(attempt.assessment_id)
+
+    @classmethod
+    def for_assessment(cls, assessment):
+        return cls.for_assessment_id(assessment.id)
+
+    @classmethod
+    def for_assessment_id(cls, assessment_id):
+        tenant = cls._by_assessment.get(assessment_id)
+        if tenant is not None:
+            return tenant
+        assessment = Assessment.objects.select_related('course__institution__tenant').get(id=assessment_id)
+        tenant = cls.for_institution(assessment.course.institution)
+        if tenant is not None:
+            with cls._lock:
+                cls._by_assessment[assessment_id] = tenant
+        return tenant
+
+    @classmethod
+    def for_institution(cls, institution):
+        if institution is None:
+            return None
+        tenant = cls._by_institution.get(institution.id)
+        if tenant is not None:
+            return tenant
+        if institution.tenant_id:
+            tenant = institution.tenant
+        else:
+            tenant = cls._link_tenant(institution)
+        with cls._lock:
+            cls._by_institution[institution.id] = tenant
+        return tenant
+
+    @staticmethod
+    def _link_tenant(institution):
+        """Find (or create) the tenant matching the institution name and store the link."""
+        tenant = Tenant.objects.filter(name=institution.name).first()
+        if not tenant:
+            tenant = Tenant.objects.create(
+                name=institution.name,
+                admin_contact={'institution_id': str(institution.id), 'code': institution.code}
+            )
+        institution.tenant = tenant
+        institution.save(update_fields=['tenant'])
+        return tenant
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._by_institution.clear()
+            cls._by_assessment.clear()
+
+
+@receiver(post_save, sender=Institution)
+@receiver(post_delete, sender=Institution)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def _invalidate_tenant_cache(sender, **kwargs):
+    # Mapping changes are rare; dropping the whole cache keeps invalidation trivial.
+    TenantResolver.clear()
+
+
+@receiver(post_save, sender=Assessment)
+@receiver(post_delete, sender=Assessment)
+def _invalidate_assessment_tenant(sender, instance, **kwargs):
+    with TenantResolver._lock:
+        TenantResolver._by_assessment.pop(instance.id, None)
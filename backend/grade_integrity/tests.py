@@ -12,7 +12,7 @@ class GradeReconciliationTestCase(TestCase):
     def setUp(self):
         # Create test data
         self.tenant = Tenant.objects.create(name="Test Tenant")
-        self.institution = Institution.objects.create(name="Test University", code="TU")
+        self.institution = Institution.objects.create(name="Test University", code="TU", tenant=self.tenant)
         self.user = User.objects.create_user(username="testuser", email="test@example.com")
         self.course = Course.objects.create(
             institution=self.institution,
@@ -149,7 +149,7 @@ class IntegrationTestCase(TestCase):
     def setUp(self):
         # Create test data similar to other tests
         self.tenant = Tenant.objects.create(name="Test Tenant")
-        self.institution = Institution.objects.create(name="Test University", code="TU")
+        self.institution = Institution.objects.create(name="Test University", code="TU", tenant=self.tenant)
         self.user = User.objects.create_user(username="testuser", email="test@example.com")
         self.course = Course.objects.create(
             institution=self.institution,
@@ -205,7 +205,7 @@ class GradeModelTestCase(TestCase):
     def setUp(self):
         # Similar setup as above
         self.tenant = Tenant.objects.create(name="Test Tenant")
-        self.institution = Institution.objects.create(name="Test University", code="TU")
+        self.institution = Institution.objects.create(name="Test University", code="TU", tenant=self.tenant)
         self.user = User.objects.create_user(username="testuser", email="test@example.com")
         self.course = Course.objects.create(
             institution=self.institution,
@@ -265,3 +265,484 @@ class GradeModelTestCase(TestCase):
                 max_score=Decimal('10.0'),
                 percentage=Decimal('90.0')
             )
+
+
+class TenantResolverTestCase(TestCase):
+    def setUp(self):
+        from .tenancy import TenantResolver
+        TenantResolver.clear()
+        self.resolver = TenantResolver
+        self.institution = Institution.objects.create(name="Resolver University", code="RU")
+        self.user = User.objects.create_user(username="resolver", email="resolver@example.com")
+        self.course = Course.objects.create(
+            institution=self.institution,
+            course_code="CS201",
+            title="Algorithms"
+        )
+        self.assessment = Assessment.objects.create(
+            course=self.course,
+            title="Final Exam",
+            assessment_type="Q2_INST",
+            open_datetime=timezone.now(),
+            close_datetime=timezone.now() + timezone.timedelta(hours=2)
+        )
+        self.attempt = Attempt.objects.create(assessment=self.assessment, student=self.user)
+
+    def test_links_institution_to_existing_tenant_by_name(self):
+        tenant = Tenant.objects.create(name="Resolver University")
+        self.assertEqual(self.resolver.for_attempt(self.attempt), tenant)
+        self.institution.refresh_from_db()
+        self.assertEqual(self.institution.tenant, tenant)
+
+    def test_cached_resolution_does_not_query(self):
+        tenant = self.resolver.for_attempt(self.attempt)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolver.for_attempt(self.attempt), tenant)
+            self.assertEqual(self.resolver.for_assessment(self.assessment), tenant)
+
+    def test_institution_change_invalidates_cache(self):
+        self.resolver.for_attempt(self.attempt)
+        other = Tenant.objects.create(name="Other Tenant")
+        self.institution.tenant = other
+        self.institution.save()
+        self.assertEqual(self.resolver.for_attempt(self.attempt), other)
+
+    def test_sync_tenants_backfills_link(self):
+        from django.core.management import call_command
+        from io import StringIO
+        call_command('sync_tenants', stdout=StringIO())
+        self.institution.refresh_from_db()
+        self.assertIsNotNone(self.institution.tenant)
+        self.assertEqual(self.institution.tenant.name, "Resolver University")
+
+
+class GradeSourceRegistryTestCase(TestCase):
+    def setUp(self):
+        from .registry import GradeSourceRegistry
+        GradeSourceRegistry.invalidate()
+        self.registry = GradeSourceRegistry
+        self.tenant = Tenant.objects.create(name="Registry Tenant")
+        self.institution = Institution.objects.create(name="Registry University", code="REG", tenant=self.tenant)
+        self.user = User.objects.create_user(username="registry", email="registry@example.com")
+        self.course = Course.objects.create(institution=self.institution, course_code="CS301", title="Compilers")
+        self.assessment = Assessment.objects.create(
+            course=self.course,
+            title="Quiz",
+            assessment_type="Q1_CA",
+            open_datetime=timezone.now(),
+            close_datetime=timezone.now() + timezone.timedelta(hours=1)
+        )
+        self.attempt = Attempt.objects.create(assessment=self.assessment, student=self.user)
+        self.auto_grader = GradeSource.objects.create(tenant=self.tenant, name="Auto Grader", source_type="auto_grader")
+        self.manual_grader = GradeSource.objects.create(tenant=self.tenant, name="Manual Review", source_type="manual")
+        for source, score in ((self.auto_grader, '6.0'), (self.manual_grader, '9.0')):
+            GradeRecord.objects.create(
+                tenant=self.tenant,
+                attempt=self.attempt,
+                source=source,
+                score=Decimal(score),
+                max_score=Decimal('10.0'),
+                percentage=Decimal(score) * 10
+            )
+
+    def test_get_or_create_is_served_from_memory(self):
+        self.registry.warm([self.tenant.id])
+        with self.assertNumQueries(0):
+            source = self.registry.get_or_create(self.tenant, 'Auto Grader', 'auto_grader')
+        self.assertEqual(source, self.auto_grader)
+
+    def test_weighted_average_does_not_load_sources_per_record(self):
+        # Warm the registry and the compiled reconciliation plan
+        GradeReconciliationEngine(self.attempt).reconcile_grades('weighted_average')
+        engine = GradeReconciliationEngine(self.attempt)
+        with self.assertNumQueries(1):
+            result = engine.reconcile_grades('weighted_average')
+        # (6.0 * 0.6 + 9.0 * 0.9) / 1.5
+        self.assertEqual(result['reconciled_score'], Decimal('7.80'))
+
+    def test_source_save_invalidates_registry(self):
+        self.registry.warm([self.tenant.id])
+        self.manual_grader.source_type = 'external'
+        self.manual_grader.save()
+        self.assertEqual(self.registry.source_type(self.tenant.id, self.manual_grader.id), 'external')
+
+    def test_weight_lookup_follows_the_weight_profile(self):
+        from .models import ReconciliationWeightProfile
+        self.assertEqual(self.registry.weight(self.tenant.id, self.auto_grader.id), 0.6)
+        self.assertEqual(self.registry.weight(self.tenant.id, self.manual_grader.id), 0.9)
+        ReconciliationWeightProfile.objects.create(tenant=self.tenant, name="Default", weights={'manual': 2.0})
+        self.assertEqual(self.registry.weight(self.tenant.id, self.manual_grader.id), 2.0)
+
+    def test_source_changes_in_other_processes_are_picked_up(self):
+        from .registry import bump_generation
+        self.registry.warm([self.tenant.id])
+        # Another process: no signal reaches this one, only the shared generation moves
+        GradeSource.all_tenants.filter(pk=self.manual_grader.pk).update(source_type='external')
+        self.assertEqual(self.registry.source_type(self.tenant.id, self.manual_grader.id), 'manual')
+        bump_generation(self.tenant.id)
+        self.assertEqual(self.registry.source_type(self.tenant.id, self.manual_grader.id), 'external')
+
+
+class ReconciliationPlanTestCase(TestCase):
+    def setUp(self):
+        from .reconciliation import ReconciliationPlan
+        from .registry import GradeSourceRegistry
+        ReconciliationPlan.invalidate()
+        GradeSourceRegistry.invalidate()
+        self.plan_cls = ReconciliationPlan
+        self.institution = Institution.objects.create(name="Plan University", code="PU")
+        self.tenant = Tenant.objects.create(name="Plan University")
+        self.institution.tenant = self.tenant
+        self.institution.save()
+        self.course = Course.objects.create(institution=self.institution, course_code="MA101", title="Calculus")
+        self.assessment = Assessment.objects.create(
+            course=self.course,
+            title="Central Exam",
+            assessment_type="Q3_CENTRAL",
+            open_datetime=timezone.now(),
+            close_datetime=timezone.now() + timezone.timedelta(hours=3)
+        )
+        self.auto_grader = GradeSource.objects.create(tenant=self.tenant, name="Auto Grader", source_type="auto_grader")
+        self.manual_grader = GradeSource.objects.create(tenant=self.tenant, name="Manual Review", source_type="manual")
+        self.attempts = []
+        for i, (auto, manual) in enumerate([('6.0', '9.0'), ('4.0', None), ('10.0', '8.0')]):
+            student = User.objects.create_user(username=f"plan{i}", email=f"plan{i}@example.com")
+            attempt = Attempt.objects.create(assessment=self.assessment, student=student, status='GRADED')
+            self.attempts.append(attempt)
+            for source, score in ((self.auto_grader, auto), (self.manual_grader, manual)):
+                if score is None:
+                    continue
+                GradeRecord.objects.create(
+                    tenant=self.tenant,
+                    attempt=attempt,
+                    source=source,
+                    score=Decimal(score),
+                    max_score=Decimal('10.0'),
+                    percentage=Decimal(score) * 10
+                )
+
+    def test_profile_overrides_default_weights(self):
+        from .models import ReconciliationWeightProfile
+        ReconciliationWeightProfile.objects.create(
+            tenant=self.tenant, name="Central", assessment_type="Q3_CENTRAL",
+            weights={'auto_grader': 1.0, 'manual': 1.0}
+        )
+        result = GradeReconciliationEngine(self.attempts[0]).reconcile_grades('weighted_average')
+        self.assertEqual(result['reconciled_score'], Decimal('7.50'))
+
+    def test_plan_is_cached_until_profile_changes(self):
+        from .models import ReconciliationWeightProfile
+        plan = self.plan_cls.for_tenant(self.tenant.id, 'Q3_CENTRAL')
+        self.assertIs(self.plan_cls.for_tenant(self.tenant.id, 'Q3_CENTRAL'), plan)
+        self.assertEqual(plan.weight(self.manual_grader.id), 0.9)
+        ReconciliationWeightProfile.objects.create(tenant=self.tenant, name="Default", weights={'manual': 2.0})
+        plan = self.plan_cls.for_tenant(self.tenant.id, 'Q3_CENTRAL')
+        self.assertEqual(plan.weight(self.manual_grader.id), 2.0)
+
+    def test_profile_changes_in_other_processes_are_picked_up(self):
+        from .models import ReconciliationWeightProfile
+        from .registry import bump_generation
+        profile = ReconciliationWeightProfile.objects.create(tenant=self.tenant, name="Default", weights={'manual': 2.0})
+        self.assertEqual(self.plan_cls.for_tenant(self.tenant.id).weight(self.manual_grader.id), 2.0)
+        # Another process: no signal reaches this one, only the shared generation moves
+        ReconciliationWeightProfile.all_tenants.filter(pk=profile.pk).update(weights={'manual': 3.0})
+        self.assertEqual(self.plan_cls.for_tenant(self.tenant.id).weight(self.manual_grader.id), 2.0)
+        bump_generation(self.tenant.id)
+        self.assertEqual(self.plan_cls.for_tenant(self.tenant.id).weight(self.manual_grader.id), 3.0)
+
+    def test_one_default_profile_per_tenant(self):
+        from django.db import IntegrityError, transaction
+        from .models import ReconciliationWeightProfile
+        ReconciliationWeightProfile.objects.create(tenant=self.tenant, name="Default")
+        ReconciliationWeightProfile.objects.create(tenant=self.tenant, name="Central", assessment_type="Q3_CENTRAL")
+        for assessment_type in (None, "Q3_CENTRAL"):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                ReconciliationWeightProfile.objects.create(
+                    tenant=self.tenant, name="Duplicate", assessment_type=assessment_type
+                )
+
+    def test_services_ignore_the_tenant_context(self):
+        from iam.context import tenant_context
+        from .services import GradingCompletionService
+        with tenant_context():  # e.g. a request without a tenant: scoped managers see no rows
+            batch = GradingCompletionService().reconcile_batch(self.assessment, self.attempts)
+            single = GradeReconciliationEngine(self.attempts[0]).reconcile_grades('weighted_average')
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(single['reconciled_score'], batch[self.attempts[0].id]['reconciled_score'])
+
+    def test_batch_matches_single_attempt_reconciliation(self):
+        from .services import GradingCompletionService
+        batch = GradingCompletionService().reconcile_batch(self.assessment, self.attempts)
+        for attempt in self.attempts:
+            single = GradeReconciliationEngine(attempt).reconcile_grades('weighted_average')
+            self.assertEqual(batch[attempt.id]['reconciled_score'], single['reconciled_score'])
+            self.assertEqual(batch[attempt.id]['confidence'], single['confidence'])
+
+    def test_complete_grading_creates_final_records(self):
+        from .services import GradingCompletionService
+        GradingCompletionService().complete_grading_for_assessment(self.assessment)
+        finals = GradeRecord.objects.filter(attempt__in=self.attempts, is_final=True)
+        self.assertEqual(finals.count(), 3)
+        self.assertEqual(finals.get(attempt=self.attempts[1]).score, Decimal('4.00'))
+
+
+class GradeStatisticsTestCase(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Stats Tenant")
+        self.institution = Institution.objects.create(name="Stats University", code="SU", tenant=self.tenant)
+        self.course = Course.objects.create(institution=self.institution, course_code="ST101", title="Statistics")
+        self.assessment = Assessment.objects.create(
+            course=self.course,
+            title="Stats Exam",
+            assessment_type="Q2_INST",
+            open_datetime=timezone.now(),
+            close_datetime=timezone.now() + timezone.timedelta(hours=2)
+        )
+        self.source = GradeSource.objects.create(tenant=self.tenant, name="Manual Review", source_type="manual")
+        self.records = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, pct in enumerate(['40.00', '55.00', '70.00', '85.00']):
+                self.records.append(self._record(pct, student=f"stats{i}"))
+
+    def _record(self, pct, student, source=None):
+        student = User.objects.create_user(username=student, email=f"{student}@example.com")
+        attempt = Attempt.objects.create(assessment=self.assessment, student=student)
+        return GradeRecord.objects.create(
+            tenant=self.tenant,
+            attempt=attempt,
+            source=source or self.source,
+            score=Decimal(pct) / 10,
+            max_score=Decimal('10.0'),
+            percentage=Decimal(pct)
+        )
+
+    def _stats(self, source=None):
+        from .models import GradeStatistics
+        return GradeStatistics.objects.get(assessment=self.assessment, source=source)
+
+    def test_statistics_maintained_on_create(self):
+        from statistics import mean, stdev
+        values = [40.0, 55.0, 70.0, 85.0]
+        for stats in (self._stats(), self._stats(self.source)):
+            self.assertEqual(stats.count, 4)
+            self.assertAlmostEqual(stats.mean, mean(values))
+            self.assertAlmostEqual(stats.stdev, stdev(values))
+            self.assertEqual(sum(stats.histogram), 4)
+            self.assertIn('p50', stats.percentiles)
+
+    def test_amendment_and_delete_update_statistics(self):
+        from statistics import mean, stdev
+        record = self.records[0]
+        record.percentage = Decimal('100.00')
+        record.score = Decimal('10.0')
+        with self.captureOnCommitCallbacks(execute=True):
+            record.save()
+        stats = self._stats()
+        self.assertAlmostEqual(stats.mean, mean([100.0, 55.0, 70.0, 85.0]))
+        self.assertAlmostEqual(stats.stdev, stdev([100.0, 55.0, 70.0, 85.0]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.records[1].delete()
+        stats = self._stats()
+        self.assertEqual(stats.count, 3)
+        self.assertAlmostEqual(stats.mean, mean([100.0, 70.0, 85.0]))
+        self.assertEqual(sum(stats.histogram), 3)
+
+    def test_updates_are_applied_once_per_transaction(self):
+        from django.db import transaction
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for i, pct in enumerate(['10.00', '20.00', '30.00']):
+                    self._record(pct, student=f"batch{i}")
+            self.assertEqual(self._stats().count, 4)
+        self.assertEqual(len(callbacks), 1)
+        # Savepoint, assessment check, row inserts, locked read, bulk update
+        with self.assertNumQueries(6):
+            callbacks[0]()
+        self.assertEqual(self._stats().count, 7)
+        self.assertEqual(self._stats(self.source).count, 7)
+
+    def test_rolled_back_records_are_not_counted(self):
+        from django.db import transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self._record('10.00', student="rolled-back")
+                raise RuntimeError
+            self._record('20.00', student="kept")
+        self.assertEqual(self._stats().count, 5)
+        self.assertEqual(sum(self._stats().histogram), 5)
+
+    def test_reconciled_grades_stay_out_of_the_overall_row(self):
+        reconciliation = GradeSource.objects.create(
+            tenant=self.tenant, name="Reconciliation", source_type="reconciliation"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self._record('95.00', student="reconciled", source=reconciliation)
+        self.assertEqual(self._stats().count, 4)
+        self.assertEqual(self._stats(reconciliation).count, 1)
+        from .statistics import GradeStatisticsService
+        GradeStatisticsService.rebuild(self.assessment)
+        self.assertEqual(self._stats().count, 4)
+
+    def test_rebuild_matches_incremental(self):
+        from .statistics import GradeStatisticsService
+        before = self._stats()
+        GradeStatisticsService.rebuild(self.assessment)
+        after = self._stats()
+        self.assertEqual(after.count, before.count)
+        self.assertAlmostEqual(after.mean, before.mean)
+        self.assertAlmostEqual(after.stdev, before.stdev)
+        self.assertEqual(after.histogram, before.histogram)
+
+    def _client(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_login(User.objects.create_user(
+            username="stats-staff", email="stats-staff@example.com", institution_id=self.institution.id
+        ))
+        return client
+
+    def test_statistics_endpoint_is_read_only(self):
+        client = self._client()
+        url = '/api/grade-integrity/grade-statistics/'
+        response = client.get(url, {'assessment_id': str(self.assessment.id), 'source_id': 'all'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(response.json()[0]['count'], 4)
+        self.assertEqual(client.post(url, {}).status_code, 405)
+
+    def test_endpoints_are_scoped_to_the_request_tenant(self):
+        from rest_framework.test import APIClient
+        other = Tenant.objects.create(name="Other Tenant")
+        other_source = GradeSource.objects.create(tenant=other, name="Other Review", source_type="manual")
+        client = self._client()
+        response = client.get('/api/grade-integrity/grade-sources/', {'tenant_id': str(other.id)})
+        self.assertEqual([row['id'] for row in response.json()], [str(self.source.id)])
+        response = client.get('/api/grade-integrity/grade-records/')
+        self.assertEqual(len(response.json()), 4)
+        self.assertEqual(client.get(f'/api/grade-integrity/grade-sources/{other_source.id}/').status_code, 404)
+
+        response = client.post('/api/grade-integrity/grade-sources/', {
+            'tenant': str(other.id), 'name': 'Second Review', 'source_type': 'manual'
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(GradeSource.objects.get(name='Second Review').tenant, self.tenant)
+
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get('/api/grade-integrity/grade-statistics/').json(), [])
+
+
+class ItemAnalysisTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from assessment_core.models import Response as AttemptResponse
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Item Tenant")
+        self.institution = Institution.objects.create(name="Item University", code="IU", tenant=self.tenant)
+        self.course = Course.objects.create(institution=self.institution, course_code="IA101", title="Items")
+        self.assessment = Assessment.objects.create(
+            course=self.course,
+            title="Item Exam",
+            assessment_type="Q2_INST",
+            open_datetime=timezone.now(),
+            close_datetime=timezone.now() + timezone.timedelta(hours=2)
+        )
+        options = [{'text': 'A', 'correct': True}, {'text': 'B', 'correct': False}]
+        self.questions = [
+            Question.objects.create(
+                assessment=self.assessment, question_type="MCQ", question_text=f"Q{i}",
+                points=Decimal('1.0'), order_index=i, options=options
+            )
+            for i in range(3)
+        ]
+        # rows: attempts, columns: questions; 1 = answered 'A' (correct)
+        self.matrix = [[1, 1, 1], [1, 1, 0], [1, 0, 0], [0, 0, 0], [1, 1, 1]]
+        for i, row in enumerate(self.matrix):
+            student = User.objects.create_user(username=f"item{i}", email=f"item{i}@example.com")
+            attempt = Attempt.objects.create(assessment=self.assessment, student=student)
+            for question, correct in zip(self.questions, row):
+                AttemptResponse.objects.create(
+                    attempt=attempt, question=question,
+                    response_data={'selected': 'A' if correct else 'B'},
+                    points_awarded=Decimal(correct)
+                )
+
+    def test_item_statistics(self):
+        import numpy as np
+        from .item_analysis import ItemAnalysisService
+        result = ItemAnalysisService(self.assessment).compute()
+        matrix = np.array(self.matrix, dtype=float)
+        self.assertEqual(result['attempts'], 5)
+        self.assertEqual(result['items'], 3)
+
+        for j, item in enumerate(result['questions']):
+            self.assertAlmostEqual(item['p_value'], matrix[:, j].mean(), places=4)
+            rest = matrix.sum(axis=1) - matrix[:, j]
+            expected = np.corrcoef(matrix[:, j], rest)[0, 1]
+            self.assertAlmostEqual(item['point_biserial'], expected, places=4)
+            counts = {d['option']: d['count'] for d in item['distractors']}
+            self.assertEqual(counts, {'A': int(matrix[:, j].sum()), 'B': 5 - int(matrix[:, j].sum())})
+
+        k = 3
+        p = matrix.mean(axis=0)
+        kr20 = k / (k - 1) * (1 - (p * (1 - p)).sum() / matrix.sum(axis=1).var())
+        self.assertAlmostEqual(result['kr20'], kr20, places=4)
+
+    def test_unhashable_selection_counts_as_unknown(self):
+        from assessment_core.models import Response as AttemptResponse
+        from .item_analysis import ItemAnalysisService
+        AttemptResponse.objects.filter(question=self.questions[0], points_awarded=0).update(
+            response_data={'selected': ['A', 'B']}
+        )
+        item = ItemAnalysisService(self.assessment).compute()['questions'][0]
+        counts = {d['option']: d['count'] for d in item['distractors']}
+        self.assertEqual(counts, {'A': 4, 'B': 0})
+
+    def test_cached_until_responses_change(self):
+        from assessment_core.models import Response as AttemptResponse
+        from .item_analysis import ItemAnalysisService
+        service = ItemAnalysisService(self.assessment)
+        first = service.analyze()
+        with self.assertNumQueries(0):
+            self.assertEqual(service.analyze(), first)
+
+        response = AttemptResponse.objects.filter(question=self.questions[2], points_awarded=0).first()
+        response.points_awarded = Decimal('1.0')
+        response.response_data = {'selected': 'A'}
+        response.save()
+        updated = service.analyze()
+        self.assertGreater(updated['questions'][2]['p_value'], first['questions'][2]['p_value'])
+
+    def test_generation_survives_eviction(self):
+        from django.core.cache import cache
+        from .item_analysis import _generation_key, bump_generation, current_generation
+        before = current_generation(self.assessment.id)
+        bump_generation(self.assessment.id)
+        self.assertEqual(current_generation(self.assessment.id), before + 1)
+        cache.delete(_generation_key(self.assessment.id))
+        # A reseeded counter must not land on a generation whose results may still be cached
+        self.assertGreater(current_generation(self.assessment.id), before + 1)
+        cache.delete(_generation_key(self.assessment.id))
+        bump_generation(self.assessment.id)
+        self.assertGreater(current_generation(self.assessment.id), before + 1)
+
+    def test_item_analysis_endpoint(self):
+        from rest_framework.test import APIClient
+        url = f'/api/grade-integrity/item-analysis/{self.assessment.id}/'
+        client = APIClient()
+        client.force_login(User.objects.create_user(
+            username="item-staff", email="item-staff@example.com", institution_id=self.institution.id
+        ))
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['questions']), 3)
+        self.assertEqual(client.get('/api/grade-integrity/item-analysis/not-a-uuid/').status_code, 404)
+
+        # Another tenant's users, and requests without a tenant, do not see the assessment
+        other = Institution.objects.create(name="Other University", code="OU", tenant=Tenant.objects.create(name="Other"))
+        outsider = APIClient()
+        outsider.force_login(User.objects.create_user(
+            username="outsider", email="outsider@example.com", institution_id=other.id
+        ))
+        self.assertEqual(outsider.get(url).status_code, 404)
+        self.assertEqual(APIClient().get(url).status_code, 404)
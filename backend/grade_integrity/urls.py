@@ -5,6 +5,9 @@ from . import views
 router = DefaultRouter()
 router.register(r'grade-sources', views.GradeSourceViewSet)
 router.register(r'grade-records', views.GradeRecordViewSet)
+router.register(r'weight-profiles', views.ReconciliationWeightProfileViewSet)
+router.register(r'grade-statistics', views.GradeStatisticsViewSet)
+router.register(r'item-analysis', views.ItemAnalysisViewSet, basename='item-analysis')
 router.register(r'grade-conflicts', views.GradeConflictViewSet)
 router.register(r'grade-freezes', views.GradeFreezeViewSet)
 router.register(r'grade-amendments', views.GradeAmendmentViewSet)
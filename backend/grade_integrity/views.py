@@ -2,47 +2,112 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import PermissionDenied
 from .models import (
     GradeSource, GradeRecord, GradeConflict, GradeFreeze,
-    GradeAmendment, ApprovalWorkflow, GradeAuditLog
+    GradeAmendment, ApprovalWorkflow, GradeAuditLog, ReconciliationWeightProfile,
+    GradeStatistics
 )
 from .serializers import (
     GradeSourceSerializer, GradeRecordSerializer, GradeConflictSerializer,
-    GradeFreezeSerializer, GradeAmendmentSerializer, ApprovalWorkflowSerializer
+    GradeFreezeSerializer, GradeAmendmentSerializer, ApprovalWorkflowSerializer,
+    ReconciliationWeightProfileSerializer, GradeStatisticsSerializer
 )
 from .services import GradeReconciliationEngine, ApprovalWorkflowEngine, GradingCompletionService
+from .item_analysis import ItemAnalysisService
+from .registry import GradeSourceRegistry
+from .tenancy import TenantResolver
 from assessment_core.models import Attempt
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
+from iam.context import TenantScopedViewMixin
 
 
-class GradeSourceViewSet(viewsets.ModelViewSet):
+def _request_tenant(request):
+    """The request's tenant (resolved once by iam.middleware.TenantContextMiddleware)."""
+    if request.tenant_context.tenant_id is None:
+        raise PermissionDenied('No tenant is associated with this request.')
+    return request.tenant
+
+
+def _in_request_tenant(request, tenant):
+    """Whether rows of `tenant` are visible to the request: its own tenant, or any for unrestricted staff."""
+    context = request.tenant_context
+    if context.tenant_id is None:
+        return context.unrestricted
+    return tenant is not None and tenant.id == context.tenant_id
+
+
+class GradeSourceViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
     queryset = GradeSource.objects.all()
     serializer_class = GradeSourceSerializer
 
-    def get_queryset(self):
-        tenant_id = self.request.query_params.get('tenant_id')
-        if tenant_id:
-            return self.queryset.filter(tenant_id=tenant_id)
-        return self.queryset
+    def perform_create(self, serializer):
+        serializer.save(tenant=_request_tenant(self.request))
+
 
+class ReconciliationWeightProfileViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
+    queryset = ReconciliationWeightProfile.objects.all()
+    serializer_class = ReconciliationWeightProfileSerializer
+
+    def perform_create(self, serializer):
+        serializer.save(tenant=_request_tenant(self.request))
 
-class GradeRecordViewSet(viewsets.ModelViewSet):
+
+class GradeRecordViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
     queryset = GradeRecord.objects.all()
     serializer_class = GradeRecordSerializer
 
     def get_queryset(self):
-        tenant_id = self.request.query_params.get('tenant_id')
         attempt_id = self.request.query_params.get('attempt_id')
-        queryset = self.queryset
-        if tenant_id:
-            queryset = queryset.filter(tenant_id=tenant_id)
+        queryset = super().get_queryset()
         if attempt_id:
             queryset = queryset.filter(attempt_id=attempt_id)
         return queryset
 
+    def perform_create(self, serializer):
+        serializer.save(tenant=_request_tenant(self.request))
+
+
+class GradeStatisticsViewSet(TenantScopedViewMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only access to materialized grade statistics.
+    Served from GradeStatistics rows; never scans grade records.
+    """
+    queryset = GradeStatistics.objects.select_related('source')
+    serializer_class = GradeStatisticsSerializer
+
+    def get_queryset(self):
+        assessment_id = self.request.query_params.get('assessment_id')
+        source_id = self.request.query_params.get('source_id')
+        queryset = super().get_queryset()
+        if assessment_id:
+            queryset = queryset.filter(assessment_id=assessment_id)
+        if source_id == 'all':
+            queryset = queryset.filter(source__isnull=True)
+        elif source_id:
+            queryset = queryset.filter(source_id=source_id)
+        return queryset
+
+
+class ItemAnalysisViewSet(viewsets.ViewSet):
+    """
+    Classical test theory item analysis per assessment (p-values, point-biserial,
+    distractors, KR-20). GET /item-analysis/{assessment_id}/
+    """
+
+    def retrieve(self, request, pk=None):
+        from assessment_core.models import Assessment
+        try:
+            assessment = Assessment.objects.get(id=pk)
+        except (Assessment.DoesNotExist, ValueError, DjangoValidationError):
+            return Response({'error': 'Assessment not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not _in_request_tenant(request, TenantResolver.for_assessment(assessment)):
+            return Response({'error': 'Assessment not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ItemAnalysisService(assessment).analyze())
 
-class GradeConflictViewSet(viewsets.ModelViewSet):
+
+class GradeConflictViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
     queryset = GradeConflict.objects.all()
     serializer_class = GradeConflictSerializer
 
@@ -68,18 +133,12 @@ class GradeConflictViewSet(viewsets.ModelViewSet):
         return Response({'status': 'resolved'})
 
 
-class GradeFreezeViewSet(viewsets.ModelViewSet):
+class GradeFreezeViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
     queryset = GradeFreeze.objects.all()
     serializer_class = GradeFreezeSerializer
 
-    def get_queryset(self):
-        tenant_id = self.request.query_params.get('tenant_id')
-        if tenant_id:
-            return self.queryset.filter(tenant_id=tenant_id)
-        return self.queryset
-
     def perform_create(self, serializer):
-        freeze = serializer.save()
+        freeze = serializer.save(tenant=_request_tenant(self.request))
         # Log the freeze
         GradeAuditLog.objects.create(
             tenant=freeze.tenant,
@@ -90,18 +149,12 @@ class GradeFreezeViewSet(viewsets.ModelViewSet):
         )
 
 
-class GradeAmendmentViewSet(viewsets.ModelViewSet):
+class GradeAmendmentViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
     queryset = GradeAmendment.objects.all()
     serializer_class = GradeAmendmentSerializer
 
-    def get_queryset(self):
-        tenant_id = self.request.query_params.get('tenant_id')
-        if tenant_id:
-            return self.queryset.filter(tenant_id=tenant_id)
-        return self.queryset
-
     def perform_create(self, serializer):
-        amendment = serializer.save()
+        amendment = serializer.save(tenant=_request_tenant(self.request))
         # Create approval workflow
         engine = ApprovalWorkflowEngine(amendment.tenant)
         engine.create_amendment_workflow(amendment)
@@ -122,7 +175,7 @@ class GradeAmendmentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class ApprovalWorkflowViewSet(viewsets.ModelViewSet):
+class ApprovalWorkflowViewSet(TenantScopedViewMixin, viewsets.ModelViewSet):
     queryset = ApprovalWorkflow.objects.all()
     serializer_class = ApprovalWorkflowSerializer
 
@@ -164,6 +217,8 @@ class ReconciliationViewSet(viewsets.ViewSet):
             attempt = Attempt.objects.get(id=attempt_id)
         except Attempt.DoesNotExist:
             return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not _in_request_tenant(request, TenantResolver.for_attempt(attempt)):
+            return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
 
         engine = GradeReconciliationEngine(attempt)
         result = engine.reconcile_grades(algorithm)
@@ -172,11 +227,11 @@ class ReconciliationViewSet(viewsets.ViewSet):
             return Response(result, status=status.HTTP_400_BAD_REQUEST)
 
         # Create final grade record if reconciliation successful
-        tenant = attempt.assessment.course.institution  # Assuming tenant from institution
+        tenant = TenantResolver.for_attempt(attempt)
         final_record = GradeRecord.objects.create(
             tenant=tenant,
             attempt=attempt,
-            source=get_object_or_404(GradeSource, name='Reconciliation', tenant=tenant),
+            source=GradeSourceRegistry.get_or_create(tenant, 'Reconciliation', 'reconciliation'),
             score=result['reconciled_score'],
             max_score=result['max_score'],
             percentage=result['percentage'],
@@ -210,6 +265,8 @@ class ReconciliationViewSet(viewsets.ViewSet):
             attempt = Attempt.objects.get(id=attempt_id)
         except Attempt.DoesNotExist:
             return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not _in_request_tenant(request, TenantResolver.for_attempt(attempt)):
+            return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
 
         engine = GradeReconciliationEngine(attempt)
         conflicts_data = engine.detect_conflicts()
@@ -256,6 +313,8 @@ class ReconciliationViewSet(viewsets.ViewSet):
             assessment = Assessment.objects.get(id=assessment_id)
         except Assessment.DoesNotExist:
             return Response({'error': 'Assessment not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not _in_request_tenant(request, TenantResolver.for_assessment(assessment)):
+            return Response({'error': 'Assessment not found'}, status=status.HTTP_404_NOT_FOUND)
 
         service = GradingCompletionService()
         service.complete_grading_for_assessment(assessment)
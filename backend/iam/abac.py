@@ -0,0 +1,165 @@
+"""Compiler for 'simple' ABAC policy expressions.
+
+Expressions are parsed once into a Python AST, checked against the supported
+subset and turned into a tree of closures, so evaluating a policy is a plain
+function call on the request context. The supported subset is:
+
+- the names `user` and `resource`, `.attrs` attribute access on them and
+  subscripts with constant keys, e.g. `user.attrs['dept']`, `user['attrs']['dept']`,
+  `resource['attrs']['owner']`
+- str / int / float / bool / None constants and lists or tuples of constants
+- comparisons (==, !=, <, >, <=, >=, in, not in), including chained ones
+- `and`, `or` and `not`
+
+Anything else (calls, other names or attributes, arithmetic, comprehensions...)
+is rejected at compile time with an ExpressionError.
+"""
+import ast
+import hashlib
+import operator
+import threading
+
+NAMES = ('user', 'resource')
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.Gt: operator.gt,
+    ast.LtE: operator.le,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+_CONSTANT_TYPES = (str, int, float, bool, type(None))
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression is not valid in the supported ABAC subset."""
+
+    def __init__(self, message, node=None):
+        if node is not None and hasattr(node, 'col_offset'):
+            message = f"{message} (column {node.col_offset + 1})"
+        super().__init__(message)
+
+
+def compile_expression(source):
+    """Parse and validate `source`, returning a function of the context dict ({'user': ..., 'resource': ...})."""
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError(f"invalid syntax: {e.msg} (column {e.offset or 0})")
+    fn = _compile(tree.body)
+    return lambda context: bool(fn(context))
+
+
+def _compile(node):
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(v) for v in node.values]
+        if isinstance(node.op, ast.And):
+            def and_(ctx):
+                value = True
+                for part in parts:
+                    value = part(ctx)
+                    if not value:
+                        return value
+                return value
+            return and_
+
+        def or_(ctx):
+            value = False
+            for part in parts:
+                value = part(ctx)
+                if value:
+                    return value
+            return value
+        return or_
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = _compile(node.operand)
+        return lambda ctx: not operand(ctx)
+
+    if isinstance(node, ast.Compare):
+        left = _compile(node.left)
+        steps = []
+        for op, comparator in zip(node.ops, node.comparators):
+            fn = _COMPARISONS.get(type(op))
+            if fn is None:
+                raise ExpressionError(f"unsupported comparison '{type(op).__name__}'", node)
+            steps.append((fn, _compile(comparator)))
+
+        def compare(ctx):
+            a = left(ctx)
+            for fn, right in steps:
+                b = right(ctx)
+                if not fn(a, b):
+                    return False
+                a = b
+            return True
+        return compare
+
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, _CONSTANT_TYPES):
+            raise ExpressionError(f"unsupported constant {node.value!r}", node)
+        value = node.value
+        return lambda ctx: value
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = []
+        for elt in node.elts:
+            if not isinstance(elt, ast.Constant) or not isinstance(elt.value, _CONSTANT_TYPES):
+                raise ExpressionError("list elements must be constants", elt)
+            values.append(elt.value)
+        values = tuple(values)
+        return lambda ctx: values
+
+    if isinstance(node, ast.Name):
+        if node.id not in NAMES:
+            raise ExpressionError(f"unknown name '{node.id}'", node)
+        name = node.id
+        return lambda ctx: ctx[name]
+
+    if isinstance(node, ast.Attribute):
+        if node.attr != 'attrs' or not (isinstance(node.value, ast.Name) and node.value.id in NAMES):
+            raise ExpressionError(f"unsupported attribute '{node.attr}'", node)
+        base = _compile(node.value)
+        return lambda ctx: base(ctx)['attrs']
+
+    if isinstance(node, ast.Subscript):
+        key_node = node.slice
+        if not isinstance(key_node, ast.Constant) or not isinstance(key_node.value, (str, int)):
+            raise ExpressionError("subscripts must be string or integer constants", node)
+        base = _compile(node.value)
+        key = key_node.value
+        return lambda ctx: base(ctx)[key]
+
+    raise ExpressionError(f"unsupported expression '{type(node).__name__}'", node)
+
+
+class CompiledPolicyCache:
+    """Process-local cache of compiled expressions keyed by (policy id, expression hash).
+
+    Editing a policy changes the hash, so a stale closure is never served; the
+    previous compilation of the policy is dropped at the same time.
+    """
+
+    _compiled = {}  # (policy_id, sha1(expression)) -> callable
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, policy_id, expression):
+        key = (policy_id, hashlib.sha1(expression.encode()).hexdigest())
+        fn = cls._compiled.get(key)
+        if fn is None:
+            fn = compile_expression(expression)
+            with cls._lock:
+                if policy_id is not None:
+                    for stale in [k for k in cls._compiled if k[0] == policy_id]:
+                        del cls._compiled[stale]
+                cls._compiled[key] = fn
+        return fn
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._compiled.clear()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Tenant, User, Role, Permission, RolePermission, RoleBinding, DelegatedGrant, EmergencyAccess, AuditLog, RevokedToken, TenantPolicy
+from .models import Tenant, User, Role, RoleInheritance, Permission, RolePermission, RoleBinding, DelegatedGrant, EmergencyAccess, AuditLog, AuditArchive, RevokedToken, TenantPolicy
 
 
 @admin.register(Tenant)
@@ -18,6 +18,11 @@ class RoleAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'tenant', 'builtin')
 
 
+@admin.register(RoleInheritance)
+class RoleInheritanceAdmin(admin.ModelAdmin):
+    list_display = ('id', 'role', 'includes', 'created_at')
+
+
 @admin.register(Permission)
 class PermissionAdmin(admin.ModelAdmin):
     list_display = ('id', 'name')
@@ -46,7 +51,14 @@ class EmergencyAccessAdmin(admin.ModelAdmin):
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ('id', 'tenant', 'actor', 'action', 'created_at')
-    readonly_fields = ('id', 'tenant', 'actor', 'action', 'resource', 'prev_hash', 'hash', 'created_at')
+    readonly_fields = ('id', 'tenant', 'actor', 'action', 'resource', 'prev_hash', 'hash', 'hash_ts', 'created_at')
+
+
+@admin.register(AuditArchive)
+class AuditArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tenant', 'period_start', 'row_count', 'first_id', 'last_id', 'created_at')
+    exclude = ('payload',)
+    readonly_fields = ('tenant', 'period_start', 'period_end', 'first_id', 'last_id', 'row_count', 'first_prev_hash', 'last_hash', 'payload_sha256', 'created_at')
 
 
 @admin.register(RevokedToken)
@@ -59,24 +71,23 @@ class RevokedTokenAdmin(admin.ModelAdmin):
 
 @admin.register(TenantPolicy)
 class TenantPolicyAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'tenant', 'version', 'last_deployed_at', 'last_deploy_status')
-    readonly_fields = ('last_deployed_at', 'last_deploy_status')
+    list_display = ('id', 'name', 'tenant', 'mode', 'version', 'last_deployed_at', 'last_deploy_status')
+    readonly_fields = ('last_deployed_at', 'last_deploy_status', 'compiled_ir')
     search_fields = ('name', 'tenant__name')
     actions = ['deploy_to_opa']
 
     def deploy_to_opa(self, request, queryset):
-        from iam.opa_client import OPAClient
-        from django.utils import timezone
+        from iam.local_policies import deploy_policy
         for policy in queryset:
-            path = f"tenant_{policy.tenant.id}_{policy.name}"
             try:
-                OPAClient.push_policy(path, policy.rego)
-                policy.last_deployed_at = timezone.now()
-                policy.last_deploy_status = 'ok'
-                policy.save()
-                self.message_user(request, f"Deployed {policy.name} -> {path}")
+                target = deploy_policy(policy)
             except Exception as e:
-                policy.last_deploy_status = f"error: {str(e)[:200]}"
-                policy.save()
                 self.message_user(request, f"Failed to deploy {policy.name}: {e}", level='error')
+                continue
+            if target == 'local':
+                self.message_user(request, f"Compiled {policy.name} -> local")
+            elif policy.mode == 'local':
+                self.message_user(request, f"{policy.name} is not translatable; deployed to OPA -> {target}", level='warning')
+            else:
+                self.message_user(request, f"Deployed {policy.name} -> {target}")
     deploy_to_opa.short_description = 'Deploy selected policies to OPA'
@@ -7,5 +7,5 @@ class TenantPolicySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TenantPolicy
-        fields = ('id', 'tenant', 'name', 'rego', 'version', 'last_deployed_at', 'last_deploy_status')
+        fields = ('id', 'tenant', 'name', 'rego', 'mode', 'version', 'last_deployed_at', 'last_deploy_status')
         read_only_fields = ('id', 'last_deployed_at', 'last_deploy_status')
@@ -1,9 +1,12 @@
 from django.urls import path
-from .views import TokenIssueView
+from .views import TokenIssueView, CacheStatsView
 from iam.api.views_policy import TenantPolicyListCreate, TenantPolicyDeploy
+from iam.api.views_provisioning import BulkProvisionView
 
 urlpatterns = [
     path('token/', TokenIssueView.as_view(), name='iam-token'),
+    path('cache/stats/', CacheStatsView.as_view(), name='iam-cache-stats'),
     path('policies/', TenantPolicyListCreate.as_view(), name='tenantpolicy-list-create'),
     path('policies/<uuid:pk>/deploy/', TenantPolicyDeploy.as_view(), name='tenantpolicy-deploy'),
+    path('provision/', BulkProvisionView.as_view(), name='iam-bulk-provision'),
 ]
@@ -24,3 +24,12 @@ class TokenIssueView(APIView):
             return Response({'error': 'private_key_not_configured'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         token = JWTHelper.create_token(private_key, getattr(settings, 'IAM_ISSUER', 'https://auth'), f'user:{user.id}', user.tenant.id, user.id, roles=data.get('roles', []), scope=data.get('scope', []), attrs=data.get('attrs', {}), exp_seconds=data.get('exp_seconds', 900))
         return Response({'token': token})
+
+
+class CacheStatsView(APIView):
+    """Hit/miss/eviction counters of this worker's IAM cache tiers, for sizing IAM_LOCAL_CACHE_SIZE/TTL."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        from iam.local_cache import iam_cache
+        return Response(iam_cache.stats())
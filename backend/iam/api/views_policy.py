@@ -16,7 +16,7 @@ class TenantPolicyListCreate(APIView):
         data = serializer.validated_data
         tenant_id = data['tenant']
         tenant = Tenant.objects.get(id=tenant_id)
-        policy = TenantPolicy.objects.create(tenant=tenant, name=data['name'], rego=data['rego'], version=data.get('version'))
+        policy = TenantPolicy.objects.create(tenant=tenant, name=data['name'], rego=data['rego'], mode=data.get('mode', 'remote'), version=data.get('version'))
         return Response(TenantPolicySerializer(policy).data, status=status.HTTP_201_CREATED)
 
 
@@ -0,0 +1,46 @@
+from django.core.exceptions import ValidationError
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+from iam.models import Tenant
+from iam.provisioning import KINDS, BulkProvisioner, ProvisioningError, read_rows
+
+
+class BulkProvisionView(APIView):
+    """Bulk import of bindings, delegated grants and role permissions for one tenant.
+
+    Accepts JSON ({'tenant', 'bindings': [...], 'grants': [...], 'role_permissions': [...], 'dry_run'})
+    or a multipart form with `tenant` and CSV/JSON files named after the kinds. Nothing is written
+    unless every row validates; see iam.provisioning.BulkProvisioner for the row formats.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        context = getattr(request, 'tenant_context', None)
+        tenant_id = request.data.get('tenant') or (context.tenant_id if context else None)
+        try:
+            found = bool(tenant_id) and Tenant.objects.filter(id=tenant_id).exists()
+        except ValidationError:
+            found = False
+        if not found:
+            return Response({'error': 'tenant_not_found'}, status=status.HTTP_404_NOT_FOUND)
+
+        data = {}
+        try:
+            for kind in KINDS:
+                if kind in request.FILES:
+                    upload = request.FILES[kind]
+                    data[kind] = read_rows(upload.read(), 'json' if upload.name.endswith('.json') else 'csv')
+                elif request.data.get(kind):
+                    data[kind] = request.data[kind]
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({'error': 'unreadable_file', 'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        actor_id = request.user.pk if request.user.is_authenticated else None
+        try:
+            summary = BulkProvisioner(tenant_id, actor_id=actor_id).run(data, dry_run=dry_run)
+        except ProvisioningError as e:
+            return Response({'error': 'invalid_rows', 'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'dry_run': dry_run, **summary}, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
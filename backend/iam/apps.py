@@ -1,7 +1,14 @@
+import atexit
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class IAMConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'iam'
     verbose_name = 'Identity and Access Management'
+
+    def ready(self):
+        from . import audit, checks, local_policies, signals  # noqa: F401
+        if getattr(settings, 'IAM_AUDIT_FLUSH_ON_EXIT', True):
+            atexit.register(audit.shutdown)
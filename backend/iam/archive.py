@@ -0,0 +1,191 @@
+import gzip
+import hashlib
+import json
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from django.db import transaction
+from .audit import BAD_HASH, BROKEN_LINK, entry_hash, unchained
+from .models import AuditArchive, AuditLog, Tenant
+
+# Compressed payloads larger than this spill from memory to a temporary file while a month is written
+SPOOL_SIZE = 8 * 1024 * 1024
+FIELDS = ('id', 'tenant_id', 'actor_id', 'action', 'resource', 'prev_hash', 'hash', 'hash_ts', 'created_at')
+
+
+class AuditChainError(ValueError):
+    """The chain does not verify; `entry_id` is the first broken entry."""
+
+    def __init__(self, entry_id, reason):
+        super().__init__(f'audit chain broken at id {entry_id}: {reason}')
+        self.entry_id = entry_id
+        self.reason = reason
+        self.archived = []
+
+
+def month_start(dt):
+    dt = dt.astimezone(dt_timezone.utc)
+    return datetime(dt.year, dt.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(dt):
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _extensions():
+    """Multi-table children of AuditLog (e.g. GradeAuditLog) whose rows are archived alongside their parent."""
+    return [
+        rel for rel in AuditLog._meta.related_objects
+        if rel.one_to_one and rel.field.remote_field.parent_link
+    ]
+
+
+class AuditArchiver:
+    """Moves closed months of each tenant's audit chain from AuditLog into AuditArchive.
+
+    Rows are archived in chain (id) order, one archive per tenant and month; a row
+    is never moved to an earlier month than the row before it, so archives stay
+    contiguous even when created_at is slightly out of order. Each month is verified
+    (links and, where hash_ts is stored, hashes) before its rows are deleted, and
+    rows of AuditLog children are stored with their parent under 'extensions'.
+    """
+
+    @staticmethod
+    def archive_tenant(tenant_id, cutoff, chunk_size=5000, dry_run=False):
+        """Archive the tenant's rows created before `cutoff` (a month start); returns [(period_start, rows)].
+
+        A month that does not verify raises AuditChainError, whose `archived` holds the months moved before it.
+        """
+        boundary = AuditLog.objects.filter(tenant_id=tenant_id, created_at__lt=cutoff).order_by('-id').values_list('id', flat=True).first()
+        prev = AuditArchive.objects.filter(tenant_id=tenant_id).order_by('-last_id').values_list('last_hash', flat=True).first()
+        archived = []
+        cursor = 0
+        while boundary is not None:
+            with transaction.atomic():
+                # Block writers of this tenant while the chain head moves into the archive
+                list(Tenant.objects.select_for_update().filter(pk=tenant_id).values_list('pk', flat=True))
+                try:
+                    archive = AuditArchiver._archive_month(tenant_id, prev, cursor, boundary, chunk_size, dry_run)
+                except AuditChainError as e:
+                    e.archived = archived
+                    raise
+            if archive is None:
+                break
+            prev, cursor = archive.last_hash, archive.last_id
+            archived.append((archive.period_start, archive.row_count))
+        return archived
+
+    @staticmethod
+    def _archive_month(tenant_id, prev, cursor, boundary, chunk_size, dry_run):
+        qs = AuditLog.objects.filter(tenant_id=tenant_id, id__gt=cursor, id__lte=boundary).order_by('id')
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as spool:
+            archive = AuditArchiver._write_month(spool, tenant_id, prev, cursor, qs, chunk_size)
+            if archive is None:
+                return None
+            spool.seek(0)
+            digest = hashlib.sha256()
+            for block in iter(lambda: spool.read(1024 * 1024), b''):
+                digest.update(block)
+            archive.payload_sha256 = digest.hexdigest()
+            if dry_run:
+                return archive
+            spool.seek(0)
+            archive.payload = spool.read()
+        archive.save()
+        # Cascades to the rows of AuditLog children
+        AuditLog.objects.filter(tenant_id=tenant_id, id__gte=archive.first_id, id__lte=archive.last_id).delete()
+        return archive
+
+    @staticmethod
+    def _write_month(spool, tenant_id, prev, cursor, qs, chunk_size):
+        """Verify the month's rows page by page and stream them, gzip-compressed, into `spool`; returns the unsaved archive."""
+        archive = None
+        with gzip.GzipFile(fileobj=spool, mode='wb') as out:
+            while True:
+                page = list(qs.filter(id__gt=cursor).values_list(*FIELDS)[:chunk_size])
+                if archive is None and page:
+                    period = month_start(page[0][8])
+                    archive = AuditArchive(
+                        tenant_id=tenant_id, period_start=period, period_end=next_month(period),
+                        first_id=page[0][0], row_count=0,
+                        # An unchained first row re-anchors after the previous archive's tail
+                        first_prev_hash=prev if unchained(page[0][6]) else page[0][5],
+                    )
+                if not page:
+                    break
+                split = next((i for i, row in enumerate(page) if row[8] >= archive.period_end), len(page))
+                rows = page[:split]
+                if not rows:
+                    break  # the next row belongs to a later month
+                extensions = AuditArchiver._extension_rows([row[0] for row in rows])
+                for row in rows:
+                    pk, _, actor_id, action, resource, prev_hash, h, ts, created_at = row
+                    if prev_hash != prev and not unchained(h):
+                        raise AuditChainError(pk, BROKEN_LINK)
+                    if ts and entry_hash(prev_hash, tenant_id, actor_id, action, resource, ts) != h:
+                        raise AuditChainError(pk, BAD_HASH)
+                    out.write((json.dumps({
+                        'id': pk,
+                        'actor': str(actor_id) if actor_id else None,
+                        'action': action,
+                        'resource': resource,
+                        'prev_hash': prev_hash,
+                        'hash': h,
+                        'hash_ts': ts,
+                        'created_at': created_at.isoformat(),
+                        'extensions': extensions.get(pk, {}),
+                    }, default=str) + '\n').encode())
+                    prev = h
+                archive.row_count += len(rows)
+                archive.last_id, archive.last_hash = rows[-1][0], rows[-1][6]
+                cursor = rows[-1][0]
+                if split < len(page):
+                    break
+        return archive
+
+    @staticmethod
+    def _extension_rows(ids):
+        found = {}
+        for rel in _extensions():
+            ptr = rel.field.attname
+            for values in rel.related_model.objects.filter(**{f'{ptr}__in': ids}).values(ptr, *[
+                f.attname for f in rel.related_model._meta.local_concrete_fields if f.attname != ptr
+            ]):
+                found.setdefault(values.pop(ptr), {})[rel.related_model._meta.label_lower] = values
+        return found
+
+    @staticmethod
+    def rows(archive):
+        """Decompress an archive's payload into row dicts, checking its digest first."""
+        payload = bytes(archive.payload)
+        if hashlib.sha256(payload).hexdigest() != archive.payload_sha256:
+            raise AuditChainError(archive.first_id, 'archive payload does not match its digest')
+        return [json.loads(line) for line in gzip.decompress(payload).splitlines()]
+
+    @staticmethod
+    def verify(tenant_id=None, deep=False):
+        """Check that each tenant's archives link into one chain; with `deep`, recompute every archived row.
+        Returns {tenant_id: last archived hash}, the seed for verifying the live table; raises AuditChainError.
+        """
+        qs = AuditArchive.objects.order_by('tenant_id', 'last_id')
+        if tenant_id:
+            qs = qs.filter(tenant_id=tenant_id)
+        if not deep:
+            qs = qs.defer('payload')
+        tails = {}
+        for archive in qs.iterator(chunk_size=100):
+            key = str(archive.tenant_id)
+            if archive.first_prev_hash != tails.get(key):
+                raise AuditChainError(archive.first_id, BROKEN_LINK)
+            if deep:
+                prev = archive.first_prev_hash
+                rows = AuditArchiver.rows(archive)
+                for row in rows:
+                    if row['prev_hash'] != prev and not unchained(row['hash']):
+                        raise AuditChainError(row['id'], BROKEN_LINK)
+                    if row['hash_ts'] and entry_hash(prev, key, row['actor'], row['action'], row['resource'], row['hash_ts']) != row['hash']:
+                        raise AuditChainError(row['id'], BAD_HASH)
+                    prev = row['hash']
+                if len(rows) != archive.row_count or prev != archive.last_hash:
+                    raise AuditChainError(archive.last_id, 'archive rows do not match its summary')
+            tails[key] = archive.last_hash
+        return tails
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from datetime import datetime, timezone as dt_timezone
+from django.utils import timezone
+from .models import AuditArchive, AuditLog, Tenant
+
+logger = logging.getLogger(__name__)
+
+BROKEN_LINK = 'prev_hash does not match the previous entry of the tenant'
+BAD_HASH = 'hash does not match the entry contents'
+
+
+def _hash_audit(prev_hash, tenant_id, actor_id, action, resource_json, ts):
+    s = (prev_hash or '') + '|' + str(tenant_id) + '|' + str(actor_id or '') + '|' + action + '|' + resource_json + '|' + ts
+    return hashlib.sha256(s.encode()).hexdigest()
+
+
+def entry_hash(prev_hash, tenant_id, actor_id, action, resource, ts):
+    """Hash of one chain entry; `ts` is the string stored in AuditLog.hash_ts."""
+    return _hash_audit(prev_hash, tenant_id, actor_id, action, json.dumps(resource, sort_keys=True), ts)
+
+
+def _lock_tail(tenant_id):
+    """Lock the tenant's chain (call inside a transaction); returns (tenant_exists, tail_hash)."""
+    if not list(Tenant.objects.select_for_update().filter(pk=tenant_id).values_list('pk', flat=True)):
+        return False, None
+    tail = AuditLog.objects.filter(tenant_id=tenant_id).order_by('-id').values_list('hash', flat=True).first()
+    if tail is None:
+        # Everything live was archived: continue from the newest archive
+        tail = AuditArchive.objects.filter(tenant_id=tenant_id).order_by('-last_id').values_list('last_hash', flat=True).first()
+    return True, tail
+
+
+def chain_entry(log):
+    """Link an unsaved AuditLog (or subclass) to its tenant's tail; call inside the transaction that saves it."""
+    _, log.prev_hash = _lock_tail(log.tenant_id)
+    log.hash_ts = str(time.time())
+    log.hash = entry_hash(log.prev_hash, log.tenant_id, log.actor_id, log.action, log.resource, log.hash_ts)
+
+
+class AuditWriter:
+    """Batched writer for the hash-chained AuditLog.
+
+    Entries are chained per tenant: under a row lock on the tenant the writer
+    re-reads the chain tail once, hashes the batch sequentially and inserts it
+    with one bulk_create, so concurrent writers (threads or processes) can never
+    fork a chain and the tail is read once per batch instead of once per entry.
+
+    With IAM_AUDIT_ASYNC (the default outside test runs), `submit` only enqueues and
+    a background thread drains the queue in batches of up to IAM_AUDIT_BATCH_SIZE
+    entries, waiting at most IAM_AUDIT_FLUSH_INTERVAL seconds to fill one; callers
+    never wait on the audit tail. With it disabled (tests) `submit` writes
+    synchronously through the same code path, taking the tenant lock itself.
+    """
+
+    _queue = None
+    _thread = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def submit(cls, tenant_id, actor_id, action, resource):
+        entry = (tenant_id, actor_id, action, resource, timezone.now())
+        if not getattr(settings, 'IAM_AUDIT_ASYNC', True):
+            cls.write_batch([entry])
+            return
+        cls._ensure_thread()
+        # Bounded queue: when the writer falls this far behind, callers block here rather than dropping audit entries
+        cls._queue.put(entry)
+
+    @classmethod
+    def write_batch(cls, entries):
+        """Chain and insert entries (tenant_id, actor_id, action, resource, created_at), grouped per tenant in order."""
+        by_tenant = {}
+        for entry in entries:
+            by_tenant.setdefault(entry[0], []).append(entry)
+        for tenant_id, tenant_entries in by_tenant.items():
+            with transaction.atomic():
+                # One writer per tenant chain at a time, across processes
+                exists, prev_hash = _lock_tail(tenant_id)
+                if not exists:
+                    logger.warning('Dropping %d audit entries for deleted tenant %s', len(tenant_entries), tenant_id)
+                    continue
+                rows = []
+                for _, actor_id, action, resource, created_at in tenant_entries:
+                    ts = str(time.time())
+                    h = entry_hash(prev_hash, tenant_id, actor_id, action, resource, ts)
+                    rows.append(AuditLog(tenant_id=tenant_id, actor_id=actor_id, action=action, resource=resource, prev_hash=prev_hash, hash=h, hash_ts=ts, created_at=created_at))
+                    prev_hash = h
+                AuditLog.objects.bulk_create(rows)
+
+    @classmethod
+    def flush(cls, timeout=None):
+        """Block until every submitted entry has been written (shutdown, tests)."""
+        if cls._queue is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while cls._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    @classmethod
+    def _ensure_thread(cls):
+        if cls._thread is not None and cls._thread.is_alive():
+            return
+        with cls._lock:
+            if cls._thread is None or not cls._thread.is_alive():
+                if cls._queue is None:
+                    cls._queue = queue.Queue(maxsize=getattr(settings, 'IAM_AUDIT_QUEUE_SIZE', 100000))
+                cls._thread = threading.Thread(target=cls._run, name='iam-audit-writer', daemon=True)
+                cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        while True:
+            batch = [cls._queue.get()]
+            batch_size = getattr(settings, 'IAM_AUDIT_BATCH_SIZE', 500)
+            interval = getattr(settings, 'IAM_AUDIT_FLUSH_INTERVAL', 0.2)
+            deadline = time.monotonic() + interval
+            while len(batch) < batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(cls._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            cls._write_with_retry(batch)
+            for _ in batch:
+                cls._queue.task_done()
+
+    @classmethod
+    def _write_with_retry(cls, batch):
+        delay = 0.1
+        while True:
+            close_old_connections()
+            try:
+                cls.write_batch(batch)
+                return
+            except Exception:
+                # Keep the batch (and backpressure) rather than lose audit entries
+                logger.exception('Audit batch of %d entries failed; retrying in %.1fs', len(batch), delay)
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+
+class AuditPolicy:
+    """Per-action audit policies for permission checks (settings.IAM_AUDIT_POLICIES).
+
+    Each action maps to {'mode': 'full'} (the default for unlisted actions),
+    {'mode': 'sample', 'rate': 0.01} or {'mode': 'aggregate', 'window': 60}. Policies
+    only apply to routine decisions (plain allows); denies, emergency access and
+    batches with exceptions are always written in full. Aggregated checks become one
+    '<action>.summary' entry per (user, permission, window) holding the count, and
+    every entry, sampled or summary, goes through AuditWriter so the chain stays intact.
+    """
+
+    _counts = {}  # (tenant_id, actor_id, action, permission, window_start, window) -> count
+    _lock = threading.Lock()
+
+    @classmethod
+    def record(cls, tenant_id, actor_id, action, detail, routine=False):
+        policy = getattr(settings, 'IAM_AUDIT_POLICIES', {}).get(action, {}) if routine else {}
+        mode = policy.get('mode', 'full')
+        if mode == 'sample':
+            rate = policy.get('rate', 0.01)
+            if random.random() < rate:
+                AuditWriter.submit(tenant_id, actor_id, action, dict(detail, sample_rate=rate))
+        elif mode == 'aggregate':
+            cls._count(tenant_id, actor_id, action, detail, policy.get('window', 60))
+        else:
+            AuditWriter.submit(tenant_id, actor_id, action, detail)
+
+    @classmethod
+    def _count(cls, tenant_id, actor_id, action, detail, window):
+        now = time.time()
+        window_start = int(now // window) * window
+        if 'permissions' in detail:
+            permission, n = ','.join(detail['permissions']), detail.get('evaluated', 1)
+        else:
+            permission, n = detail.get('permission'), 1
+        key = (tenant_id, actor_id, action, permission, window_start, window)
+        with cls._lock:
+            cls._counts[key] = cls._counts.get(key, 0) + n
+            overflow = len(cls._counts) > getattr(settings, 'IAM_AUDIT_AGGREGATE_MAX_KEYS', 10000)
+        cls.flush(force=overflow, now=now)
+
+    @classmethod
+    def flush(cls, force=False, now=None):
+        """Write summaries for closed windows (every open window too with force); returns how many were written."""
+        now = time.time() if now is None else now
+        with cls._lock:
+            closed = [k for k in cls._counts if force or k[4] + k[5] <= now]
+            due = [(k, cls._counts.pop(k)) for k in closed]
+        for (tenant_id, actor_id, action, permission, window_start, window), count in due:
+            start = datetime.fromtimestamp(window_start, dt_timezone.utc)
+            end = datetime.fromtimestamp(window_start + window, dt_timezone.utc)
+            AuditWriter.submit(tenant_id, actor_id, f'{action}.summary', {
+                'permission': permission,
+                'count': count,
+                'window_start': start.isoformat(),
+                'window_end': end.isoformat(),
+            })
+        return len(due)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._counts.clear()
+
+
+def shutdown(timeout=5):
+    """Write open aggregate windows and drain the writer queue; returns whether everything was written.
+
+    Registered as the process shutdown hook by IAMConfig.ready() unless IAM_AUDIT_FLUSH_ON_EXIT
+    is off (test runs, whose database is gone by the time the interpreter exits).
+    """
+    try:
+        AuditPolicy.flush(force=True)
+        return AuditWriter.flush(timeout)
+    except Exception:
+        logger.exception('Could not write pending audit entries at shutdown')
+        return False
+
+
+def unchained(h):
+    """Whether a row was stored without a hash, as GradeAuditLog rows were before every AuditLog row was chained.
+
+    Such rows cannot be linked; the chain re-anchors on them (the writer of the time
+    linked the next row to their empty hash), so verification resumes after them.
+    """
+    return not h
+
+
+def verify_segment(lo, hi, chunk_size=5000):
+    """Verify AuditLog rows with lo < id <= hi, streamed in id order with keyset pagination.
+
+    Rows carrying hash_ts are recomputed; legacy rows without it (hashed before the
+    timestamp was stored) only have their link checked, and legacy rows stored without
+    any hash (see `unchained`) re-anchor the chain. Each tenant's first row in the
+    segment cannot be linked here and is returned for `stitch_segments`. Returns
+    {'rows', 'recomputed', 'unchained', 'heads': {tenant: (id, prev_hash)}, 'tails': {tenant: hash}, 'error'}
+    where error is the first (id, reason) found inside the segment, or None.
+    """
+    heads, tails = {}, {}
+    rows = recomputed = unchained_rows = 0
+    error = None
+    cursor = lo
+    fields = ('id', 'tenant_id', 'actor_id', 'action', 'resource', 'prev_hash', 'hash', 'hash_ts')
+    while error is None:
+        chunk = list(AuditLog.objects.filter(id__gt=cursor, id__lte=hi).order_by('id').values_list(*fields)[:chunk_size])
+        if not chunk:
+            break
+        for pk, tenant_id, actor_id, action, resource, prev_hash, h, ts in chunk:
+            tenant_id = str(tenant_id)
+            rows += 1
+            if unchained(h):
+                unchained_rows += 1
+            elif tenant_id not in tails:
+                heads[tenant_id] = (pk, prev_hash)
+            elif prev_hash != tails[tenant_id]:
+                error = (pk, BROKEN_LINK)
+                break
+            if ts:
+                recomputed += 1
+                if entry_hash(prev_hash, tenant_id, actor_id, action, resource, ts) != h:
+                    error = (pk, BAD_HASH)
+                    break
+            tails[tenant_id] = h
+        cursor = chunk[-1][0]
+    return {'rows': rows, 'recomputed': recomputed, 'unchained': unchained_rows, 'heads': heads, 'tails': tails, 'error': error}
+
+
+def stitch_segments(results, seed=None):
+    """Link consecutive segment results (in id order) and return the first broken link as (id, reason), or None.
+
+    `seed` maps tenant ids to the tail hash before the first segment (absent tenants start a new chain).
+    """
+    tails = dict(seed or {})
+    for result in results:
+        for tenant_id, (pk, prev_hash) in result['heads'].items():
+            if prev_hash != tails.get(tenant_id):
+                if result['error'] is None or pk <= result['error'][0]:
+                    return pk, BROKEN_LINK
+        if result['error'] is not None:
+            return result['error']
+        tails.update(result['tails'])
+    return None
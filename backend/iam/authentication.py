@@ -0,0 +1,87 @@
+import uuid
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from .services import JWTHelper
+
+
+class TokenUser:
+    """Request principal built from validated JWT claims, without a database lookup.
+
+    Carries what permission checks need (`id`, `tenant_id`, `attrs`) plus the token's
+    `roles` and `scope`, so PermissionResolver.has_permission(request.user, ...) works
+    on it directly. Code that needs the iam.User row can use `db_user` (one query).
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+    is_staff = False
+    is_superuser = False
+
+    def __init__(self, claims):
+        self.claims = claims
+        self.id = self.pk = uuid.UUID(claims['uid'])
+        self.tenant_id = uuid.UUID(claims['tid'])
+        self.username = claims.get('sub', '')
+        self.roles = list(claims.get('roles') or [])
+        self.scope = list(claims.get('scope') or [])
+        self.attrs = claims.get('attrs') or {}
+
+    def __str__(self):
+        return self.username
+
+    def __eq__(self, other):
+        return isinstance(other, TokenUser) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def get_username(self):
+        return self.username
+
+    def has_perm(self, perm, obj=None):
+        return False
+
+    def has_perms(self, perm_list, obj=None):
+        return False
+
+    def has_module_perms(self, app_label):
+        return False
+
+    @cached_property
+    def db_user(self):
+        from .models import User
+        return User.objects.get(id=self.id)
+
+
+class JWTAuthentication(BaseAuthentication):
+    """`Authorization: Bearer <jwt>` authentication against settings.IAM_PUBLIC_KEY_PEM.
+
+    Requests without a bearer token fall through to the next authentication class.
+    Validation goes through JWTHelper.validate_token, whose verified-token cache and
+    revocation filter keep repeat requests free of SQL.
+    """
+
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid bearer header.')
+        public_key = getattr(settings, 'IAM_PUBLIC_KEY_PEM', None)
+        if not public_key:
+            raise exceptions.AuthenticationFailed('Token authentication is not configured.')
+        try:
+            claims = JWTHelper.validate_token(auth[1].decode(), public_key)
+            return TokenUser(claims), claims
+        except (KeyError, ValueError, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed('Token is missing required claims.')
+        except Exception:
+            raise exceptions.AuthenticationFailed('Invalid or revoked token.')
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends whose entries are private to one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+MAX_LOCAL_TTL = 60
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Long IAM cache TTLs are only safe when generation bumps reach every worker."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    ttl = max(getattr(settings, 'IAM_CACHE_TTL', 60), getattr(settings, 'IAM_SNAPSHOT_TTL', 60))
+    if backend in PROCESS_LOCAL_CACHES and ttl > MAX_LOCAL_TTL:
+        return [Warning(
+            f'IAM_CACHE_TTL/IAM_SNAPSHOT_TTL is {ttl}s but the default cache ({backend}) is not shared between '
+            'processes; permission changes made in one worker stay invisible to the others until the TTL expires.',
+            hint=f'Set REDIS_URL (or configure a shared CACHES backend), or keep the TTLs at {MAX_LOCAL_TTL}s or less.',
+            id='iam.W001',
+        )]
+    return []
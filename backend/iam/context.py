@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import models
+
+_UNRESOLVED = object()
+_current = ContextVar('iam_tenant_context', default=None)
+
+
+class TenantContext:
+    """The tenant a unit of work (request, job) runs for, resolved on first use.
+
+    `resolver` returns (tenant_id, unrestricted): a tenant id scopes tenant-aware
+    managers to it; without one, `unrestricted` (platform staff) leaves them unscoped
+    and anything else sees no rows.
+    """
+
+    def __init__(self, resolver):
+        self._resolver = resolver
+        self._resolved = _UNRESOLVED
+
+    def _resolve(self):
+        if self._resolved is _UNRESOLVED:
+            self._resolved = self._resolver()
+        return self._resolved
+
+    @property
+    def tenant_id(self):
+        return self._resolve()[0]
+
+    @property
+    def unrestricted(self):
+        return self._resolve()[1]
+
+
+def current_tenant_context():
+    return _current.get()
+
+
+def get_current_tenant_id():
+    context = _current.get()
+    return None if context is None else context.tenant_id
+
+
+def activate(context):
+    return _current.set(context)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def tenant_context(tenant_id=None, unrestricted=False):
+    """Run a block (management command, background job, test) as `tenant_id`."""
+    token = activate(TenantContext(lambda: (tenant_id, unrestricted)))
+    try:
+        yield
+    finally:
+        deactivate(token)
+
+
+def scope_to_current_tenant(queryset):
+    """Restrict a queryset of a tenant-owned model to the current tenant context (see TenantScopedManager)."""
+    context = _current.get()
+    if context is None:
+        return queryset
+    if context.tenant_id is not None:
+        return queryset.filter(tenant_id=context.tenant_id)
+    return queryset if context.unrestricted else queryset.none()
+
+
+class TenantScopedManager(models.Manager):
+    """Manager that filters on the current tenant context (see TenantContextMiddleware).
+
+    Outside any context (migrations, shell, management commands) it is a plain manager.
+    Models keep an unscoped `all_tenants` manager for deliberate cross-tenant reads;
+    service and signal code, which may run without a tenant context, uses it with an
+    explicit tenant filter.
+    """
+
+    def get_queryset(self):
+        return scope_to_current_tenant(super().get_queryset())
+
+
+class TenantScopedViewMixin:
+    """For DRF views over tenant-owned models: scopes `queryset` to the request's tenant.
+
+    A class-level `queryset` is built at import time, outside any tenant context, so the
+    scope is applied again on every request.
+    """
+
+    def get_queryset(self):
+        return scope_to_current_tenant(super().get_queryset())
@@ -0,0 +1,69 @@
+import time
+from django.core.cache import cache
+from .local_cache import iam_cache
+
+TENANT_KEY = 'iam:gen:t:{tenant}'
+USER_KEY = 'iam:gen:u:{tenant}:{user}'
+
+
+def _seed():
+    # Counters start from the current time in microseconds, so a counter lost to eviction or a
+    # cache restart comes back larger than any value it held before and never revives old entries.
+    return time.time_ns() // 1000
+
+
+class CacheGenerations:
+    """Per-tenant and per-user generation counters for IAM cache keys.
+
+    Snapshot and decision keys embed the tenant and user generations; invalidating
+    a tenant or a user is a single atomic `incr`, after which lookups compute new
+    keys and the old entries simply age out. No keyspace scan is needed. Counters are
+    read through the process-local tier, which other workers refresh when the
+    invalidation message arrives (or after IAM_LOCAL_CACHE_TTL).
+    """
+
+    @staticmethod
+    def get(tenant_id, user_id):
+        """Return (tenant_generation, user_generation) with at most one shared cache round trip."""
+        t_key = TENANT_KEY.format(tenant=tenant_id)
+        u_key = USER_KEY.format(tenant=tenant_id, user=user_id)
+        values = iam_cache.get_many([t_key, u_key], scope=(tenant_id, user_id))
+        return (
+            values[t_key] if t_key in values else CacheGenerations._init(t_key, (tenant_id, None)),
+            values[u_key] if u_key in values else CacheGenerations._init(u_key, (tenant_id, user_id)),
+        )
+
+    @staticmethod
+    def tenant(tenant_id):
+        """The tenant generation alone, for process-local caches that are per tenant rather than per user."""
+        key = TENANT_KEY.format(tenant=tenant_id)
+        value = iam_cache.get(key, scope=(tenant_id, None))
+        return value if value is not None else CacheGenerations._init(key, (tenant_id, None))
+
+    @staticmethod
+    def _init(key, scope):
+        seed = _seed()
+        if not cache.add(key, seed, None):
+            seed = cache.get(key, seed)
+        iam_cache.local.set(key, seed, scope=scope)
+        return seed
+
+    @staticmethod
+    def _bump(key):
+        iam_cache.local.delete(key)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Counter missing (never read or evicted): a fresh time seed is newer than any old value
+            seed = _seed()
+            if cache.add(key, seed, None):
+                return seed
+            return cache.incr(key)
+
+    @staticmethod
+    def bump_tenant(tenant_id):
+        return CacheGenerations._bump(TENANT_KEY.format(tenant=tenant_id))
+
+    @staticmethod
+    def bump_user(tenant_id, user_id):
+        return CacheGenerations._bump(USER_KEY.format(tenant=tenant_id, user=user_id))
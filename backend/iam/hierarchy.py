@@ -0,0 +1,97 @@
+from collections import defaultdict, deque
+from django.db import transaction
+from .models import Role, RoleClosure, RoleInheritance, Tenant
+
+
+class RoleHierarchy:
+    """Keeps RoleClosure in step with RoleInheritance (called from the iam.signals receivers).
+
+    Adding an edge role -> includes only adds pairs (ancestor of role, descendant of
+    includes); removing one only affects the closure rows of role's ancestors, which are
+    recomputed from the tenant's remaining edges. Changes for a tenant are serialized on
+    its Tenant row, so concurrent edits cannot interleave their closure updates.
+    """
+
+    @staticmethod
+    def add_role(role_id):
+        RoleClosure.objects.get_or_create(ancestor_id=role_id, descendant_id=role_id, defaults={'depth': 0})
+
+    @staticmethod
+    def link(role_id, includes_id):
+        with transaction.atomic():
+            RoleHierarchy._lock_tenant(role_id)
+            ups = dict(RoleClosure.objects.filter(descendant_id=role_id).values_list('ancestor_id', 'depth'))
+            downs = dict(RoleClosure.objects.filter(ancestor_id=includes_id).values_list('descendant_id', 'depth'))
+            ups.setdefault(role_id, 0)
+            downs.setdefault(includes_id, 0)
+            existing = {
+                (a, d): row for a, d, *row in RoleClosure.objects.filter(ancestor_id__in=ups, descendant_id__in=downs)
+                .values_list('ancestor_id', 'descendant_id', 'id', 'depth')
+            }
+            create, update = [], []
+            for ancestor_id, up in ups.items():
+                for descendant_id, down in downs.items():
+                    depth = up + down + 1
+                    found = existing.get((ancestor_id, descendant_id))
+                    if found is None:
+                        create.append(RoleClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth))
+                    elif depth < found[1]:
+                        update.append(RoleClosure(id=found[0], depth=depth))
+            RoleClosure.objects.bulk_create(create)
+            RoleClosure.objects.bulk_update(update, ['depth'])
+
+    @staticmethod
+    def unlink(role_id):
+        """Recompute the closure rows of `role_id` and its ancestors after an edge below it went away."""
+        tenant_id = Role.objects.filter(pk=role_id).values_list('tenant_id', flat=True).first()
+        if tenant_id is not None:
+            RoleHierarchy.rebuild(tenant_id, RoleClosure.objects.filter(descendant_id=role_id).values_list('ancestor_id', flat=True))
+
+    @staticmethod
+    def rebuild(tenant_id, role_ids=None):
+        """Recompute the closure rows of `role_ids` (default: every role of the tenant) from RoleInheritance."""
+        with transaction.atomic():
+            list(Tenant.objects.select_for_update().filter(pk=tenant_id).values_list('pk', flat=True))
+            if role_ids is None:
+                role_ids = Role.objects.filter(tenant_id=tenant_id).values_list('id', flat=True)
+            RoleHierarchy._recompute(tenant_id, set(role_ids))
+
+    @staticmethod
+    def _lock_tenant(role_id):
+        tenant_id = Role.objects.filter(pk=role_id).values_list('tenant_id', flat=True).first()
+        if tenant_id is not None:
+            list(Tenant.objects.select_for_update().filter(pk=tenant_id).values_list('pk', flat=True))
+
+    @staticmethod
+    def _recompute(tenant_id, role_ids):
+        role_ids &= set(Role.objects.filter(id__in=role_ids).values_list('id', flat=True))  # skip roles being deleted
+        if not role_ids:
+            return
+        edges = defaultdict(list)
+        for parent_id, child_id in RoleInheritance.objects.filter(role__tenant_id=tenant_id).values_list('role_id', 'includes_id'):
+            edges[parent_id].append(child_id)
+        wanted = {}
+        for root in role_ids:
+            depths, queue = {root: 0}, deque([root])
+            while queue:
+                node = queue.popleft()
+                for child in edges[node]:
+                    if child not in depths:
+                        depths[child] = depths[node] + 1
+                        queue.append(child)
+            wanted.update(((root, d), depth) for d, depth in depths.items())
+
+        stale, update = [], []
+        for pk, ancestor_id, descendant_id, depth in RoleClosure.objects.filter(ancestor_id__in=role_ids).values_list(
+            'id', 'ancestor_id', 'descendant_id', 'depth'
+        ):
+            target = wanted.pop((ancestor_id, descendant_id), None)
+            if target is None:
+                stale.append(pk)
+            elif target != depth:
+                update.append(RoleClosure(id=pk, depth=target))
+        RoleClosure.objects.filter(id__in=stale).delete()
+        RoleClosure.objects.bulk_update(update, ['depth'])
+        RoleClosure.objects.bulk_create(
+            RoleClosure(ancestor_id=a, descendant_id=d, depth=depth) for (a, d), depth in wanted.items()
+        )
@@ -0,0 +1,243 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+
+_MISSING = object()
+
+
+class LocalCache:
+    """Size-bounded in-process LRU with a per-entry TTL.
+
+    Entries may carry a (tenant_id, user_id) scope; they are indexed by it so that
+    `evict` drops a tenant's or a user's entries without scanning the whole cache.
+    Keeps hit/miss/eviction counters so the tier can be sized from production
+    numbers (see `stats()`); `evictions` counts entries pushed out by the size
+    bound, `expirations` entries dropped because their TTL ran out and
+    `invalidations` entries removed by invalidation messages.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value, scope)
+        self._scopes = {}  # tenant_id -> {user_id or None: {key}}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, timeout=None, scope=None):
+        """Store `value`; `scope` is the (tenant_id, user_id) it belongs to (user_id None for the whole tenant)."""
+        ttl = self.ttl if timeout is None else min(timeout, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        if scope is not None:
+            scope = (str(scope[0]), None if scope[1] is None else str(scope[1]))
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value, scope)
+            if scope is not None:
+                self._scopes.setdefault(scope[0], {}).setdefault(scope[1], set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def evict(self, tenant_id, user_id=None):
+        """Drop every entry scoped to a tenant, or to one user in it."""
+        tenant_id = str(tenant_id)
+        with self._lock:
+            users = self._scopes.get(tenant_id)
+            if not users:
+                return 0
+            if user_id is None:
+                stale = set().union(*users.values())
+            else:
+                stale = set(users.get(str(user_id), ()))
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._scopes.clear()
+
+    def _remove(self, key):
+        # Caller holds the lock
+        entry = self._data.pop(key, None)
+        if entry is None or entry[2] is None:
+            return
+        tenant_id, user_id = entry[2]
+        users = self._scopes[tenant_id]
+        keys = users[user_id]
+        keys.discard(key)
+        if not keys:
+            del users[user_id]
+            if not users:
+                del self._scopes[tenant_id]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+class TieredCache:
+    """IAM cache: the process-local LRU first, the shared Django cache (Redis) second.
+
+    Values read from the shared tier are copied into the local tier under the
+    caller's (tenant_id, user_id) scope. Local entries live at most
+    IAM_LOCAL_CACHE_TTL seconds; invalidation messages on the IAM Redis channel
+    evict them earlier (see `handle_invalidation_message`), so without Redis
+    pub/sub other workers see changes within that TTL.
+    """
+
+    def __init__(self, local):
+        self.local = local
+        self.shared_hits = self.shared_misses = 0
+
+    def get(self, key, scope=None):
+        ensure_invalidation_listener()
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = cache.get(key)
+        if value is None:
+            self.shared_misses += 1
+        else:
+            self.shared_hits += 1
+            self.local.set(key, value, scope=scope)
+        return value
+
+    def get_many(self, keys, scope=None):
+        ensure_invalidation_listener()
+        found = {}
+        remote = []
+        for key in keys:
+            value = self.local.get(key, _MISSING)
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if remote:
+            fetched = cache.get_many(remote)
+            self.shared_hits += len(fetched)
+            self.shared_misses += len(remote) - len(fetched)
+            for key, value in fetched.items():
+                self.local.set(key, value, scope=scope)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout, scope=None):
+        cache.set(key, value, timeout)
+        self.local.set(key, value, timeout, scope)
+
+    def set_many(self, mapping, timeout, scope=None):
+        cache.set_many(mapping, timeout)
+        for key, value in mapping.items():
+            self.local.set(key, value, timeout, scope)
+
+    def stats(self):
+        shared_lookups = self.shared_hits + self.shared_misses
+        return {
+            'local': self.local.stats(),
+            'shared': {
+                'hits': self.shared_hits,
+                'misses': self.shared_misses,
+                'hit_rate': round(self.shared_hits / shared_lookups, 4) if shared_lookups else None,
+            },
+        }
+
+
+def handle_invalidation_message(scope):
+    """Apply an invalidation message ('<tenant_id>' or '<tenant_id>:<user_id>') to the local tier
+    (and, for a tenant, to its compiled local policies).
+    'revoked:<jti>' messages add a revoked token to this process's revocation filter instead.
+    """
+    from .tokens import REVOKED_PREFIX, RevocationFilter
+    if scope.startswith(REVOKED_PREFIX):
+        RevocationFilter.add(scope[len(REVOKED_PREFIX):])
+        return 0
+    tenant_id, _, user_id = scope.partition(':')
+    if not user_id:
+        from .local_policies import LocalPolicyRegistry
+        LocalPolicyRegistry.invalidate(tenant_id)
+    return iam_cache.local.evict(tenant_id, user_id or None)
+
+
+_listener = None  # this process's subscriber thread, False when none is configured
+_listener_lock = threading.Lock()
+
+
+def ensure_invalidation_listener():
+    """Start this process's subscriber on first use. Every worker process runs its own: a thread
+    inherited across a fork is not alive in the child, so the child starts a new one."""
+    global _listener
+    if _listener is False or (_listener is not None and _listener.is_alive()):
+        return
+    with _listener_lock:
+        if _listener is None or (_listener is not False and not _listener.is_alive()):
+            _listener = start_invalidation_listener() or False
+
+
+def start_invalidation_listener():
+    """Subscribe to the IAM invalidation channel in a daemon thread (when REDIS_URL is configured)."""
+    redis_url = getattr(settings, 'REDIS_URL', None)
+    if not redis_url or not getattr(settings, 'IAM_LOCAL_CACHE_LISTENER', True):
+        return None
+
+    def listen():
+        import redis
+        channel = getattr(settings, 'IAM_INVALIDATION_CHANNEL', 'iam_invalidation')
+        while True:
+            try:
+                pubsub = redis.from_url(redis_url).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(channel)
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        handle_invalidation_message(message['data'].decode())
+            except Exception:
+                # Connection lost: drop everything (messages may have been missed) and resubscribe
+                iam_cache.local.clear()
+                time.sleep(1)
+
+    thread = threading.Thread(target=listen, name='iam-cache-invalidation', daemon=True)
+    thread.start()
+    return thread
+
+
+iam_cache = TieredCache(LocalCache(
+    maxsize=getattr(settings, 'IAM_LOCAL_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'IAM_LOCAL_CACHE_TTL', 5),
+))
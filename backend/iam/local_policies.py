@@ -0,0 +1,132 @@
+import threading
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .generations import CacheGenerations
+from .models import TenantPolicy
+from .rego import CompiledPackage, RegoTranslationError, UNDEFINED, translate
+
+
+class LocalPolicyRegistry:
+    """In-process evaluation of TenantPolicy rows deployed in 'local' mode.
+
+    `deploy_opa_policies` translates local policies into IR (TenantPolicy.compiled_ir);
+    the registry compiles a tenant's IR into decision functions on first use and
+    answers AttributePolicy 'opa' paths (e.g. 'tenant/policies/allow') that fall
+    under one of those packages without a network call. Paths no local package
+    covers return None and are left to the remote OPA client.
+
+    Entries are keyed on the tenant generation (iam.generations): saving or deleting a
+    TenantPolicy anywhere, including in the deploy_opa_policies process, bumps it, so
+    every worker recompiles on its next lookup; invalidation messages drop them early.
+    """
+
+    _packages = {}  # tenant_id -> (tenant generation, {package tuple: CompiledPackage})
+    _lock = threading.Lock()
+
+    @classmethod
+    def packages_for(cls, tenant_id):
+        generation = CacheGenerations.tenant(tenant_id)
+        cached = cls._packages.get(str(tenant_id))
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        packages = {}
+        rows = TenantPolicy.objects.filter(tenant_id=tenant_id, mode='local', compiled_ir__isnull=False).values_list('compiled_ir', flat=True)
+        for ir in rows:
+            package = CompiledPackage(ir)
+            packages[tuple(package.package)] = package
+        with cls._lock:
+            cls._packages[str(tenant_id)] = (generation, packages)
+        return packages
+
+    @classmethod
+    def evaluate(cls, tenant_id, policy_path, input_obj):
+        """Decide `policy_path` locally; returns True/False, or None when no local policy covers the path."""
+        packages = cls.packages_for(tenant_id)
+        if not packages:
+            return None
+        segments = [s for s in policy_path.strip('/').split('/') if s]
+        for size in range(len(segments), 0, -1):
+            package = packages.get(tuple(segments[:size]))
+            if package is not None:
+                value = package.decide(segments[size:], input_obj)
+                if value is UNDEFINED:
+                    return False
+                from .opa_client import OPAClient
+                return OPAClient._interpret(value)
+        return None
+
+    @classmethod
+    def invalidate(cls, tenant_id=None):
+        with cls._lock:
+            if tenant_id is None:
+                cls._packages.clear()
+            else:
+                cls._packages.pop(str(tenant_id), None)
+
+
+def deploy_local_policy(policy):
+    """Translate a 'local' mode TenantPolicy into IR and record the deploy outcome.
+    Raises RegoTranslationError when the policy is outside the supported subset.
+    """
+    try:
+        policy.compiled_ir = translate(policy.rego)
+    except RegoTranslationError as e:
+        policy.compiled_ir = None
+        policy.last_deploy_status = f"error: {str(e)[:200]}"
+        policy.save()
+        raise
+    policy.last_deployed_at = timezone.now()
+    policy.last_deploy_status = 'ok'
+    policy.save()
+
+
+def deploy_policy(policy):
+    """Deploy one TenantPolicy and record the outcome on it; returns 'local' or the OPA path.
+
+    Local mode policies are translated in-process. Remote ones, and local ones outside
+    the supported subset, are pushed to OPA; the latter are recorded as 'remote:
+    untranslatable' so their decisions keep coming from OPA. Raises when neither worked.
+    """
+    untranslatable = None
+    if policy.mode == 'local':
+        try:
+            deploy_local_policy(policy)
+            return 'local'
+        except RegoTranslationError as e:
+            untranslatable = e
+    from .opa_client import OPAClient
+    path = f"tenant_{policy.tenant_id}_{policy.name}"
+    try:
+        OPAClient.push_policy(path, policy.rego)
+    except Exception as e:
+        # An untranslatable policy keeps its translation error when it cannot be pushed either
+        policy.last_deploy_status = f"error: {str(untranslatable or e)[:200]}"
+        policy.save()
+        raise
+    policy.last_deployed_at = timezone.now()
+    policy.last_deploy_status = 'ok' if untranslatable is None else 'remote: untranslatable'
+    policy.save()
+    return path
+
+
+def check_parity(tenant_id, policy_paths, inputs):
+    """Compare local decisions with the remote OPA for every (path, input) pair.
+    Returns a list of (policy_path, input, local, remote) for each disagreement.
+    """
+    from .opa_client import OPAClient
+    mismatches = []
+    for input_obj in inputs:
+        remote = OPAClient.evaluate_many(policy_paths, input_obj)
+        for path in policy_paths:
+            local = LocalPolicyRegistry.evaluate(tenant_id, path, input_obj)
+            if local != remote[path]:
+                mismatches.append((path, input_obj, local, remote[path]))
+    return mismatches
+
+
+@receiver(post_save, sender=TenantPolicy)
+@receiver(post_delete, sender=TenantPolicy)
+def _invalidate_local_policies(sender, instance, **kwargs):
+    LocalPolicyRegistry.invalidate(instance.tenant_id)
+
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from iam.archive import AuditArchiver, AuditChainError, month_start
+from iam.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Move closed months of the audit log into compressed per-tenant archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=str, help='tenant id (default: all tenants)')
+        parser.add_argument('--before', type=str, help='archive months before this date, YYYY-MM (default: the current month)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='rows fetched per keyset page')
+        parser.add_argument('--dry-run', action='store_true', help='verify and report without moving rows')
+
+    def handle(self, *args, **options):
+        cutoff = month_start(timezone.now())
+        if options.get('before'):
+            try:
+                before = datetime.strptime(options['before'], '%Y-%m').replace(tzinfo=dt_timezone.utc)
+            except ValueError:
+                raise CommandError('--before must be YYYY-MM')
+            # Only closed months are archived
+            cutoff = min(cutoff, before)
+
+        tenants = Tenant.objects.all()
+        if options.get('tenant'):
+            tenants = tenants.filter(id=options['tenant'])
+
+        total = 0
+        failed = []
+        for tenant_id in tenants.values_list('id', flat=True).iterator():
+            try:
+                archived = AuditArchiver.archive_tenant(tenant_id, cutoff, options['chunk_size'], options['dry_run'])
+            except AuditChainError as e:
+                # Earlier months of this tenant stay archived; the other tenants still run
+                failed.append(f'Tenant {tenant_id}: {e}; nothing archived from this month on')
+                self.stderr.write(failed[-1])
+                archived = e.archived
+            for period, rows in archived:
+                total += rows
+                self.stdout.write(f'{tenant_id} {period:%Y-%m}: {rows} rows')
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} audit rows created before {cutoff:%Y-%m}'))
+        if failed:
+            raise CommandError(f'{len(failed)} tenant(s) not fully archived: ' + '; '.join(failed))
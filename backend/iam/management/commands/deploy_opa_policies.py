@@ -1,31 +1,32 @@
 from django.core.management.base import BaseCommand
-from django.utils import timezone
 from iam.models import TenantPolicy
 from iam.opa_client import OPAClient
+from iam.local_policies import deploy_policy
 
 
 class Command(BaseCommand):
-    help = 'Deploy all TenantPolicy objects to configured OPA instance'
+    help = 'Deploy all TenantPolicy objects to configured OPA instance (local mode policies are compiled in-process)'
 
     def handle(self, *args, **options):
         base = OPAClient._base_url()
         if not base:
-            self.stderr.write('OPA_URL not configured; aborting')
-            return
+            self.stderr.write('OPA_URL not configured; deploying local mode policies only')
 
         policies = TenantPolicy.objects.select_related('tenant').all()
         count = 0
         for p in policies:
-            path = f"tenant_{p.tenant.id}_{p.name}"
+            if p.mode != 'local' and not base:
+                continue
             try:
-                OPAClient.push_policy(path, p.rego)
-                p.last_deployed_at = timezone.now()
-                p.last_deploy_status = 'ok'
-                p.save()
-                self.stdout.write(self.style.SUCCESS(f"Deployed {p.name} for tenant {p.tenant.name} -> {path}"))
-                count += 1
+                target = deploy_policy(p)
             except Exception as e:
-                p.last_deploy_status = f"error: {str(e)[:200]}"
-                p.save()
                 self.stderr.write(self.style.ERROR(f"Failed to deploy {p.name} for tenant {p.tenant.name}: {e}"))
+                continue
+            if target == 'local':
+                self.stdout.write(self.style.SUCCESS(f"Compiled {p.name} for tenant {p.tenant.name} -> local"))
+            elif p.mode == 'local':
+                self.stdout.write(self.style.WARNING(f"{p.name} for tenant {p.tenant.name} is not translatable; deployed to OPA -> {target}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Deployed {p.name} for tenant {p.tenant.name} -> {target}"))
+            count += 1
         self.stdout.write(f"Processed {count} policies")
@@ -1,29 +1,132 @@
-from django.core.management.base import BaseCommand
-from iam.models import AuditLog
+import gzip
 import json
+from django.core.management.base import BaseCommand, CommandError
+from iam.models import AuditLog
+
+FIELDS = ('id', 'tenant_id', 'actor_id', 'action', 'resource', 'prev_hash', 'hash', 'hash_ts', 'created_at')
+
 
 class Command(BaseCommand):
-    help = 'Export audit logs as JSON lines for a tenant or all'
+    help = 'Export audit logs as JSON lines (optionally gzip/zstd compressed) or Parquet, for a tenant or all'
 
     def add_arguments(self, parser):
         parser.add_argument('--tenant', type=str, help='tenant id')
         parser.add_argument('--outfile', type=str, help='file to write', default='audit_export.jsonl')
+        parser.add_argument('--since-id', type=int, default=0, help='only export entries with a larger id (resume from a previous export)')
+        parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+        parser.add_argument('--compress', choices=['none', 'gzip', 'zstd'], default=None,
+                            help='compression (default: from the outfile suffix, .gz or .zst)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='rows fetched per keyset page')
 
     def handle(self, *args, **options):
+        compress = options['compress'] or self._compression_for(options['outfile'], options['format'])
+        count, last_id = 0, options['since_id']
+        writer = self._parquet_writer if options['format'] == 'parquet' else self._jsonl_writer
+        with writer(options['outfile'], compress) as write:
+            for page in self._pages(options.get('tenant'), options['since_id'], options['chunk_size']):
+                write(page)
+                count += len(page)
+                last_id = page[-1][0]
+        # The last id is the checkpoint for the next incremental export (--since-id)
+        self.stdout.write(self.style.SUCCESS(f'Exported {count} audit logs; last id {last_id}'))
+
+    @staticmethod
+    def _compression_for(outfile, fmt):
+        if fmt == 'parquet':
+            return 'zstd'
+        if outfile.endswith('.gz'):
+            return 'gzip'
+        if outfile.endswith('.zst'):
+            return 'zstd'
+        return 'none'
+
+    @staticmethod
+    def _pages(tenant_id, since_id, chunk_size):
+        """Yield lists of rows in id order; each page is one bounded keyset query streamed with a server-side cursor."""
         qs = AuditLog.objects.all()
-        if options.get('tenant'):
-            qs = qs.filter(tenant__id=options['tenant'])
-        with open(options['outfile'], 'w') as fh:
-            for a in qs.order_by('id'):
-                obj = {
-                    'id': a.id,
-                    'tenant': str(a.tenant_id),
-                    'actor': str(a.actor_id) if a.actor_id else None,
-                    'action': a.action,
-                    'resource': a.resource,
-                    'prev_hash': a.prev_hash,
-                    'hash': a.hash,
-                    'created_at': a.created_at.isoformat()
-                }
-                fh.write(json.dumps(obj) + '\n')
-        self.stdout.write(self.style.SUCCESS('Exported audit logs'))
+        if tenant_id:
+            qs = qs.filter(tenant__id=tenant_id)
+        cursor = since_id
+        while True:
+            page = list(qs.filter(id__gt=cursor).order_by('id').values_list(*FIELDS)[:chunk_size].iterator(chunk_size=chunk_size))
+            if not page:
+                return
+            yield page
+            cursor = page[-1][0]
+
+    class _jsonl_writer:
+        def __init__(self, outfile, compress):
+            if compress == 'gzip':
+                self.fh = gzip.open(outfile, 'wt', encoding='utf-8')
+            elif compress == 'zstd':
+                try:
+                    import zstandard
+                except ImportError:
+                    raise CommandError('zstd compression requires the zstandard package')
+                self.fh = zstandard.open(outfile, 'wt', encoding='utf-8')
+            else:
+                self.fh = open(outfile, 'w', encoding='utf-8')
+            self.encode = json.JSONEncoder(separators=(',', ':')).encode
+
+        def __enter__(self):
+            return self.write
+
+        def __exit__(self, *exc):
+            self.fh.close()
+
+        def write(self, page):
+            self.fh.write(''.join(
+                self.encode({
+                    'id': pk,
+                    'tenant': str(tenant_id),
+                    'actor': str(actor_id) if actor_id else None,
+                    'action': action,
+                    'resource': resource,
+                    'prev_hash': prev_hash,
+                    'hash': h,
+                    'hash_ts': ts,
+                    'created_at': created_at.isoformat(),
+                }) + '\n'
+                for pk, tenant_id, actor_id, action, resource, prev_hash, h, ts, created_at in page
+            ))
+
+    class _parquet_writer:
+        def __init__(self, outfile, compress):
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise CommandError('parquet output requires the pyarrow package')
+            self.pa = pyarrow
+            self.schema = pyarrow.schema([
+                ('id', pyarrow.int64()),
+                ('tenant', pyarrow.string()),
+                ('actor', pyarrow.string()),
+                ('action', pyarrow.string()),
+                ('resource', pyarrow.string()),  # JSON text
+                ('prev_hash', pyarrow.string()),
+                ('hash', pyarrow.string()),
+                ('hash_ts', pyarrow.string()),
+                ('created_at', pyarrow.timestamp('us', tz='UTC')),
+            ])
+            self.writer = pyarrow.parquet.ParquetWriter(outfile, self.schema, compression=None if compress == 'none' else compress)
+
+        def __enter__(self):
+            return self.write
+
+        def __exit__(self, *exc):
+            self.writer.close()
+
+        def write(self, page):
+            columns = list(zip(*page))
+            self.writer.write_batch(self.pa.record_batch([
+                list(columns[0]),
+                [str(v) for v in columns[1]],
+                [str(v) if v else None for v in columns[2]],
+                list(columns[3]),
+                [json.dumps(v) for v in columns[4]],
+                list(columns[5]),
+                list(columns[6]),
+                list(columns[7]),
+                list(columns[8]),
+            ], schema=self.schema))
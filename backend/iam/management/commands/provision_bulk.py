@@ -0,0 +1,48 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from iam.models import Tenant
+from iam.provisioning import BulkProvisioner, ProvisioningError, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import role bindings, delegated grants and role permissions for a tenant from CSV/JSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=str, required=True, help='tenant id')
+        parser.add_argument('--bindings', type=str, help='role bindings file (.csv or .json)')
+        parser.add_argument('--grants', type=str, help='delegated grants file (.csv or .json)')
+        parser.add_argument('--role-permissions', type=str, help='role permissions file (.csv or .json)')
+        parser.add_argument('--batch-size', type=int, default=None, help='rows per INSERT (default IAM_PROVISION_BATCH_SIZE)')
+        parser.add_argument('--dry-run', action='store_true', help='validate and report without writing')
+
+    def handle(self, *args, **options):
+        try:
+            found = Tenant.objects.filter(id=options['tenant']).exists()
+        except ValidationError:
+            found = False
+        if not found:
+            raise CommandError(f'Tenant {options["tenant"]} not found')
+        data = {}
+        for kind in ('bindings', 'grants', 'role_permissions'):
+            path = options.get(kind)
+            if not path:
+                continue
+            try:
+                with open(path, 'rb') as fh:
+                    data[kind] = read_rows(fh.read(), 'json' if path.endswith('.json') else 'csv')
+            except (OSError, ValueError, UnicodeDecodeError) as e:
+                raise CommandError(f'{path}: {e}')
+        if not data:
+            raise CommandError('Nothing to import; pass --bindings, --grants and/or --role-permissions')
+
+        try:
+            summary = BulkProvisioner(options['tenant'], batch_size=options['batch_size']).run(data, dry_run=options['dry_run'])
+        except ProvisioningError as e:
+            for error in e.errors:
+                self.stderr.write(f'{error["kind"]} row {error["row"]}: {error["error"]}')
+            raise CommandError(str(e))
+
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        for kind, counts in summary.items():
+            self.stdout.write(f'{kind}: {counts["created"]} new, {counts["skipped"]} already present')
+        self.stdout.write(self.style.SUCCESS(f'{verb} {sum(c["created"] for c in summary.values())} records'))
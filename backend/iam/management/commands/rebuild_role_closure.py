@@ -0,0 +1,33 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from iam.hierarchy import RoleHierarchy
+from iam.models import Tenant
+from iam.services import notify_invalidation
+
+
+class Command(BaseCommand):
+    help = 'Recompute the RoleClosure table from RoleInheritance, e.g. after Role/RoleInheritance rows were bulk inserted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=str, help='tenant id (default: all tenants)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all()
+        if options.get('tenant'):
+            try:
+                tenants = tenants.filter(id=options['tenant'])
+                found = tenants.exists()
+            except ValidationError:
+                found = False
+            if not found:
+                raise CommandError(f'Tenant {options["tenant"]} not found')
+
+        count = 0
+        for tenant_id in tenants.values_list('id', flat=True).iterator():
+            with transaction.atomic():
+                RoleHierarchy.rebuild(tenant_id)
+                # Cached permissions were resolved against the old closure
+                transaction.on_commit(lambda tenant_id=tenant_id: notify_invalidation(tenant_id))
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the role closure of {count} tenant(s)'))
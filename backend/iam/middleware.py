@@ -0,0 +1,76 @@
+import uuid
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from .context import TenantContext, activate, deactivate
+
+
+def _bearer_tenant(request):
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(auth) != 2 or auth[0].lower() != 'bearer':
+        return None
+    public_key = getattr(settings, 'IAM_PUBLIC_KEY_PEM', None)
+    if not public_key:
+        return None
+    from .services import JWTHelper
+    try:
+        # Served from the verified-token cache after the first request with this token
+        return uuid.UUID(JWTHelper.validate_token(auth[1], public_key)['tid'])
+    except Exception:
+        return None  # JWTAuthentication rejects the request itself
+
+
+def _session_tenant(request, user):
+    # Cached in the session per user, so only the first request of a session looks it up
+    cached = request.session.get('iam_tenant') if hasattr(request, 'session') else None
+    if cached and cached[0] == str(user.pk):
+        return uuid.UUID(cached[1]) if cached[1] else None
+    tenant_id = None
+    institution_id = getattr(user, 'institution_id', None)
+    if institution_id:
+        from assessment_core.models import Institution
+        tenant_id = Institution.objects.filter(id=institution_id).values_list('tenant_id', flat=True).first()
+    if hasattr(request, 'session'):
+        request.session['iam_tenant'] = [str(user.pk), str(tenant_id) if tenant_id else None]
+    return tenant_id
+
+
+def resolve_request_tenant(request):
+    """(tenant_id, unrestricted) for a request: the bearer token's `tid` claim, else the session
+    user's institution tenant. Staff users without a tenant are unrestricted."""
+    tenant_id = _bearer_tenant(request)
+    if tenant_id is not None:
+        return tenant_id, False
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None, False
+    tenant_id = _session_tenant(request, user)
+    return tenant_id, tenant_id is None and user.is_staff
+
+
+class TenantContextMiddleware:
+    """Attach the request's tenant context and make it current for tenant-scoped managers.
+
+    Resolution is lazy and happens at most once per request: `request.tenant_context.tenant_id`
+    resolves the id (a cached token check or a per-session lookup), `request.tenant` loads the
+    Tenant row only when a view needs the object. Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        context = TenantContext(lambda: resolve_request_tenant(request))
+        request.tenant_context = context
+        request.tenant = SimpleLazyObject(lambda: self._load_tenant(context))
+        token = activate(context)
+        try:
+            return self.get_response(request)
+        finally:
+            deactivate(token)
+
+    @staticmethod
+    def _load_tenant(context):
+        from .models import Tenant
+        if context.tenant_id is None:
+            return None
+        return Tenant.objects.get(pk=context.tenant_id)
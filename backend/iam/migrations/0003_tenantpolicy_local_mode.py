@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iam", "0002_assessment_assessmentversion_examinstance_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tenantpolicy",
+            name="compiled_ir",
+            field=models.JSONField(
+                blank=True,
+                help_text="Translated decision rules for local mode",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="tenantpolicy",
+            name="mode",
+            field=models.CharField(
+                choices=[("remote", "remote"), ("local", "local")],
+                default="remote",
+                max_length=10,
+            ),
+        ),
+    ]
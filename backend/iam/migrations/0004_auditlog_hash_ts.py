@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iam", "0003_tenantpolicy_local_mode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auditlog",
+            name="hash_ts",
+            field=models.CharField(blank=True, default="", max_length=32),
+        ),
+    ]
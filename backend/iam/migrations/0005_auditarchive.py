@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iam", "0004_auditlog_hash_ts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditArchive",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("period_start", models.DateTimeField()),
+                ("period_end", models.DateTimeField()),
+                ("first_id", models.BigIntegerField()),
+                ("last_id", models.BigIntegerField()),
+                ("row_count", models.IntegerField()),
+                (
+                    "first_prev_hash",
+                    models.CharField(blank=True, max_length=128, null=True),
+                ),
+                ("last_hash", models.CharField(max_length=128)),
+                ("payload", models.BinaryField()),
+                ("payload_sha256", models.CharField(max_length=64)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="iam.tenant"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["tenant", "last_id"],
+                        name="iam_auditar_tenant__b5c79b_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iam", "0005_auditarchive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examsession",
+            name="proctoring_session_id",
+            field=models.CharField(
+                blank=True, db_index=True, max_length=255, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["tenant", "-id"], name="iam_auditlo_tenant__467b0a_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rolebinding",
+            index=models.Index(
+                fields=["subject_type", "subject_id", "tenant"],
+                name="iam_rolebin_subject_0d9107_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+def add_reflexive_closure(apps, schema_editor):
+    # Every existing role includes itself; RoleInheritance starts empty, so that is the whole closure
+    Role = apps.get_model("iam", "Role")
+    RoleClosure = apps.get_model("iam", "RoleClosure")
+    RoleClosure.objects.bulk_create(
+        (RoleClosure(ancestor_id=pk, descendant_id=pk, depth=0) for pk in Role.objects.values_list("pk", flat=True).iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iam", "0006_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoleInheritance",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "includes",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="included_by",
+                        to="iam.role",
+                    ),
+                ),
+                (
+                    "role",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inherits",
+                        to="iam.role",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("role", "includes")},
+            },
+        ),
+        migrations.CreateModel(
+            name="RoleClosure",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("depth", models.PositiveIntegerField(default=0)),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="iam.role",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="iam.role",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("ancestor", "descendant")},
+            },
+        ),
+        migrations.RunPython(add_reflexive_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assessment_core", "0002_institution_tenant"),
+        ("iam", "0007_role_hierarchy"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examsession",
+            name="attempt",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="exam_sessions",
+                to="assessment_core.attempt",
+            ),
+        ),
+    ]
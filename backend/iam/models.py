@@ -1,5 +1,6 @@
 import uuid
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils import timezone
 
 
@@ -56,6 +57,43 @@ class RolePermission(models.Model):
     effect = models.CharField(max_length=10, choices=EFFECT_CHOICES, default='allow')
 
 
+class RoleInheritance(models.Model):
+    """`role` includes `includes`: holders of `role` get every permission of `includes`
+    and, transitively, of the roles it includes. Flattened into RoleClosure by iam.hierarchy."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    role = models.ForeignKey(Role, on_delete=models.CASCADE, related_name='inherits')
+    includes = models.ForeignKey(Role, on_delete=models.CASCADE, related_name='included_by')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = (('role', 'includes'),)
+
+    def clean(self):
+        if self.role_id == self.includes_id:
+            raise ValidationError({'includes': 'A role cannot include itself.'})
+        if self.role.tenant_id != self.includes.tenant_id:
+            raise ValidationError({'includes': 'Roles of different tenants cannot include each other.'})
+        if RoleClosure.objects.filter(ancestor_id=self.includes_id, descendant_id=self.role_id).exists():
+            raise ValidationError({'includes': f'{self.includes.name} already includes {self.role.name}.'})
+
+    def save(self, *args, **kwargs):
+        self.clean()
+        super().save(*args, **kwargs)
+
+
+class RoleClosure(models.Model):
+    """Transitive closure of RoleInheritance: one row per (role, role it includes directly or
+    indirectly), with the shortest path length, plus (role, role, 0) for every role. Maintained
+    incrementally by iam.hierarchy.RoleHierarchy; never edited by hand."""
+    id = models.BigAutoField(primary_key=True)
+    ancestor = models.ForeignKey(Role, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Role, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('ancestor', 'descendant'),)
+
+
 class RoleBinding(models.Model):
     SUBJECT_CHOICES = [('user', 'user'), ('group', 'group')]
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -68,6 +106,12 @@ class RoleBinding(models.Model):
     created_by = models.UUIDField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # Snapshot builds look up a subject's bindings on every permission cache miss
+            models.Index(fields=['subject_type', 'subject_id', 'tenant']),
+        ]
+
 
 class AttributePolicy(models.Model):
     EFFECT_CHOICES = [('allow', 'allow'), ('deny', 'deny')]
@@ -80,6 +124,19 @@ class AttributePolicy(models.Model):
     effect = models.CharField(max_length=10, choices=EFFECT_CHOICES, default='allow')
     created_at = models.DateTimeField(default=timezone.now)
 
+    def clean(self):
+        # 'simple' expressions must compile in the supported ABAC subset; 'opa' expressions are policy paths
+        if self.policy_type == 'simple':
+            from .abac import compile_expression, ExpressionError
+            try:
+                compile_expression(self.expression)
+            except ExpressionError as e:
+                raise ValidationError({'expression': str(e)})
+
+    def save(self, *args, **kwargs):
+        self.clean()
+        super().save(*args, **kwargs)
+
 
 class DelegatedGrant(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -95,11 +152,17 @@ class DelegatedGrant(models.Model):
 
 
 class TenantPolicy(models.Model):
-    """A per-tenant Rego policy source managed in the application and deployable to OPA."""
+    """A per-tenant Rego policy source managed in the application and deployable to OPA.
+    In 'local' mode the policy is translated (see iam.rego) into in-process decision functions at deploy time
+    instead of being pushed to OPA.
+    """
+    MODE_CHOICES = [('remote', 'remote'), ('local', 'local')]
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
     rego = models.TextField(help_text='Rego source for OPA')
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='remote')
+    compiled_ir = models.JSONField(null=True, blank=True, help_text='Translated decision rules for local mode')
     version = models.CharField(max_length=64, null=True, blank=True)
     last_deployed_at = models.DateTimeField(null=True, blank=True)
     last_deploy_status = models.CharField(max_length=64, null=True, blank=True)
@@ -247,6 +310,10 @@ class ExamSession(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     exam_instance = models.ForeignKey(ExamInstance, on_delete=models.CASCADE, related_name='sessions')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # The candidate's attempt, which proctoring events received for this session are filed against
+    attempt = models.ForeignKey('assessment_core.Attempt', null=True, blank=True, on_delete=models.SET_NULL, related_name='exam_sessions')
+    # Proctoring events are matched to their session by this id on ingestion (set by proctoring.adapter.start_session)
+    proctoring_session_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
     status = models.CharField(max_length=32, default='started')
     start_time = models.DateTimeField(null=True, blank=True)
     end_time = models.DateTimeField(null=True, blank=True)
@@ -282,8 +349,49 @@ class AuditLog(models.Model):
     resource = models.JSONField(null=True, blank=True)
     prev_hash = models.CharField(max_length=128, null=True, blank=True)
     hash = models.CharField(max_length=128)
+    # Timestamp string mixed into `hash`; empty on legacy rows, which can only be link-checked
+    hash_ts = models.CharField(max_length=32, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Chain tail lookup on every audit write
+            models.Index(fields=['tenant', '-id']),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Rows created directly (e.g. GradeAuditLog) are appended to the tenant chain like writer batches
+        if self._state.adding and not self.hash:
+            from .audit import chain_entry
+            with transaction.atomic():
+                chain_entry(self)
+                return super().save(*args, **kwargs)
+        return super().save(*args, **kwargs)
+
+
+class AuditArchive(models.Model):
+    """A closed month of one tenant's audit chain, moved out of AuditLog (see iam.archive).
+
+    `payload` is gzip-compressed JSON lines of the archived rows in chain order;
+    first_prev_hash/last_hash link the archive into the tenant's chain so the live
+    table still verifies from its head.
+    """
+    id = models.BigAutoField(primary_key=True)
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+    period_start = models.DateTimeField()
+    period_end = models.DateTimeField()
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    row_count = models.IntegerField()
+    first_prev_hash = models.CharField(max_length=128, null=True, blank=True)
+    last_hash = models.CharField(max_length=128)
+    payload = models.BinaryField()
+    payload_sha256 = models.CharField(max_length=64)
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [models.Index(fields=['tenant', 'last_id'])]
+
 
 class RevokedToken(models.Model):
     jti = models.CharField(max_length=255, primary_key=True)
@@ -1,47 +1,178 @@
+import hashlib
+import json
+import threading
+import time
 from django.conf import settings
 # Import requests lazily inside methods to avoid hard dependency at module import time
 
 
 class OPAClient:
-    """Lightweight OPA client using HTTP API. Configure OPA_URL in settings."""
+    """Lightweight OPA client using HTTP API. Configure OPA_URL in settings.
+
+    Requests go through one pooled `requests.Session` per process. Several policy
+    paths can be evaluated against the same input in one round trip
+    (`evaluate_many`), decisions are cached for OPA_DECISION_TTL seconds keyed on a
+    hash of the normalized input, and a circuit breaker stops calling OPA for
+    OPA_BREAKER_COOLDOWN seconds after OPA_BREAKER_THRESHOLD consecutive failures.
+    Paths OPA could not evaluate (an error, or the breaker is open) come back as
+    None rather than False, so callers can tell them from a real decision.
+    """
+
+    _session = None
+    _session_lock = threading.Lock()
+    _decisions = {}  # (policy_path, input_hash) -> (expires_at, result)
+    _decisions_lock = threading.Lock()
+    _failures = 0
+    _open_until = 0.0
 
     @staticmethod
     def _base_url():
         return getattr(settings, 'OPA_URL', None)
 
+    @classmethod
+    def _get_session(cls):
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    pool = getattr(settings, 'OPA_POOL_SIZE', 20)
+                    adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    cls._session = session
+        return cls._session
+
+    @staticmethod
+    def _timeout():
+        # (connect, read) seconds
+        return (getattr(settings, 'OPA_CONNECT_TIMEOUT', 0.5), getattr(settings, 'OPA_READ_TIMEOUT', 2.0))
+
+    @staticmethod
+    def _input_hash(input_obj):
+        normalized = json.dumps(input_obj, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha1(normalized.encode()).hexdigest()
+
+    @staticmethod
+    def _interpret(result):
+        # conservative: if result is truthy (e.g., {'allow': true} or true), consider True
+        if isinstance(result, bool):
+            return result
+        if isinstance(result, dict):
+            # prefer explicit 'allow' key
+            if 'allow' in result:
+                return bool(result['allow'])
+            # fallback: any truthy value
+            return bool(result)
+        return False
+
     @staticmethod
     def evaluate(policy_path: str, input_obj: dict) -> bool:
         """Evaluate an OPA policy. policy_path should be like 'example/data/allow' or 'data/tenant/policy/allow'.
-        Returns boolean result (True=allowed).
+        Returns boolean result (True=allowed); fails closed when OPA is unavailable.
         """
-        base = OPAClient._base_url()
+        return bool(OPAClient.evaluate_many([policy_path], input_obj)[policy_path])
+
+    @classmethod
+    def evaluate_many(cls, policy_paths, input_obj: dict) -> dict:
+        """Evaluate several policy paths against one input; returns {policy_path: bool or None}.
+        Cached decisions are served locally and the rest are fetched in a single request;
+        None marks a path OPA could not evaluate.
+        """
+        base = cls._base_url()
         if not base:
             raise RuntimeError('OPA_URL not configured')
-        # Compose eval endpoint: /v1/data/<policy_path>/eval
-        # Normalize
-        p = policy_path.strip('/')
-        url = f"{base}/v1/data/{p}"
+        paths = list(dict.fromkeys(p.strip('/') for p in policy_paths))
+        input_hash = cls._input_hash(input_obj)
+        now = time.monotonic()
+
+        results = {}
+        missing = []
+        for p in paths:
+            hit = cls._decisions.get((p, input_hash))
+            if hit and hit[0] > now:
+                results[p] = hit[1]
+            else:
+                missing.append(p)
+
+        if missing:
+            fetched = cls._fetch(base, missing, input_obj)
+            if fetched is None:
+                # Unavailable, not a decision: the caller picks the fail-closed outcome; failures are not cached
+                results.update(dict.fromkeys(missing))
+            else:
+                results.update(fetched)
+                cls._remember(fetched, input_hash, now)
+        return {path: results[path.strip('/')] for path in policy_paths}
+
+    @classmethod
+    def _fetch(cls, base, paths, input_obj):
+        """Query OPA for `paths`; returns {path: bool} or None when OPA is unavailable."""
+        if cls._open_until > time.monotonic():
+            return None
         try:
-            import requests
-            resp = requests.post(url, json={'input': input_obj}, timeout=5.0)
-            resp.raise_for_status()
-            data = resp.json()
-            # OPA returns `result` key with value; conservative: if result is truthy (e.g., {'allow': true} or true), consider True
-            if isinstance(data, dict) and 'result' in data:
-                result = data['result']
-                if isinstance(result, bool):
-                    return result
-                # if dict like {'allow': True}
-                if isinstance(result, dict):
-                    # prefer explicit 'allow' key
-                    if 'allow' in result:
-                        return bool(result['allow'])
-                    # fallback: any truthy value
-                    return bool(result)
-            return False
+            session = cls._get_session()
+            if len(paths) == 1:
+                # Compose eval endpoint: /v1/data/<policy_path>
+                resp = session.post(f"{base}/v1/data/{paths[0]}", json={'input': input_obj}, timeout=cls._timeout())
+            else:
+                # Each path is wrapped in a comprehension so an undefined rule yields [] instead of
+                # making the whole query undefined.
+                query = '; '.join(
+                    f"p{i} := [v | v := data{''.join(f'[{json.dumps(seg)}]' for seg in p.split('/'))}]"
+                    for i, p in enumerate(paths)
+                )
+                resp = session.post(f"{base}/v1/query", json={'query': query, 'input': input_obj}, timeout=cls._timeout())
         except Exception:
-            # On OPA failure, default to deny (fail-closed)
-            return False
+            cls._record_failure()
+            return None
+        if resp.status_code >= 500:
+            cls._record_failure()
+            return None
+        cls._failures = 0
+        if resp.status_code >= 400:
+            # Policy missing or bad request: OPA itself is healthy, deny
+            return {p: False for p in paths}
+        try:
+            data = resp.json()
+        except ValueError:
+            return {p: False for p in paths}
+        if len(paths) == 1:
+            defined = isinstance(data, dict) and 'result' in data
+            return {paths[0]: cls._interpret(data['result']) if defined else False}
+        bindings = (data.get('result') or [{}])[0] if isinstance(data, dict) else {}
+        return {
+            p: bool(bindings.get(f"p{i}")) and cls._interpret(bindings[f"p{i}"][0])
+            for i, p in enumerate(paths)
+        }
+
+    @classmethod
+    def _record_failure(cls):
+        cls._failures += 1
+        if cls._failures >= getattr(settings, 'OPA_BREAKER_THRESHOLD', 5):
+            # Open (or re-open after a failed trial request) the breaker
+            cls._open_until = time.monotonic() + getattr(settings, 'OPA_BREAKER_COOLDOWN', 30)
+
+    @classmethod
+    def _remember(cls, decisions, input_hash, now):
+        ttl = getattr(settings, 'OPA_DECISION_TTL', 2)
+        if ttl <= 0:
+            return
+        with cls._decisions_lock:
+            if len(cls._decisions) >= getattr(settings, 'OPA_DECISION_CACHE_SIZE', 10000):
+                for key in [k for k, (exp, _) in cls._decisions.items() if exp <= now] or list(cls._decisions):
+                    del cls._decisions[key]
+            for p, result in decisions.items():
+                cls._decisions[(p, input_hash)] = (now + ttl, result)
+
+    @classmethod
+    def reset(cls):
+        """Drop cached decisions and close the circuit breaker (tests, policy redeploys)."""
+        with cls._decisions_lock:
+            cls._decisions.clear()
+        cls._failures = 0
+        cls._open_until = 0.0
 
     @staticmethod
     def push_policy(policy_path: str, rego_source: str) -> bool:
@@ -49,7 +180,7 @@ class OPAClient:
         if not base:
             raise RuntimeError('OPA_URL not configured')
         url = f"{base}/v1/policies/{policy_path}"
-        import requests
-        resp = requests.put(url, data=rego_source.encode('utf-8'), headers={'Content-Type': 'text/plain'})
+        resp = OPAClient._get_session().put(url, data=rego_source.encode('utf-8'), headers={'Content-Type': 'text/plain'})
         resp.raise_for_status()
+        OPAClient.reset()
         return True
@@ -0,0 +1,238 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .audit import AuditPolicy
+from .models import DelegatedGrant, Permission, Role, RoleBinding, RolePermission, User
+from .services import notify_invalidation
+
+KINDS = ('bindings', 'grants', 'role_permissions')
+
+
+class ProvisioningError(ValueError):
+    """The import did not validate; `errors` lists {'kind', 'row', 'error'} for every bad row."""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid rows; nothing was imported')
+        self.errors = errors
+
+
+def _shape_errors(data):
+    """Errors for kinds that are not lists of flat objects (JSON bodies are not checked by read_rows)."""
+    errors = []
+    for kind in KINDS:
+        rows = data.get(kind)
+        if rows in (None, ''):
+            continue
+        if not isinstance(rows, list):
+            errors.append({'kind': kind, 'row': None, 'error': 'expected a list of rows'})
+            continue
+        for i, row in enumerate(rows, 1):
+            if not isinstance(row, dict):
+                errors.append({'kind': kind, 'row': i, 'error': 'expected an object'})
+                continue
+            nested = sorted(str(k) for k, v in row.items() if isinstance(v, (dict, list)))
+            if nested:
+                errors.append({'kind': kind, 'row': i, 'error': f'{", ".join(nested)} must be a single value'})
+    return errors
+
+
+def read_rows(data, fmt):
+    """Rows of one kind from CSV text (a header row, then one row per record) or a JSON list."""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(data)))
+    rows = json.loads(data)
+    if not isinstance(rows, list):
+        raise ValueError('expected a JSON list of rows')
+    return rows
+
+
+def _blank(value):
+    return None if value in (None, '') else value
+
+
+def _as_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        try:
+            value = parse_datetime(value)
+        except ValueError:
+            return None
+    elif not isinstance(value, datetime):
+        return None  # JSON numbers, lists, ...: report the row instead of guessing an epoch
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+class BulkProvisioner:
+    """Bulk import of a tenant's role bindings, delegated grants and role permissions.
+
+    Input is {'bindings': [...], 'grants': [...], 'role_permissions': [...]}, rows as dicts:
+    - bindings: subject_type ('user' default, or 'group'), subject (user id or username; a
+      group id for groups), role (name), resource_scope, expires_at
+    - grants: granter, grantee (user id or username), permission (name), resource_scope,
+      expires_at, justification
+    - role_permissions: role, permission (names), resource_pattern, effect ('allow' default)
+
+    Every row is validated in memory against one lookup per table before anything is
+    written; rows matching an existing record (or an earlier row) are skipped, so an
+    import can be re-run. Records are inserted with bulk_create in batches of
+    IAM_PROVISION_BATCH_SIZE in one transaction. bulk_create bypasses the iam.signals
+    receivers, so one tenant-level invalidation is sent after commit instead.
+    """
+
+    def __init__(self, tenant_id, actor_id=None, batch_size=None):
+        self.tenant_id = tenant_id
+        self.actor_id = actor_id
+        self.batch_size = batch_size or getattr(settings, 'IAM_PROVISION_BATCH_SIZE', 1000)
+
+    def run(self, data, dry_run=False):
+        """Validate and import `data`; returns {kind: {'created': n, 'skipped': n}}. Raises ProvisioningError."""
+        unknown = set(data) - set(KINDS)
+        if unknown:
+            raise ProvisioningError([{'kind': kind, 'row': None, 'error': 'unknown kind'} for kind in sorted(unknown)])
+        with transaction.atomic():
+            plan, skipped = self.plan(data)
+            if not dry_run:
+                for model, kind in ((RolePermission, 'role_permissions'), (RoleBinding, 'bindings'), (DelegatedGrant, 'grants')):
+                    model.objects.bulk_create(plan[kind], batch_size=self.batch_size)
+                if any(plan.values()):
+                    transaction.on_commit(lambda: notify_invalidation(self.tenant_id))
+            summary = {kind: {'created': len(plan[kind]), 'skipped': skipped[kind]} for kind in KINDS}
+            if not dry_run:
+                detail, actor_id = summary, self.actor_id
+                if actor_id is not None and not User.objects.filter(pk=actor_id).exists():
+                    # Staff sessions authenticate as AUTH_USER_MODEL users; keep the id when it is no iam.User
+                    detail, actor_id = dict(summary, actor=str(actor_id)), None
+                AuditPolicy.record(self.tenant_id, actor_id, 'iam.bulk_provision', detail)
+        return summary
+
+    def plan(self, data):
+        """Unsaved model instances per kind and the number of duplicate rows skipped per kind."""
+        shape_errors = _shape_errors(data)
+        if shape_errors:
+            raise ProvisioningError(shape_errors)
+        rows = {kind: list(data.get(kind) or []) for kind in KINDS}
+        roles = dict(Role.objects.filter(tenant_id=self.tenant_id, name__in={
+            r.get('role') for kind in ('bindings', 'role_permissions') for r in rows[kind]
+        }).values_list('name', 'id'))
+        permissions = dict(Permission.objects.filter(name__in={
+            r.get('permission') for kind in ('grants', 'role_permissions') for r in rows[kind]
+        }).values_list('name', 'id'))
+        users = self._users([r.get('subject') for r in rows['bindings'] if r.get('subject_type', 'user') in ('user', '', None)]
+                            + [r.get(f) for r in rows['grants'] for f in ('granter', 'grantee')])
+
+        errors = []
+        plan = {kind: [] for kind in KINDS}
+        skipped = dict.fromkeys(KINDS, 0)
+        seen = self._existing(set(roles.values()))
+
+        def error(kind, i, message):
+            errors.append({'kind': kind, 'row': i, 'error': message})
+
+        for i, row in enumerate(rows['role_permissions'], 1):
+            role_id, permission_id = roles.get(row.get('role')), permissions.get(row.get('permission'))
+            effect = _blank(row.get('effect')) or 'allow'
+            if role_id is None:
+                error('role_permissions', i, f'unknown role {row.get("role")!r}')
+            elif permission_id is None:
+                error('role_permissions', i, f'unknown permission {row.get("permission")!r}')
+            elif effect not in ('allow', 'deny'):
+                error('role_permissions', i, f'invalid effect {effect!r}')
+            else:
+                key = ('rp', role_id, permission_id, _blank(row.get('resource_pattern')), effect)
+                if key in seen:
+                    skipped['role_permissions'] += 1
+                    continue
+                seen.add(key)
+                plan['role_permissions'].append(RolePermission(
+                    role_id=role_id, permission_id=permission_id, resource_pattern=key[3], effect=effect,
+                ))
+
+        now = timezone.now()
+        for i, row in enumerate(rows['bindings'], 1):
+            subject_type = _blank(row.get('subject_type')) or 'user'
+            role_id = roles.get(row.get('role'))
+            subject_id = users.get(str(row.get('subject'))) if subject_type == 'user' else _as_uuid(row.get('subject'))
+            expires_at = _as_datetime(_blank(row.get('expires_at')))
+            if subject_type not in ('user', 'group'):
+                error('bindings', i, f'invalid subject_type {subject_type!r}')
+            elif subject_id is None:
+                error('bindings', i, f'unknown {subject_type} {row.get("subject")!r}')
+            elif role_id is None:
+                error('bindings', i, f'unknown role {row.get("role")!r}')
+            elif _blank(row.get('expires_at')) and expires_at is None:
+                error('bindings', i, f'invalid expires_at {row.get("expires_at")!r}')
+            else:
+                key = ('rb', subject_type, subject_id, role_id, _blank(row.get('resource_scope')))
+                if key in seen:
+                    skipped['bindings'] += 1
+                    continue
+                seen.add(key)
+                plan['bindings'].append(RoleBinding(
+                    tenant_id=self.tenant_id, subject_type=subject_type, subject_id=subject_id, role_id=role_id,
+                    resource_scope=key[4], expires_at=expires_at, created_by=self.actor_id, created_at=now,
+                ))
+
+        for i, row in enumerate(rows['grants'], 1):
+            granter_id, grantee_id = users.get(str(row.get('granter'))), users.get(str(row.get('grantee')))
+            permission_id = permissions.get(row.get('permission'))
+            expires_at = _as_datetime(_blank(row.get('expires_at')))
+            if granter_id is None or grantee_id is None:
+                error('grants', i, f'unknown user {row.get("granter") if granter_id is None else row.get("grantee")!r}')
+            elif permission_id is None:
+                error('grants', i, f'unknown permission {row.get("permission")!r}')
+            elif expires_at is None or expires_at <= now:
+                error('grants', i, 'expires_at must be a future date')
+            else:
+                key = ('dg', grantee_id, permission_id, _blank(row.get('resource_scope')))
+                if key in seen:
+                    skipped['grants'] += 1
+                    continue
+                seen.add(key)
+                plan['grants'].append(DelegatedGrant(
+                    tenant_id=self.tenant_id, granter_id=granter_id, grantee_id=grantee_id, permission_id=permission_id,
+                    resource_scope=key[3], expires_at=expires_at, justification=row.get('justification') or '', created_at=now,
+                ))
+
+        if errors:
+            raise ProvisioningError(errors)
+        return plan, skipped
+
+    def _users(self, refs):
+        """{reference: user id} for references given as user ids or usernames of this tenant."""
+        refs = {str(r) for r in refs if r not in (None, '')}
+        ids = {u for u in map(_as_uuid, refs) if u is not None}
+        found = {}
+        for user_id, username in User.objects.filter(tenant_id=self.tenant_id).filter(
+            Q(id__in=ids) | Q(username__in=refs)
+        ).values_list('id', 'username'):
+            found[str(user_id)] = found[username] = user_id
+        return {ref: found[ref] for ref in refs if ref in found}
+
+    def _existing(self, role_ids):
+        """Keys of the records an import would duplicate: this tenant's bindings and active grants,
+        and the permissions of the roles it names."""
+        keys = {('rb',) + row for row in RoleBinding.objects.filter(tenant_id=self.tenant_id, role_id__in=role_ids)
+                .values_list('subject_type', 'subject_id', 'role_id', 'resource_scope').iterator(chunk_size=5000)}
+        keys.update(('rp',) + row for row in RolePermission.objects.filter(role_id__in=role_ids)
+                    .values_list('role_id', 'permission_id', 'resource_pattern', 'effect'))
+        keys.update(('dg',) + row for row in DelegatedGrant.objects.filter(
+            tenant_id=self.tenant_id, active=True, expires_at__gt=timezone.now()
+        ).values_list('grantee_id', 'permission_id', 'resource_scope'))
+        return keys
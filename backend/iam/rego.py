@@ -0,0 +1,404 @@
+"""Translator for the Rego subset that can be evaluated in-process.
+
+`translate(source)` parses a policy module into a JSON-serializable IR (stored on
+TenantPolicy.compiled_ir at deploy time) and `CompiledPackage(ir)` turns the IR
+into closures. The supported subset covers the boolean decision policies we
+deploy per tenant:
+
+    package tenant.policies
+    import rego.v1                        # imports are accepted and ignored
+
+    default allow := false
+    allow = true if eq(input["user"]["attrs"]["dept"], "CS")
+    allow if {
+        input.user.attrs.role == "proctor"
+        not input.resource.locked
+    }
+
+Rules are complete rules `name [= | := value] [if] { body }` or
+`name [= | := value] if expr` (value defaults to true); several definitions of
+the same rule are alternatives (first matching definition wins), `default`
+supplies the value when none matches. Body expressions are comparisons
+(==, !=, <, <=, >, >=, = as equality), the builtins eq/equal/neq/lt/lte/gt/gte,
+bare terms (true when defined and not false) and `not expr`. Terms are
+string/number/true/false/null literals, `input` references using dot or
+constant bracket access, and references to other rules of the same package.
+Anything else (iteration, `some`, comprehensions, functions, `with`, `data`
+references...) raises RegoTranslationError, so such policies stay remote.
+"""
+import json
+import re
+
+UNDEFINED = object()
+
+_TOKEN = re.compile(r'''
+    (?P<ws>[ \t\r]+|\#[^\n]*)
+  | (?P<nl>\n)
+  | (?P<string>"(?:[^"\\\n]|\\.)*")
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>:=|==|!=|<=|>=|[<>=\[\](){}.,;])
+''', re.VERBOSE)
+
+_COMPARISON_OPS = {'==': 'eq', '=': 'eq', '!=': 'neq', '<': 'lt', '<=': 'lte', '>': 'gt', '>=': 'gte'}
+_BUILTINS = {'eq': 'eq', 'equal': 'eq', 'neq': 'neq', 'lt': 'lt', 'lte': 'lte', 'gt': 'gt', 'gte': 'gte'}
+_KEYWORDS = {'true': True, 'false': False, 'null': None}
+
+
+class RegoTranslationError(ValueError):
+    """The policy uses Rego outside the locally supported subset."""
+
+
+def _tokenize(source):
+    tokens = []
+    pos = 0
+    line = 1
+    while pos < len(source):
+        m = _TOKEN.match(source, pos)
+        if not m:
+            raise RegoTranslationError(f"line {line}: unexpected character {source[pos]!r}")
+        kind = m.lastgroup
+        text = m.group()
+        if kind == 'nl':
+            tokens.append(('nl', text, line))
+            line += 1
+        elif kind != 'ws':
+            tokens.append((kind, text, line))
+        pos = m.end()
+    tokens.append(('eof', '', line))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, source):
+        self.tokens = _tokenize(source)
+        self.i = 0
+
+    # -- token helpers
+    def peek(self):
+        return self.tokens[self.i]
+
+    def next(self):
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def skip_nl(self):
+        while self.tokens[self.i][0] == 'nl':
+            self.i += 1
+
+    def expect(self, text):
+        tok = self.next()
+        if tok[1] != text:
+            self.error(tok, f"expected {text!r}")
+        return tok
+
+    def error(self, tok, message):
+        raise RegoTranslationError(f"line {tok[2]}: {message}, got {tok[1] or tok[0]!r}")
+
+    # -- grammar
+    def module(self):
+        self.skip_nl()
+        if self.peek()[1] != 'package':
+            self.error(self.peek(), "expected 'package'")
+        self.next()
+        package = [self.ident()]
+        while self.peek()[1] == '.':
+            self.next()
+            package.append(self.ident())
+        self.end_of_line()
+
+        rules = {}
+        while True:
+            self.skip_nl()
+            tok = self.peek()
+            if tok[0] == 'eof':
+                break
+            if tok[1] == 'import':
+                while self.peek()[0] not in ('nl', 'eof'):
+                    self.next()
+                continue
+            if tok[1] == 'default':
+                self.next()
+                name = self.ident()
+                if self.next()[1] not in ('=', ':='):
+                    self.error(self.tokens[self.i - 1], "expected '=' or ':='")
+                rules.setdefault(name, {'default': None, 'has_default': False, 'definitions': []})
+                rules[name]['default'] = self.literal()
+                rules[name]['has_default'] = True
+                self.end_of_line()
+                continue
+            name, definition = self.rule()
+            rules.setdefault(name, {'default': None, 'has_default': False, 'definitions': []})
+            rules[name]['definitions'].append(definition)
+        return {'package': package, 'rules': rules}
+
+    def rule(self):
+        name = self.ident()
+        value = True
+        if self.peek()[1] in ('=', ':='):
+            self.next()
+            value = self.literal()
+        has_if = False
+        if self.peek()[1] == 'if':
+            self.next()
+            has_if = True
+        if self.peek()[1] == '{':
+            body = self.block()
+        elif has_if:
+            body = [self.expr()]
+        else:
+            body = []  # unconditional: `allow = true`
+        self.end_of_line()
+        return name, {'value': value, 'body': body}
+
+    def block(self):
+        self.expect('{')
+        body = []
+        while True:
+            self.skip_nl()
+            if self.peek()[1] == '}':
+                self.next()
+                break
+            body.append(self.expr())
+            tok = self.peek()
+            if tok[1] == ';':
+                self.next()
+            elif tok[0] != 'nl' and tok[1] != '}':
+                self.error(tok, "expected newline, ';' or '}'")
+        return body
+
+    def expr(self):
+        if self.peek()[1] == 'not':
+            self.next()
+            return {'op': 'not', 'expr': self.expr()}
+        left = self.term()
+        op = self.peek()[1]
+        if op in _COMPARISON_OPS and self.peek()[0] == 'op':
+            self.next()
+            return {'op': _COMPARISON_OPS[op], 'args': [left, self.term()]}
+        return {'op': 'truthy', 'args': [left]}
+
+    def term(self):
+        tok = self.peek()
+        if tok[0] in ('string', 'number') or tok[1] in _KEYWORDS:
+            return {'value': self.literal()}
+        if tok[0] != 'ident':
+            self.error(tok, "expected a term")
+        name = self.next()[1]
+        if self.peek()[1] == '(':
+            if name not in _BUILTINS:
+                self.error(tok, f"unsupported function {name!r}")
+            self.next()
+            a = self.term()
+            self.expect(',')
+            b = self.term()
+            self.expect(')')
+            return {'call': _BUILTINS[name], 'args': [a, b]}
+        if name == 'input':
+            path = []
+            while self.peek()[1] in ('.', '['):
+                if self.next()[1] == '.':
+                    path.append(self.ident())
+                else:
+                    key = self.literal()
+                    if not isinstance(key, (str, int)) or isinstance(key, bool):
+                        self.error(self.tokens[self.i - 1], "only string or integer keys are supported")
+                    path.append(key)
+                    self.expect(']')
+            return {'input': path}
+        if name in ('data', 'some', 'every', 'with', 'contains', 'else'):
+            self.error(tok, f"{name!r} is not supported locally")
+        if self.peek()[1] in ('.', '['):
+            self.error(tok, "references into rules are not supported locally")
+        return {'rule': name}
+
+    def literal(self):
+        tok = self.next()
+        if tok[0] == 'string':
+            return json.loads(tok[1])
+        if tok[0] == 'number':
+            return json.loads(tok[1])
+        if tok[1] in _KEYWORDS:
+            return _KEYWORDS[tok[1]]
+        self.error(tok, "expected a literal")
+
+    def ident(self):
+        tok = self.next()
+        if tok[0] != 'ident':
+            self.error(tok, "expected an identifier")
+        return tok[1]
+
+    def end_of_line(self):
+        tok = self.peek()
+        if tok[0] not in ('nl', 'eof'):
+            self.error(tok, "expected end of line")
+
+
+def translate(source):
+    """Translate Rego source into the local IR; raises RegoTranslationError outside the subset."""
+    ir = _Parser(source).module()
+    _check_rule_refs(ir)
+    return ir
+
+
+def _check_rule_refs(ir):
+    rules = ir['rules']
+
+    def refs(node):
+        if isinstance(node, dict):
+            if 'rule' in node:
+                yield node['rule']
+            for v in node.values():
+                yield from refs(v)
+        elif isinstance(node, list):
+            for v in node:
+                yield from refs(v)
+
+    graph = {name: set(refs(rule['definitions'])) for name, rule in rules.items()}
+    for name, targets in graph.items():
+        for target in targets:
+            if target not in rules:
+                raise RegoTranslationError(f"rule {name!r} references unknown rule {target!r}")
+
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise RegoTranslationError(f"recursive rule {name!r}")
+        visiting.add(name)
+        for target in graph[name]:
+            visit(target)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in graph:
+        visit(name)
+
+
+def _is_bool(v):
+    return isinstance(v, bool)
+
+
+def _eq(a, b):
+    # Rego never equates booleans with numbers
+    return _is_bool(a) == _is_bool(b) and a == b
+
+
+def _rank(v):
+    # Rego orders values of different types: null < boolean < number < string < array < object
+    if v is None:
+        return 0
+    if _is_bool(v):
+        return 1
+    if isinstance(v, (int, float)):
+        return 2
+    if isinstance(v, str):
+        return 3
+    return 4 if isinstance(v, list) else 5
+
+
+def _ordered(fn):
+    def compare(a, b):
+        ra, rb = _rank(a), _rank(b)
+        if ra != rb:
+            return fn(ra, rb)
+        if ra >= 4:
+            return UNDEFINED  # collection ordering is not supported locally
+        return fn(a, b)
+    return compare
+
+
+_OPERATORS = {
+    'eq': _eq,
+    'neq': lambda a, b: not _eq(a, b),
+    'lt': _ordered(lambda a, b: a < b),
+    'lte': _ordered(lambda a, b: a <= b),
+    'gt': _ordered(lambda a, b: a > b),
+    'gte': _ordered(lambda a, b: a >= b),
+}
+
+
+class CompiledPackage:
+    """In-process decision functions for one translated policy module."""
+
+    def __init__(self, ir):
+        self.package = list(ir['package'])
+        self._rules = {}
+        for name, rule in ir['rules'].items():
+            definitions = [(d['value'], [self._expr(e) for e in d['body']]) for d in rule['definitions']]
+            default = rule['default'] if rule['has_default'] else UNDEFINED
+            self._rules[name] = (definitions, default)
+
+    def rule_value(self, name, input_obj):
+        definitions, default = self._rules[name]
+        for value, body in definitions:
+            if all(expr(input_obj) for expr in body):
+                return value
+        return default
+
+    def decide(self, path, input_obj):
+        """Value at `path` (segments below the package) like OPA's data API; UNDEFINED when undefined."""
+        if not path:
+            values = {name: self.rule_value(name, input_obj) for name in self._rules}
+            return {k: v for k, v in values.items() if v is not UNDEFINED}
+        if len(path) > 1 or path[0] not in self._rules:
+            return UNDEFINED
+        return self.rule_value(path[0], input_obj)
+
+    def _expr(self, node):
+        op = node['op']
+        if op == 'not':
+            inner = self._expr(node['expr'])
+            return lambda input_obj: not inner(input_obj)
+        if op == 'truthy':
+            term = self._term(node['args'][0])
+            return lambda input_obj: _holds(term(input_obj))
+        return self._call(op, [self._term(a) for a in node['args']], holds=True)
+
+    def _call(self, op, args, holds=False):
+        fn = _OPERATORS[op]
+        a, b = args
+
+        def call(input_obj):
+            x, y = a(input_obj), b(input_obj)
+            if x is UNDEFINED or y is UNDEFINED:
+                return False if holds else UNDEFINED
+            result = fn(x, y)
+            return _holds(result) if holds else result
+        return call
+
+    def _term(self, node):
+        if 'value' in node:
+            value = node['value']
+            return lambda input_obj: value
+        if 'input' in node:
+            path = list(node['input'])
+
+            def ref(input_obj):
+                value = input_obj
+                for key in path:
+                    try:
+                        if isinstance(value, dict):
+                            value = value[key]
+                        elif isinstance(value, list) and isinstance(key, int) and not isinstance(key, bool):
+                            value = value[key]
+                        else:
+                            return UNDEFINED
+                    except (KeyError, IndexError):
+                        return UNDEFINED
+                return value
+            return ref
+        if 'rule' in node:
+            name = node['rule']
+            return lambda input_obj: self.rule_value(name, input_obj)
+        if 'call' in node:
+            return self._call(node['call'], [self._term(a) for a in node['args']])
+        raise RegoTranslationError(f"unknown IR node {node!r}")
+
+
+def _holds(value):
+    # A Rego expression holds when it is defined and not false
+    return value is not UNDEFINED and value is not False
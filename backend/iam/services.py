@@ -2,8 +2,14 @@ import hashlib
 import json
 import time
 from django.conf import settings
-from django.core.cache import cache
-from .models import RoleBinding, RolePermission, AttributePolicy, DelegatedGrant, EmergencyAccess, AuditLog, RevokedToken
+from .audit import AuditPolicy
+from .models import RevokedToken
+from .abac import CompiledPolicyCache, ExpressionError
+from .generations import CacheGenerations
+from .local_cache import iam_cache
+from .local_policies import LocalPolicyRegistry
+from .snapshot import PermissionSnapshot
+from .tokens import RevocationFilter, TokenKeys, verified_token_key, verified_tokens
 from django.utils import timezone
 
 CACHE_TTL = getattr(settings, 'IAM_CACHE_TTL', 60)  # seconds
@@ -11,37 +17,32 @@ CACHE_PREFIX = 'iam:perm:'
 INVALIDATION_CHANNEL = getattr(settings, 'IAM_INVALIDATION_CHANNEL', 'iam_invalidation')
 
 
-def _cache_key(tenant_id, user_id, permission, resource):
+def _cache_key(tenant_id, user_id, permission, resource, generations):
+    # Tenant and user generations are part of the key, so bumping either one retires every cached decision
     r = json.dumps(resource, sort_keys=True) if resource else ''
-    key = f"{tenant_id}:{user_id}:{permission}:{hashlib.sha1(r.encode()).hexdigest()}"
-    return CACHE_PREFIX + hashlib.sha1(key.encode()).hexdigest()
-
-
-def _hash_audit(prev_hash, tenant_id, actor_id, action, resource_json):
-    s = (prev_hash or '') + '|' + str(tenant_id) + '|' + str(actor_id or '') + '|' + action + '|' + resource_json + '|' + str(time.time())
-    return hashlib.sha256(s.encode()).hexdigest()
+    key = f"{permission}:{r}"
+    return f"{CACHE_PREFIX}{tenant_id}:{generations[0]}:{user_id}:{generations[1]}:{hashlib.sha1(key.encode()).hexdigest()}"
 
 
 class PolicyEvaluator:
-    """A small, safe evaluator for 'simple' ABAC expressions.
+    """Evaluator for 'simple' ABAC expressions.
     The expression language supports referencing user and resource attributes via `user.attrs['key']` and resource['attrs']['key'].
-    Only boolean logic and comparisons allowed: ==, !=, <, >, <=, >=, and, or, not.
+    Only boolean logic and comparisons allowed: ==, !=, <, >, <=, >=, in, not in, and, or, not.
+    Expressions are compiled once (see iam.abac) and cached per policy; evaluation is a function call.
     """
 
-    SAFE_BUILTINS = {}
-
     @staticmethod
-    def evaluate(expression: str, context: dict) -> bool:
-        # Very lightweight and guarded: build a safe namespace exposing user and resource
-        # Do NOT use eval on untrusted input in production without a full sandbox.
+    def evaluate(expression: str, context: dict, policy_id=None) -> bool:
         allowed_names = {'user': context.get('user', {}), 'resource': context.get('resource', {})}
-        # Restrict __builtins__ to prevent abuse
-        safe_globals = {'__builtins__': {}}
-        safe_globals.update(allowed_names)
         try:
-            result = eval(expression, safe_globals, {})
-            return bool(result)
-        except Exception:
+            fn = CompiledPolicyCache.get(policy_id, expression)
+        except ExpressionError:
+            # Rejected at save time; only reachable for rows written around model validation
+            return False
+        try:
+            return fn(allowed_names)
+        except (LookupError, TypeError, AttributeError):
+            # Missing attribute or incomparable values: the condition does not hold
             return False
 
 
@@ -54,93 +55,167 @@ class PermissionResolver:
     def has_permission(user, permission_name, resource=None):
         # user is an iam.User instance
         tenant_id = str(user.tenant_id)
-        cache_key = _cache_key(tenant_id, str(user.id), permission_name, resource or {})
-        cached = cache.get(cache_key)
+        generations = CacheGenerations.get(tenant_id, str(user.id))
+        cache_key = _cache_key(tenant_id, str(user.id), permission_name, resource or {}, generations)
+        cached = iam_cache.get(cache_key, scope=(tenant_id, user.id))
         if cached is not None:
             return cached
 
-        # 1. Emergency access check
-        now = timezone.now()
-        e = EmergencyAccess.objects.filter(tenant=user.tenant, requester=user, permission__name=permission_name, start_at__lte=now, expires_at__gte=now, consumed=False).first()
-        if e:
-            # record audit and optionally mark consumed here (we'll leave consumed policy to caller)
-            PermissionResolver._audit(user.tenant, user, 'permission.allow.emergency', {'permission': permission_name, 'resource': resource})
-            cache.set(cache_key, True, CACHE_TTL)
-            return True
-
-        # 2. Deny checks (explicit denies)
-        # Gather user's role bindings
-        bindings = RoleBinding.objects.filter(subject_type='user', subject_id=user.id, tenant=user.tenant)
-        for b in bindings:
-            if b.expires_at and b.expires_at <= now:
+        snapshot = PermissionSnapshot.for_user(user, generations)
+        allowed, action, detail = PermissionResolver._decide(snapshot, user, permission_name, resource)
+        PermissionResolver._audit(user.tenant_id, user, action, detail, routine=allowed and action == 'permission.check')
+        if 'opa_unavailable' not in detail:
+            # A fail-closed outcome for an unreachable OPA is not a decision; the next call asks again
+            iam_cache.set(cache_key, allowed, snapshot.ttl(CACHE_TTL), scope=(tenant_id, user.id))
+        return allowed
+
+    @staticmethod
+    def has_permissions(user, checks):
+        """Batch variant of has_permission for list views and serializers.
+        `checks` is an iterable of (permission, resource) pairs; returns a list of booleans in the same order.
+        All decisions come from one snapshot, cached decisions are fetched and new ones stored with a single
+        get_many/set_many round trip, and one aggregated audit entry is written for the batch.
+        """
+        checks = [(permission, resource) for permission, resource in checks]
+        tenant_id, user_id = str(user.tenant_id), str(user.id)
+        generations = CacheGenerations.get(tenant_id, user_id)
+        keys = [_cache_key(tenant_id, user_id, permission, resource or {}, generations) for permission, resource in checks]
+        known = iam_cache.get_many(keys, scope=(tenant_id, user_id)) if keys else {}
+
+        snapshot = None
+        fresh = {}
+        cacheable = {}
+        actions = {}
+        exceptions = []
+        results = []
+        for (permission, resource), key in zip(checks, keys):
+            if key in known:
+                results.append(known[key])
                 continue
-            rperms = RolePermission.objects.filter(role=b.role, permission__name=permission_name, effect='deny')
-            for rp in rperms:
-                if PermissionResolver._match_scope(rp.resource_pattern, resource, b.resource_scope):
-                    PermissionResolver._audit(user.tenant, user, 'permission.deny.role', {'role': b.role.name, 'permission': permission_name, 'resource': resource})
-                    cache.set(cache_key, False, CACHE_TTL)
-                    return False
+            if snapshot is None:
+                snapshot = PermissionSnapshot.for_user(user, generations)
+            allowed, action, detail = PermissionResolver._decide(snapshot, user, permission, resource)
+            known[key] = fresh[key] = allowed
+            if 'opa_unavailable' not in detail:
+                cacheable[key] = allowed
+            actions[action] = actions.get(action, 0) + 1
+            if action != 'permission.check' or 'opa_unavailable' in detail:
+                exceptions.append(dict(detail, action=action, resource=resource))
+            results.append(allowed)
+
+        if cacheable:
+            iam_cache.set_many(cacheable, snapshot.ttl(CACHE_TTL), scope=(tenant_id, user_id))
+        if fresh:
+            allowed_count = sum(1 for v in fresh.values() if v)
+            PermissionResolver._audit(user.tenant_id, user, 'permission.check.batch', {
+                'permissions': sorted({permission for permission, _ in checks}),
+                'evaluated': sum(actions.values()),
+                'allowed': allowed_count,
+                'actions': actions,
+                'exceptions': exceptions,
+            }, routine=not exceptions and allowed_count == len(fresh))
+        return results
+
+    @staticmethod
+    def filter_allowed(user, permission_name, resources):
+        """Return the resources (dicts with an 'id') the user holds `permission_name` on, preserving order."""
+        resources = list(resources)
+        allowed = PermissionResolver.has_permissions(user, [(permission_name, r) for r in resources])
+        return [r for r, ok in zip(resources, allowed) if ok]
+
+    @staticmethod
+    def _decide(snapshot, user, permission_name, resource):
+        """Decide one permission/resource pair from the user's snapshot.
+        Returns (allowed, audit_action, audit_detail); evaluation order is emergency access,
+        role denies, ABAC denies, role allows, delegated grants, ABAC allows. OPA policies that
+        could not be evaluated fail closed (a deny policy applies, an allow policy does not) and
+        are listed under 'opa_unavailable' in the detail; such decisions must not be cached.
+        """
+        now = timezone.now()
+
+        # 1. Emergency access check
+        if snapshot.has_emergency(permission_name, now):
+            # consumed policy is left to the caller
+            return True, 'permission.allow.emergency', {'permission': permission_name, 'resource': resource}
+
+        # 2. Deny checks (explicit role denies)
+        role_name = snapshot.matching_role(permission_name, 'deny', resource, now)
+        if role_name is not None:
+            return False, 'permission.deny.role', {'role': role_name, 'permission': permission_name, 'resource': resource}
 
         # 3. Attribute policies deny
-        ap_deny = AttributePolicy.objects.filter(tenant=user.tenant, effect='deny')
-        for ap in ap_deny:
-            if ap.policy_type == 'simple' and PolicyEvaluator.evaluate(ap.expression, {'user': {'attrs': user.attrs}, 'resource': resource or {}}):
-                PermissionResolver._audit(user.tenant, user, 'permission.deny.policy', {'policy': ap.name, 'permission': permission_name})
-                cache.set(cache_key, False, CACHE_TTL)
-                return False
-            if ap.policy_type == 'opa':
-                # Use OPA client to evaluate with the stored policy path in `expression`.
-                from .opa_client import OPAClient
-                input_obj = {'user': {'attrs': user.attrs}, 'resource': resource or {}, 'permission': permission_name}
-                res = OPAClient.evaluate(ap.expression, input_obj)
-                if res:
-                    PermissionResolver._audit(user.tenant, user, 'permission.deny.policy.opa', {'policy': ap.name, 'permission': permission_name})
-                    cache.set(cache_key, False, CACHE_TTL)
-                    return False
+        unavailable = []
+        for name, policy_type in PermissionResolver._matching_policies(snapshot, 'deny', user, permission_name, resource, unavailable):
+            action = 'permission.deny.policy.opa' if policy_type == 'opa' else 'permission.deny.policy'
+            detail = {'policy': name, 'permission': permission_name}
+            if unavailable:
+                detail['opa_unavailable'] = unavailable
+            return False, action, detail
 
         # 4. Delegated denies (not commonly used) - omitted for brevity
 
         # 5. Allows
-        allowed = False
-        for b in bindings:
-            if b.expires_at and b.expires_at <= now:
-                continue
-            rperms = RolePermission.objects.filter(role=b.role, permission__name=permission_name, effect='allow')
-            for rp in rperms:
-                if PermissionResolver._match_scope(rp.resource_pattern, resource, b.resource_scope):
-                    allowed = True
-                    break
-            if allowed:
-                break
+        allowed = snapshot.matching_role(permission_name, 'allow', resource, now) is not None
 
         # 6. Delegated grants
         if not allowed:
-            dg = DelegatedGrant.objects.filter(tenant=user.tenant, grantee=user, permission__name=permission_name, active=True, expires_at__gte=now).first()
-            if dg:
-                # optionally check resource scope match
-                allowed = True
+            # optionally check resource scope match
+            allowed = snapshot.has_grant(permission_name, now)
 
         # 7. ABAC allow policies
         if not allowed:
-            ap_allow = AttributePolicy.objects.filter(tenant=user.tenant, effect='allow')
-            for ap in ap_allow:
-                if ap.policy_type == 'simple' and PolicyEvaluator.evaluate(ap.expression, {'user': {'attrs': user.attrs}, 'resource': resource or {}}):
-                    allowed = True
-                    break
-                if ap.policy_type == 'opa':
-                    from .opa_client import OPAClient
+            for _ in PermissionResolver._matching_policies(snapshot, 'allow', user, permission_name, resource, unavailable):
+                allowed = True
+                break
+
+        detail = {'permission': permission_name, 'resource': resource, 'result': allowed}
+        if unavailable:
+            detail['opa_unavailable'] = unavailable
+        return allowed, 'permission.check', detail
+
+    @staticmethod
+    def _matching_policies(snapshot, effect, user, permission_name, resource, unavailable):
+        """Yield (name, policy_type) of the snapshot's attribute policies with `effect` that match, lazily.
+        All OPA policies of the effect are evaluated together when the first one is reached: paths covered by a
+        local mode TenantPolicy in-process, the rest in one round trip to OPA. Names of OPA policies that could
+        not be evaluated are appended to `unavailable`; deny policies among them are yielded (fail closed).
+        """
+        policies = snapshot.policies.get(effect, ())
+        opa_results = None
+        for policy_id, name, policy_type, expression in policies:
+            if policy_type == 'simple' and PolicyEvaluator.evaluate(expression, {'user': {'attrs': user.attrs}, 'resource': resource or {}}, policy_id):
+                yield name, policy_type
+            elif policy_type == 'opa':
+                # Use OPA client to evaluate with the stored policy path in `expression`.
+                if opa_results is None:
                     input_obj = {'user': {'attrs': user.attrs}, 'resource': resource or {}, 'permission': permission_name}
-                    res = OPAClient.evaluate(ap.expression, input_obj)
-                    if res:
-                        allowed = True
-                        break
+                    opa_results = PermissionResolver._evaluate_opa(snapshot.tenant_id, [p[3] for p in policies if p[2] == 'opa'], input_obj)
+                result = opa_results[expression]
+                if result is None:
+                    unavailable.append(name)
+                    if effect == 'deny':
+                        yield name, policy_type
+                elif result:
+                    yield name, policy_type
 
-        PermissionResolver._audit(user.tenant, user, 'permission.check', {'permission': permission_name, 'resource': resource, 'result': allowed})
-        cache.set(cache_key, allowed, CACHE_TTL)
-        return allowed
+    @staticmethod
+    def _evaluate_opa(tenant_id, policy_paths, input_obj):
+        results = {}
+        remote = []
+        for path in policy_paths:
+            local = LocalPolicyRegistry.evaluate(tenant_id, path, input_obj)
+            if local is None:
+                remote.append(path)
+            else:
+                results[path] = local
+        if remote:
+            from .opa_client import OPAClient
+            results.update(OPAClient.evaluate_many(remote, input_obj))
+        return results
 
     @staticmethod
     def _match_scope(pattern, resource, binding_scope):
+        # Reference semantics for one entry; decisions use the snapshot's ScopeIndex, which must agree with it.
         # Very simple scope matching: exact match or wildcard patterns like 'course:*' or 'course:3001'
         if pattern:
             if not resource:
@@ -158,13 +233,9 @@ class PermissionResolver:
         return True
 
     @staticmethod
-    def _audit(tenant, actor, action, resource_json):
-        # Append-only audit with chained hashes
-        prev = AuditLog.objects.filter(tenant=tenant).order_by('-id').first()
-        prev_hash = prev.hash if prev else None
-        resource_s = json.dumps(resource_json, sort_keys=True)
-        h = _hash_audit(prev_hash, tenant.id, getattr(actor, 'id', None), action, resource_s)
-        AuditLog.objects.create(tenant=tenant, actor=actor, action=action, resource=resource_json, prev_hash=prev_hash, hash=h)
+    def _audit(tenant_id, actor, action, resource_json, routine=False):
+        # Append-only audit with chained hashes; routine allows follow IAM_AUDIT_POLICIES (see iam.audit)
+        AuditPolicy.record(tenant_id, getattr(actor, 'id', None), action, resource_json, routine)
 
 
 class JWTHelper:
@@ -194,32 +265,46 @@ class JWTHelper:
 
     @staticmethod
     def validate_token(token, public_key, check_revoked=True):
-        try:
-            payload = JWTHelper.jwt.decode(token, public_key, algorithms=['RS256'], audience='caex-app')
-        except Exception:
-            raise
+        # Signature checks are cached per token until `exp`; revocation is checked on every call,
+        # against the bloom filter first and the table only on a probable hit.
+        key, fingerprint = TokenKeys.load(public_key)
+        cache_key = verified_token_key(fingerprint, token)
+        payload = verified_tokens.get(cache_key)
+        if payload is None:
+            payload = JWTHelper.jwt.decode(
+                token, key, algorithms=['RS256'], audience='caex-app', options={'require': ['exp']}
+            )
+            verified_tokens.set(cache_key, payload, payload['exp'] - time.time())
+        payload = dict(payload)
         if check_revoked:
             jti = payload.get('jti')
-            if RevokedToken.objects.filter(jti=jti).exists():
+            if RevocationFilter.might_contain(jti) and RevokedToken.objects.filter(jti=jti).exists():
                 raise Exception('token_revoked')
         return payload
 
 
-# Simple invalidation hook to purge cache when bindings/grants/policies change.
-# In production, this should publish to Redis channel and other nodes should listen and clear cache entries.
+# Invalidation hook for binding/grant/policy changes. Cached snapshots and decisions are keyed by
+# tenant/user generation counters, so invalidating is one atomic increment in the shared cache;
+# the Redis message lets other workers evict their process-local tier (see iam.local_cache).
+
+def notify_invalidation(tenant_id, user_id=None):
+    if user_id is None:
+        CacheGenerations.bump_tenant(tenant_id)
+        message = str(tenant_id)
+    else:
+        CacheGenerations.bump_user(tenant_id, user_id)
+        message = f"{tenant_id}:{user_id}"
+    iam_cache.local.evict(tenant_id, user_id)
+    publish_invalidation(message)
+
 
-def notify_invalidation(tenant_id):
-    # naive: clear entire IAM cache keys; optimized approaches should target keys per tenant
-    keys = cache.keys(CACHE_PREFIX + '*') if hasattr(cache, 'keys') else []
-    for k in keys:
-        if str(tenant_id) in k:
-            cache.delete(k)
+def publish_invalidation(message):
     # publish to redis channel when configured
     try:
         import redis
         redis_url = getattr(settings, 'REDIS_URL', None)
         if redis_url:
             r = redis.from_url(redis_url)
-            r.publish(INVALIDATION_CHANNEL, str(tenant_id))
+            r.publish(INVALIDATION_CHANNEL, message)
     except Exception:
         pass
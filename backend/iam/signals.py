@@ -0,0 +1,163 @@
+"""Invalidate cached IAM snapshots and decisions when the rows behind them change.
+
+Each change bumps the narrowest generation that covers it once the transaction
+commits (so no reader can re-cache pre-commit state under the new generation):
+- RoleBinding, DelegatedGrant, EmergencyAccess, User attrs: the affected user (and,
+  when a save moves the row to another subject, the previous one)
+- RolePermission: every user bound to the role or a role including it, or the
+  whole tenant when more than IAM_INVALIDATION_FANOUT users hold them
+- AttributePolicy, TenantPolicy, RoleInheritance, group bindings: the tenant
+
+Role and RoleInheritance changes also keep the RoleClosure table current (iam.hierarchy).
+Roles saved raw (loaddata) get their own closure row once the load commits; rows inserted
+with bulk_create get none, so run the rebuild_role_closure command after such imports.
+
+Revoked tokens are added to the revocation filter here and published as
+'revoked:<jti>' for other processes.
+
+Queryset .update()/.delete() and bulk_create bypass model signals; callers using
+them must call notify_invalidation themselves.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from .models import (
+    User, Role, RoleBinding, RoleClosure, RoleInheritance, RolePermission, AttributePolicy, DelegatedGrant,
+    EmergencyAccess, TenantPolicy, RevokedToken
+)
+from .hierarchy import RoleHierarchy
+from .services import notify_invalidation, publish_invalidation
+from .tokens import REVOKED_PREFIX, RevocationFilter
+
+
+def _invalidate_on_commit(tenant_id, user_id=None):
+    transaction.on_commit(lambda: notify_invalidation(tenant_id, user_id))
+
+
+# Fields deciding whose cached permissions a row affects
+_SUBJECT_FIELDS = {
+    RoleBinding: ('tenant_id', 'subject_type', 'subject_id'),
+    DelegatedGrant: ('tenant_id', 'grantee_id'),
+    EmergencyAccess: ('tenant_id', 'requester_id'),
+}
+
+
+def _subject(instance):
+    """(tenant_id, user_id), user_id None meaning the whole tenant (group bindings)."""
+    if isinstance(instance, RoleBinding):
+        return instance.tenant_id, instance.subject_id if instance.subject_type == 'user' else None
+    if isinstance(instance, DelegatedGrant):
+        return instance.tenant_id, instance.grantee_id
+    return instance.tenant_id, instance.requester_id
+
+
+@receiver(pre_save, sender=RoleBinding)
+@receiver(pre_save, sender=DelegatedGrant)
+@receiver(pre_save, sender=EmergencyAccess)
+def _remember_subject(sender, instance, raw=False, **kwargs):
+    # A save may move the row to another subject, whose predecessor must lose it as well
+    if instance._state.adding or raw:
+        return
+    previous = sender.objects.filter(pk=instance.pk).only(*_SUBJECT_FIELDS[sender]).first()
+    instance._previous_subject = _subject(previous) if previous is not None else None
+
+
+@receiver(post_save, sender=RoleBinding)
+@receiver(post_delete, sender=RoleBinding)
+@receiver(post_save, sender=DelegatedGrant)
+@receiver(post_delete, sender=DelegatedGrant)
+@receiver(post_save, sender=EmergencyAccess)
+@receiver(post_delete, sender=EmergencyAccess)
+def _subject_grant_changed(sender, instance, **kwargs):
+    subjects = {_subject(instance), instance.__dict__.pop('_previous_subject', None)} - {None}
+    for tenant_id, user_id in subjects:
+        _invalidate_on_commit(tenant_id, user_id)
+
+
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+def _role_permission_changed(sender, instance, **kwargs):
+    fanout = getattr(settings, 'IAM_INVALIDATION_FANOUT', 50)
+    bindings = list(
+        RoleBinding.objects.filter(role__descendant_links__descendant_id=instance.role_id)
+        .values_list('tenant_id', 'subject_type', 'subject_id')[:fanout + 1]
+    )
+    if not bindings:
+        return  # nobody holds the role, nothing cached depends on it
+    tenant_ids = {tenant_id for tenant_id, _, _ in bindings}
+    if len(bindings) > fanout or any(subject_type != 'user' for _, subject_type, _ in bindings):
+        for tenant_id in tenant_ids:
+            _invalidate_on_commit(tenant_id)
+        return
+    for tenant_id, _, user_id in set(bindings):
+        _invalidate_on_commit(tenant_id, user_id)
+
+
+@receiver(post_save, sender=Role)
+def _role_created(sender, instance, created, raw=False, **kwargs):
+    if not created:
+        return
+    if raw:
+        # The fixture may carry the closure row too; add it only if the load did not
+        role_id = instance.id
+        transaction.on_commit(lambda: RoleHierarchy.add_role(role_id))
+    else:
+        RoleHierarchy.add_role(instance.id)
+
+
+@receiver(pre_delete, sender=Role)
+def _role_deleting(sender, instance, **kwargs):
+    # The cascade removes the role's closure rows, so remember which roles included it
+    instance._including_roles = list(
+        RoleClosure.objects.filter(descendant_id=instance.id).exclude(ancestor_id=instance.id).values_list('ancestor_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Role)
+def _role_deleted(sender, instance, **kwargs):
+    if getattr(instance, '_including_roles', None):
+        RoleHierarchy.rebuild(instance.tenant_id, instance._including_roles)
+        _invalidate_on_commit(instance.tenant_id)
+
+
+@receiver(post_save, sender=RoleInheritance)
+def _role_inheritance_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        RoleHierarchy.link(instance.role_id, instance.includes_id)
+        _invalidate_on_commit(instance.role.tenant_id)
+
+
+@receiver(post_delete, sender=RoleInheritance)
+def _role_inheritance_removed(sender, instance, **kwargs):
+    RoleHierarchy.unlink(instance.role_id)
+    tenant_id = Role.objects.filter(pk=instance.role_id).values_list('tenant_id', flat=True).first()
+    if tenant_id is not None:
+        _invalidate_on_commit(tenant_id)
+
+
+@receiver(post_save, sender=AttributePolicy)
+@receiver(post_delete, sender=AttributePolicy)
+@receiver(post_save, sender=TenantPolicy)
+@receiver(post_delete, sender=TenantPolicy)
+def _tenant_policy_changed(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.tenant_id)
+
+
+# User fields that cached decisions depend on: ABAC policies read attrs, and keys are per tenant
+_USER_PERMISSION_FIELDS = {'attrs', 'tenant', 'tenant_id'}
+
+
+@receiver(post_save, sender=User)
+def _user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # A new user has nothing cached yet; saves limited to other fields (e.g. email) keep the cache
+    if created or (update_fields is not None and not _USER_PERMISSION_FIELDS & set(update_fields)):
+        return
+    _invalidate_on_commit(instance.tenant_id, instance.id)
+
+
+@receiver(post_save, sender=RevokedToken)
+def _token_revoked(sender, instance, **kwargs):
+    # A bloom bit set before commit only costs a table lookup; other processes learn of it after commit
+    RevocationFilter.add(instance.jti)
+    transaction.on_commit(lambda: publish_invalidation(REVOKED_PREFIX + instance.jti))
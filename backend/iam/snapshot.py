@@ -0,0 +1,205 @@
+from collections import defaultdict
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .generations import CacheGenerations
+from .local_cache import iam_cache
+from .models import RolePermission, AttributePolicy, DelegatedGrant, EmergencyAccess
+
+SNAPSHOT_TTL = getattr(settings, 'IAM_SNAPSHOT_TTL', getattr(settings, 'IAM_CACHE_TTL', 60))  # seconds
+SNAPSHOT_PREFIX = 'iam:perm:snap:'
+
+
+def _later(current, entry):
+    """Of two (role_name, expires_at) entries, the one that stays live longer (None never expires)."""
+    if current is None or (current[1] is not None and (entry[1] is None or entry[1] > current[1])):
+        return entry
+    return current
+
+
+class ScopeIndex:
+    """Role entries of one permission and effect, indexed by the resources they cover.
+
+    Matches exactly what PermissionResolver._match_scope accepts for any of the entries,
+    in O(length of the resource id) instead of one test per entry:
+    - unconditional: entries with neither a pattern nor a binding scope (match even without a resource)
+    - any_resource: entries whose plain pattern equals their binding scope (match any resource)
+    - exact: resource id -> entry, for plain patterns and for the binding scope of unpatterned entries
+    - prefixes: character trie of 'prefix:*' patterns, '' marking the end of a prefix
+    Each slot keeps the (role_name, expires_at) entry that expires last, so expiry is still
+    checked at decision time.
+    """
+
+    def __init__(self, entries):
+        self.unconditional = None
+        self.any_resource = None
+        self.exact = {}
+        self.prefixes = {}
+        for _, pattern, scope, role_name, expires_at in entries:
+            entry = (role_name, expires_at)
+            if pattern and pattern.endswith(':*'):
+                node = self.prefixes
+                for char in pattern[:-2]:
+                    node = node.setdefault(char, {})
+                node[''] = _later(node.get(''), entry)
+            elif pattern:
+                self.exact[pattern] = _later(self.exact.get(pattern), entry)
+                if pattern == scope:
+                    self.any_resource = _later(self.any_resource, entry)
+            elif scope:
+                self.exact[scope] = _later(self.exact.get(scope), entry)
+            else:
+                self.unconditional = _later(self.unconditional, entry)
+
+    def match(self, resource, now):
+        """Role name of a live entry covering `resource`, or None."""
+        for role_name, expires_at in self._candidates(resource):
+            if expires_at is None or expires_at > now:
+                return role_name
+        return None
+
+    def _candidates(self, resource):
+        if self.unconditional:
+            yield self.unconditional
+        if not resource:
+            return
+        if self.any_resource:
+            yield self.any_resource
+        res_id = resource.get('id') or ''
+        try:
+            entry = self.exact.get(res_id)
+        except TypeError:  # unhashable id
+            entry = None
+        if entry:
+            yield entry
+        if not isinstance(res_id, str):
+            return
+        node = self.prefixes
+        for char in res_id:
+            if '' in node:
+                yield node['']
+            node = node.get(char)
+            if node is None:
+                return
+        if '' in node:
+            yield node['']
+
+
+class PermissionSnapshot:
+    """Effective permissions of one user in one tenant.
+
+    Everything the resolver needs to decide any permission/resource pair for the
+    user, loaded with one joined RolePermission x RoleClosure x RoleBinding query
+    (so permissions of included roles count, however deep the hierarchy) plus one
+    query each for attribute policies, delegated grants and emergency access, and
+    cached as a single entry:
+    - entries: permission -> [(effect, resource_pattern, binding_scope, role_name, binding_expires_at)],
+      role_name being the bound role
+    - policies: effect -> [(policy_id, name, policy_type, expression)] for the tenant's AttributePolicy rows
+    - grants: permission -> [(resource_scope, expires_at)] for active delegated grants
+    - emergency: permission -> [(start_at, expires_at)] for unconsumed emergency access
+    - scopes: (permission, effect) -> ScopeIndex over the entries, for matching resources
+    Expiry timestamps are kept on the entries and checked at decision time;
+    `valid_until` is the earliest future expiry or activation among them, which
+    caps how long the snapshot and decisions derived from it may be cached.
+    """
+
+    def __init__(self, tenant_id, user_id, entries, policies, grants, emergency, valid_until=None):
+        self.tenant_id = tenant_id
+        self.user_id = user_id
+        self.entries = entries
+        self.policies = policies
+        self.grants = grants
+        self.emergency = emergency
+        self.valid_until = valid_until
+        self.scopes = self.index_scopes(entries)
+
+    @staticmethod
+    def cache_key(tenant_id, user_id, generations):
+        return f"{SNAPSHOT_PREFIX}{tenant_id}:{generations[0]}:{user_id}:{generations[1]}"
+
+    @classmethod
+    def for_user(cls, user, generations=None):
+        if generations is None:
+            generations = CacheGenerations.get(str(user.tenant_id), str(user.id))
+        key = cls.cache_key(user.tenant_id, user.id, generations)
+        snapshot = iam_cache.get(key, scope=(user.tenant_id, user.id))
+        if snapshot is None:
+            snapshot = cls.build(user.tenant_id, user.id)
+            iam_cache.set(key, snapshot, snapshot.ttl(SNAPSHOT_TTL), scope=(user.tenant_id, user.id))
+        return snapshot
+
+    @classmethod
+    def build(cls, tenant_id, user_id):
+        now = timezone.now()
+        entries = defaultdict(list)
+        for permission, effect, pattern, scope, role_name, expires_at in cls.role_rows(tenant_id, user_id, now):
+            entries[permission].append((effect, pattern, scope, role_name, expires_at))
+
+        policies = {'deny': [], 'allow': []}
+        for policy_id, name, policy_type, expression, effect in AttributePolicy.objects.filter(tenant_id=tenant_id).values_list('id', 'name', 'policy_type', 'expression', 'effect'):
+            policies.setdefault(effect, []).append((policy_id, name, policy_type, expression))
+
+        grants = defaultdict(list)
+        for permission, scope, expires_at in DelegatedGrant.objects.filter(tenant_id=tenant_id, grantee_id=user_id, active=True, expires_at__gte=now).values_list('permission__name', 'resource_scope', 'expires_at'):
+            grants[permission].append((scope, expires_at))
+
+        emergency = defaultdict(list)
+        for permission, start_at, expires_at in EmergencyAccess.objects.filter(tenant_id=tenant_id, requester_id=user_id, expires_at__gte=now, consumed=False).values_list('permission__name', 'start_at', 'expires_at'):
+            emergency[permission].append((start_at, expires_at))
+
+        changes = [e[4] for rows in entries.values() for e in rows if e[4]]
+        changes += [expires_at for rows in grants.values() for _, expires_at in rows]
+        changes += [t for rows in emergency.values() for window in rows for t in window if t > now]
+        valid_until = min(changes) if changes else None
+        return cls(tenant_id, user_id, dict(entries), policies, dict(grants), dict(emergency), valid_until)
+
+    @staticmethod
+    def role_rows(tenant_id, user_id, now):
+        """(permission, effect, pattern, binding scope, bound role, binding expiry) for the user's live
+        bindings and every role they include: one indexed bindings -> closure -> permissions join."""
+        binding = 'role__ancestor_links__ancestor__rolebinding__'
+        return (
+            RolePermission.objects
+            .filter(
+                Q(**{f'{binding}expires_at__isnull': True}) | Q(**{f'{binding}expires_at__gt': now}),
+                **{f'{binding}tenant_id': tenant_id, f'{binding}subject_type': 'user', f'{binding}subject_id': user_id},
+            )
+            .values_list(
+                'permission__name', 'effect', 'resource_pattern',
+                f'{binding}resource_scope', 'role__ancestor_links__ancestor__name', f'{binding}expires_at'
+            )
+        )
+
+    @classmethod
+    def invalidate(cls, tenant_id, user_id):
+        CacheGenerations.bump_user(str(tenant_id), str(user_id))
+
+    def ttl(self, default):
+        """`default` seconds, cut short so nothing cached from this snapshot outlives its next expiry/activation."""
+        if self.valid_until is None:
+            return default
+        return max(0, min(default, int((self.valid_until - timezone.now()).total_seconds())))
+
+    @staticmethod
+    def index_scopes(entries):
+        """(permission, effect) -> ScopeIndex over the role entries."""
+        grouped = defaultdict(list)
+        for permission, rows in entries.items():
+            for entry in rows:
+                grouped[(permission, entry[0])].append(entry)
+        return {key: ScopeIndex(rows) for key, rows in grouped.items()}
+
+    def matching_role(self, permission, effect, resource, now):
+        """Bound role of a live `effect` entry of `permission` whose scope covers `resource`, or None."""
+        scopes = getattr(self, 'scopes', None)
+        if scopes is None:  # snapshot cached before scope indexes existed
+            scopes = self.scopes = self.index_scopes(self.entries)
+        index = scopes.get((permission, effect))
+        return None if index is None else index.match(resource, now)
+
+    def has_emergency(self, permission, now):
+        return any(start <= now <= end for start, end in self.emergency.get(permission, ()))
+
+    def has_grant(self, permission, now):
+        return any(expires_at >= now for _, expires_at in self.grants.get(permission, ()))
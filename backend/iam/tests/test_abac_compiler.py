@@ -0,0 +1,47 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from iam.abac import compile_expression, CompiledPolicyCache, ExpressionError
+from iam.models import Tenant, AttributePolicy
+from iam.services import PolicyEvaluator
+
+
+class ABACCompilerTest(TestCase):
+    def setUp(self):
+        CompiledPolicyCache.clear()
+        self.context = {'user': {'attrs': {'dept': 'CS', 'level': 3}}, 'resource': {'attrs': {'dept': 'CS'}, 'id': 'course:1'}}
+
+    def test_supported_subset(self):
+        cases = {
+            "user.attrs['dept'] == 'CS'": True,
+            "user['attrs']['dept'] == resource['attrs']['dept']": True,
+            "user.attrs['level'] >= 2 and not user.attrs['dept'] != 'CS'": True,
+            "1 < user.attrs['level'] < 3": False,
+            "user.attrs['dept'] in ('CS', 'MATH') or False": True,
+            "resource['id'] not in ['course:1']": False,
+        }
+        for expression, expected in cases.items():
+            self.assertEqual(compile_expression(expression)(self.context), expected, expression)
+
+    def test_rejects_everything_else(self):
+        for expression in ["__import__('os')", "user.attrs.keys()", "user.__class__", "x == 1",
+                           "user.attrs['level'] + 1 > 2", "[c for c in 'ab']", "user.attrs['dept'] ==", "lambda: 1"]:
+            with self.assertRaises(ExpressionError, msg=expression):
+                compile_expression(expression)
+
+    def test_missing_attribute_evaluates_false(self):
+        self.assertFalse(PolicyEvaluator.evaluate("user.attrs['campus'] == 'north'", self.context))
+
+    def test_compiled_once_per_policy_version(self):
+        first = CompiledPolicyCache.get('p1', "user.attrs['dept'] == 'CS'")
+        self.assertIs(CompiledPolicyCache.get('p1', "user.attrs['dept'] == 'CS'"), first)
+        second = CompiledPolicyCache.get('p1', "user.attrs['dept'] == 'MATH'")
+        self.assertIsNot(second, first)
+        self.assertEqual(len([k for k in CompiledPolicyCache._compiled if k[0] == 'p1']), 1)
+
+    def test_invalid_expression_rejected_on_save(self):
+        tenant = Tenant.objects.create(name='ABAC Uni')
+        with self.assertRaises(ValidationError) as ctx:
+            AttributePolicy.objects.create(tenant=tenant, name='bad', expression="open('/etc/passwd')")
+        self.assertIn('expression', ctx.exception.message_dict)
+        # OPA policies hold a policy path, not an expression
+        AttributePolicy.objects.create(tenant=tenant, name='opa', policy_type='opa', expression='tenant/policies/allow')
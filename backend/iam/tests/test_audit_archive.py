@@ -0,0 +1,91 @@
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from iam.archive import AuditArchiver
+from iam.audit import AuditWriter
+from iam.models import Tenant, User, AuditLog, AuditArchive
+
+
+def _at(month, day=10):
+    return datetime(2026, month, day, tzinfo=dt_timezone.utc)
+
+
+class AuditArchiveTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Archive Uni')
+        self.other = Tenant.objects.create(name='Other Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='eve')
+        entries = []
+        for month, count in ((1, 4), (2, 3), (3, 2)):
+            for i in range(count):
+                entries.append((self.tenant.id, self.user.id, 'permission.check', {'month': month, 'n': i}, _at(month, i + 1)))
+                entries.append((self.other.id, None, 'permission.check', {'month': month, 'n': i}, _at(month, i + 1)))
+        AuditWriter.write_batch(entries)
+
+    def run_command(self, name, **options):
+        out = StringIO()
+        call_command(name, stdout=out, **options)
+        return out.getvalue()
+
+    def test_closed_months_move_into_linked_archives(self):
+        out = self.run_command('archive_audit', tenant=str(self.tenant.id), before='2026-03', chunk_size=2)
+        self.assertIn('Archived 7 audit rows', out)
+
+        archives = list(AuditArchive.objects.filter(tenant=self.tenant).order_by('last_id'))
+        self.assertEqual([(a.period_start.month, a.row_count) for a in archives], [(1, 4), (2, 3)])
+        self.assertIsNone(archives[0].first_prev_hash)
+        self.assertEqual(archives[1].first_prev_hash, archives[0].last_hash)
+        self.assertEqual([r['resource']['n'] for r in AuditArchiver.rows(archives[0])], [0, 1, 2, 3])
+
+        live = AuditLog.objects.filter(tenant=self.tenant).order_by('id')
+        self.assertEqual(live.count(), 2)
+        self.assertEqual(live.first().prev_hash, archives[1].last_hash)
+        self.assertEqual(AuditLog.objects.filter(tenant=self.other).count(), 9)
+
+        # New entries continue from the archive once every live row is gone
+        AuditLog.objects.filter(tenant=self.tenant).delete()
+        AuditWriter.submit(self.tenant.id, self.user.id, 'permission.check', {'n': 'after'})
+        self.assertEqual(AuditLog.objects.get(tenant=self.tenant).prev_hash, archives[1].last_hash)
+
+    def test_unchained_legacy_rows_are_archived(self):
+        AuditLog.objects.bulk_create([
+            AuditLog(tenant=self.tenant, action='grade_recorded', resource={}, prev_hash=None, hash='', created_at=_at(3, 20))
+        ])
+        AuditWriter.write_batch([(self.tenant.id, None, 'permission.check', {'n': 'after'}, _at(4))])
+        self.assertIn('Archived 10 audit rows', self.run_command('archive_audit', tenant=str(self.tenant.id), before='2026-04'))
+        self.assertIn('Audit chain intact', self.run_command('verify_audit_chain', workers=1, archives=True))
+
+    def test_verification_is_seeded_from_archives(self):
+        self.run_command('archive_audit', before='2026-03')
+        out = self.run_command('verify_audit_chain', workers=1, segment_size=2, archives=True)
+        self.assertIn('Audit chain intact: 4 rows', out)
+
+        archive = AuditArchive.objects.filter(tenant=self.tenant).order_by('last_id').first()
+        AuditArchive.objects.filter(pk=archive.pk).update(payload=b'tampered')
+        with self.assertRaisesMessage(CommandError, f'Audit archive chain broken at id {archive.first_id}'):
+            self.run_command('verify_audit_chain', workers=1, archives=True)
+
+    def test_dry_run_keeps_rows_and_broken_chain_is_refused(self):
+        out = self.run_command('archive_audit', before='2026-03', dry_run=True)
+        self.assertIn('Would archive 14 audit rows', out)
+        self.assertFalse(AuditArchive.objects.exists())
+
+        second = AuditLog.objects.filter(tenant=self.tenant).order_by('id')[1]
+        AuditLog.objects.filter(pk=second.pk).update(resource={'n': 'x'})
+        with self.assertRaisesMessage(CommandError, f'broken at id {second.pk}'):
+            self.run_command('archive_audit', tenant=str(self.tenant.id), before='2026-03')
+        self.assertFalse(AuditArchive.objects.exists())
+
+    def test_broken_tenant_is_reported_and_the_others_are_archived(self):
+        broken = AuditLog.objects.filter(tenant=self.tenant).order_by('id')[5]
+        AuditLog.objects.filter(pk=broken.pk).update(prev_hash='0' * 64)
+        out, err = StringIO(), StringIO()
+        with self.assertRaisesMessage(CommandError, '1 tenant(s) not fully archived'):
+            call_command('archive_audit', before='2026-03', stdout=out, stderr=err)
+        self.assertIn(f'Tenant {self.tenant.id}: audit chain broken at id {broken.pk}', err.getvalue())
+        self.assertIn('Archived 11 audit rows', out.getvalue())
+        # January of the broken tenant verified before February failed
+        self.assertEqual(list(AuditArchive.objects.filter(tenant=self.tenant).values_list('row_count', flat=True)), [4])
+        self.assertEqual(AuditArchive.objects.filter(tenant=self.other).count(), 2)
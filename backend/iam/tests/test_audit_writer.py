@@ -0,0 +1,116 @@
+import time
+from django.db import connection
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from iam.audit import AuditPolicy, AuditWriter, shutdown
+from iam.models import Tenant, User, AuditLog
+
+
+def _entry(tenant, user, i):
+    return (tenant.id, user.id, 'permission.check', {'n': i}, timezone.now())
+
+
+class AuditWriterTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Audit Uni')
+        self.other = Tenant.objects.create(name='Other Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='ada')
+
+    def assertChained(self, tenant):
+        rows = list(AuditLog.objects.filter(tenant=tenant).order_by('id').values_list('prev_hash', 'hash'))
+        self.assertIsNone(rows[0][0])
+        for (_, prev), (link, _) in zip(rows, rows[1:]):
+            self.assertEqual(link, prev)
+        return rows
+
+    def test_chain_continues_across_batches(self):
+        AuditWriter.submit(self.tenant.id, self.user.id, 'permission.check', {'n': 0})
+        AuditWriter.write_batch([_entry(self.tenant, self.user, i) for i in range(1, 4)])
+        AuditWriter.write_batch([_entry(self.tenant, self.user, i) for i in range(4, 6)])
+        rows = self.assertChained(self.tenant)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(len({h for _, h in rows}), 6)
+
+    def test_batch_is_one_insert_per_tenant(self):
+        entries = [_entry(self.tenant, self.user, i) for i in range(50)]
+        entries += [(self.other.id, None, 'permission.check', {'n': i}, timezone.now()) for i in range(10)]
+        with CaptureQueriesContext(connection) as ctx:
+            AuditWriter.write_batch(entries)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(len(self.assertChained(self.tenant)), 50)
+        self.assertEqual(len(self.assertChained(self.other)), 10)
+
+
+@override_settings(IAM_AUDIT_ASYNC=True, IAM_AUDIT_BATCH_SIZE=25, IAM_AUDIT_FLUSH_INTERVAL=0.05)
+class AsyncAuditWriterTest(TransactionTestCase):
+    def test_submit_enqueues_and_flush_writes_chain(self):
+        tenant = Tenant.objects.create(name='Async Uni')
+        user = User.objects.create(tenant=tenant, username='bo')
+        for i in range(60):
+            AuditWriter.submit(tenant.id, user.id, 'permission.check', {'n': i})
+        self.assertTrue(AuditWriter.flush(timeout=10))
+        rows = list(AuditLog.objects.filter(tenant=tenant).order_by('id').values_list('prev_hash', 'hash', 'resource'))
+        self.assertEqual([r[2]['n'] for r in rows], list(range(60)))
+        for prev, row in zip(rows, rows[1:]):
+            self.assertEqual(row[0], prev[1])
+
+    @override_settings(IAM_AUDIT_FLUSH_INTERVAL=1.0)
+    def test_submit_returns_before_the_batch_is_written(self):
+        tenant = Tenant.objects.create(name='Queued Uni')
+        for i in range(10):
+            AuditWriter.submit(tenant.id, None, 'permission.deny.role', {'n': i})
+        # Fewer entries than a batch: the writer waits out the flush interval before inserting
+        self.assertFalse(AuditLog.objects.filter(tenant=tenant).exists())
+        self.assertTrue(shutdown(timeout=10))
+        self.assertEqual(AuditLog.objects.filter(tenant=tenant).count(), 10)
+
+
+@override_settings(IAM_AUDIT_POLICIES={
+    'permission.check': {'mode': 'aggregate', 'window': 60},
+    'permission.check.sampled': {'mode': 'sample', 'rate': 0.0},
+})
+class AuditPolicyTest(TestCase):
+    def setUp(self):
+        AuditPolicy.reset()
+        self.tenant = Tenant.objects.create(name='Policy Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='cy')
+
+    def test_routine_allows_are_aggregated_into_chained_summaries(self):
+        for _ in range(100):
+            AuditPolicy.record(self.tenant.id, self.user.id, 'permission.check', {'permission': 'grade.read', 'result': True}, routine=True)
+        AuditPolicy.record(self.tenant.id, self.user.id, 'permission.check', {'permission': 'grade.write', 'result': True}, routine=True)
+        self.assertFalse(AuditLog.objects.filter(tenant=self.tenant).exists())
+
+        self.assertEqual(AuditPolicy.flush(force=True), 2)
+        summaries = {e.resource['permission']: e for e in AuditLog.objects.filter(tenant=self.tenant)}
+        self.assertEqual(summaries['grade.read'].action, 'permission.check.summary')
+        self.assertEqual(summaries['grade.read'].resource['count'], 100)
+        self.assertEqual(summaries['grade.write'].resource['count'], 1)
+        self.assertEqual(summaries['grade.read'].actor_id, self.user.id)
+
+    def test_closed_windows_flush_on_next_record(self):
+        AuditPolicy.record(self.tenant.id, self.user.id, 'permission.check', {'permission': 'grade.read'}, routine=True)
+        self.assertEqual(AuditPolicy.flush(now=time.time() + 120), 1)
+        self.assertEqual(AuditLog.objects.get(tenant=self.tenant).resource['count'], 1)
+
+    def test_shutdown_writes_open_windows(self):
+        self.assertFalse(settings.IAM_AUDIT_FLUSH_ON_EXIT)  # test runs must not write after the database is dropped
+        AuditPolicy.record(self.tenant.id, self.user.id, 'permission.check', {'permission': 'grade.read'}, routine=True)
+        self.assertTrue(shutdown())
+        self.assertEqual(AuditLog.objects.get(tenant=self.tenant).action, 'permission.check.summary')
+
+    def test_denies_and_non_routine_are_always_full(self):
+        AuditPolicy.record(self.tenant.id, self.user.id, 'permission.check', {'permission': 'grade.read', 'result': False})
+        AuditPolicy.record(self.tenant.id, self.user.id, 'permission.deny.role', {'permission': 'grade.read'}, routine=True)
+        AuditPolicy.record(self.tenant.id, self.user.id, 'permission.check.sampled', {'permission': 'grade.read'})
+        self.assertEqual(
+            sorted(AuditLog.objects.filter(tenant=self.tenant).values_list('action', flat=True)),
+            ['permission.check', 'permission.check.sampled', 'permission.deny.role'],
+        )
+
+    def test_sampling_rate_zero_drops_routine_entries(self):
+        AuditPolicy.record(self.tenant.id, self.user.id, 'permission.check.sampled', {'permission': 'grade.read'}, routine=True)
+        self.assertFalse(AuditLog.objects.filter(tenant=self.tenant).exists())
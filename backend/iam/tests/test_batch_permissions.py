@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from iam.local_cache import iam_cache
+from django.test import TestCase
+from iam.models import Tenant, User, Role, Permission, RolePermission, RoleBinding, AuditLog
+from iam.services import PermissionResolver
+
+
+class BatchPermissionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        iam_cache.local.clear()
+        self.tenant = Tenant.objects.create(name='Batch Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='erin')
+        role = Role.objects.create(tenant=self.tenant, name='marker')
+        perm = Permission.objects.create(name='grade.read')
+        RolePermission.objects.create(role=role, permission=perm, resource_pattern='course:*', effect='allow')
+        RolePermission.objects.create(role=role, permission=perm, resource_pattern='course:13', effect='deny')
+        RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=role)
+        self.resources = [{'id': f'course:{i}'} for i in range(20)] + [{'id': 'exam:1'}]
+
+    def test_matches_single_checks(self):
+        batch = PermissionResolver.has_permissions(self.user, [('grade.read', r) for r in self.resources])
+        cache.clear()
+        iam_cache.local.clear()
+        single = [PermissionResolver.has_permission(self.user, 'grade.read', resource=r) for r in self.resources]
+        self.assertEqual(batch, single)
+        self.assertFalse(batch[13])
+        self.assertFalse(batch[-1])
+
+    def test_filter_allowed_writes_one_audit_entry(self):
+        allowed = PermissionResolver.filter_allowed(self.user, 'grade.read', self.resources)
+        self.assertEqual([r['id'] for r in allowed], [f'course:{i}' for i in range(20) if i != 13])
+
+        entries = AuditLog.objects.filter(tenant=self.tenant)
+        self.assertEqual(entries.count(), 1)
+        entry = entries.get()
+        self.assertEqual(entry.action, 'permission.check.batch')
+        self.assertEqual(entry.resource['evaluated'], 21)
+        self.assertEqual(entry.resource['actions'], {'permission.check': 20, 'permission.deny.role': 1})
+
+    def test_cached_batch_needs_no_queries(self):
+        checks = [('grade.read', r) for r in self.resources]
+        first = PermissionResolver.has_permissions(self.user, checks)
+        with self.assertNumQueries(0):
+            self.assertEqual(PermissionResolver.has_permissions(self.user, checks), first)
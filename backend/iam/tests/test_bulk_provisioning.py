@@ -0,0 +1,131 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from iam.models import Tenant, User, Role, Permission, RolePermission, RoleBinding, DelegatedGrant, AuditLog
+from iam.provisioning import BulkProvisioner, ProvisioningError
+
+
+class BulkProvisionerTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Onboard Uni')
+        self.students = [User.objects.create(tenant=self.tenant, username=f'student{i}') for i in range(30)]
+        self.lecturer = User.objects.create(tenant=self.tenant, username='lecturer')
+        self.student_role = Role.objects.create(tenant=self.tenant, name='student')
+        self.staff_role = Role.objects.create(tenant=self.tenant, name='staff')
+        self.view = Permission.objects.create(name='course.view')
+        self.grade = Permission.objects.create(name='course.grade')
+
+    def data(self):
+        expires = (timezone.now() + timezone.timedelta(days=30)).isoformat()
+        return {
+            'role_permissions': [
+                {'role': 'student', 'permission': 'course.view', 'resource_pattern': 'course:*'},
+                {'role': 'staff', 'permission': 'course.grade', 'resource_pattern': 'course:*', 'effect': 'allow'},
+            ],
+            'bindings': [
+                {'subject': u.username, 'role': 'student', 'resource_scope': 'course:CS101'} for u in self.students
+            ] + [{'subject': str(self.lecturer.id), 'role': 'staff', 'resource_scope': 'course:CS101'}],
+            'grants': [
+                {'granter': 'lecturer', 'grantee': 'student0', 'permission': 'course.grade',
+                 'resource_scope': 'course:CS101', 'expires_at': expires, 'justification': 'TA'},
+            ],
+        }
+
+    def test_imports_in_batches_with_one_invalidation(self):
+        provisioner = BulkProvisioner(self.tenant.id, batch_size=10)
+        with mock.patch('iam.provisioning.notify_invalidation') as notify, \
+                mock.patch('iam.signals.notify_invalidation') as per_row:
+            with self.captureOnCommitCallbacks(execute=True):
+                # 3 lookups, 3 duplicate checks, 1 + 4 + 1 batched inserts, the audit entry (6) and savepoints
+                with self.assertNumQueries(20):
+                    summary = provisioner.run(self.data())
+        self.assertEqual(summary['bindings'], {'created': 31, 'skipped': 0})
+        self.assertEqual(summary['grants'], {'created': 1, 'skipped': 0})
+        self.assertEqual(summary['role_permissions'], {'created': 2, 'skipped': 0})
+        notify.assert_called_once_with(self.tenant.id)
+        per_row.assert_not_called()
+        self.assertEqual(RoleBinding.objects.filter(tenant=self.tenant).count(), 31)
+        self.assertEqual(DelegatedGrant.objects.get().grantee, self.students[0])
+
+    def test_rerun_skips_existing_records(self):
+        BulkProvisioner(self.tenant.id).run(self.data())
+        summary = BulkProvisioner(self.tenant.id).run(self.data())
+        self.assertEqual({k: v['created'] for k, v in summary.items()}, {'bindings': 0, 'grants': 0, 'role_permissions': 0})
+        self.assertEqual(summary['bindings']['skipped'], 31)
+        self.assertEqual(RolePermission.objects.count(), 2)
+
+    def test_invalid_rows_abort_the_import(self):
+        data = self.data()
+        data['bindings'].append({'subject': 'nobody', 'role': 'student'})
+        data['role_permissions'].append({'role': 'dean', 'permission': 'course.view'})
+        with self.assertRaises(ProvisioningError) as ctx:
+            BulkProvisioner(self.tenant.id).run(data)
+        self.assertEqual(
+            sorted((e['kind'], e['row']) for e in ctx.exception.errors),
+            [('bindings', 32), ('role_permissions', 3)],
+        )
+        self.assertFalse(RoleBinding.objects.exists())
+        self.assertFalse(RolePermission.objects.exists())
+
+    def test_users_of_other_tenants_are_unknown(self):
+        other = Tenant.objects.create(name='Other Uni')
+        outsider = User.objects.create(tenant=other, username='outsider')
+        with self.assertRaises(ProvisioningError):
+            BulkProvisioner(self.tenant.id).run({'bindings': [{'subject': str(outsider.id), 'role': 'student'}]})
+
+    def test_command_imports_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bindings.csv')
+            with open(path, 'w') as fh:
+                fh.write('subject_type,subject,role,resource_scope,expires_at\n')
+                fh.write('user,student1,student,course:CS101,\n')
+                fh.write('user,student2,student,,2030-01-01T00:00:00\n')
+            out = StringIO()
+            call_command('provision_bulk', tenant=str(self.tenant.id), bindings=path, dry_run=True, stdout=out)
+            self.assertIn('Would import 2 records', out.getvalue())
+            self.assertFalse(RoleBinding.objects.exists())
+            call_command('provision_bulk', tenant=str(self.tenant.id), bindings=path, stdout=StringIO())
+        binding = RoleBinding.objects.get(subject_id=self.students[2].id)
+        self.assertIsNone(binding.resource_scope)
+        self.assertEqual(binding.expires_at.year, 2030)
+
+    def test_command_rejects_unknown_tenant(self):
+        with self.assertRaises(CommandError):
+            call_command('provision_bulk', tenant='not-a-uuid', bindings='x.csv', stdout=StringIO())
+
+    def test_endpoint(self):
+        admin = get_user_model().objects.create_user(username='admin', email='a@example.com', is_staff=True)
+        self.client.force_login(admin)
+        body = dict(self.data(), tenant=str(self.tenant.id))
+        response = self.client.post('/api/iam/provision/', dict(body, dry_run=True), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['bindings']['created'], 31)
+        response = self.client.post('/api/iam/provision/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(RoleBinding.objects.count(), 31)
+        self.assertEqual(AuditLog.objects.get(action='iam.bulk_provision').resource['actor'], str(admin.pk))
+        body['bindings'] = [{'subject': 'ghost', 'role': 'student'}]
+        response = self.client.post('/api/iam/provision/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['row'], 1)
+
+    def test_endpoint_rejects_malformed_json_rows(self):
+        admin = get_user_model().objects.create_user(username='admin', email='a@example.com', is_staff=True)
+        self.client.force_login(admin)
+        for body, kind, row in (
+            ({'bindings': [{'subject': 'student0', 'role': 'student', 'expires_at': 1767225600}]}, 'bindings', 1),
+            ({'grants': [{'granter': 'lecturer', 'grantee': 'student0', 'permission': 'course.grade', 'expires_at': [1]}]}, 'grants', 1),
+            ({'role_permissions': [{'role': ['student'], 'permission': 'course.view'}]}, 'role_permissions', 1),
+            ({'bindings': ['student0']}, 'bindings', 1),
+            ({'grants': 'lecturer'}, 'grants', None),
+        ):
+            response = self.client.post('/api/iam/provision/', dict(body, tenant=str(self.tenant.id)), content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+            self.assertEqual((response.json()['errors'][0]['kind'], response.json()['errors'][0]['row']), (kind, row))
+        self.assertFalse(RoleBinding.objects.exists())
@@ -0,0 +1,57 @@
+import time
+from django.core.cache import cache
+from iam.local_cache import iam_cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from iam.checks import check_shared_cache
+from iam.generations import CacheGenerations, TENANT_KEY
+from iam.models import Tenant, User, Role, Permission, RolePermission, RoleBinding
+from iam.services import PermissionResolver, notify_invalidation
+
+
+class CacheGenerationsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        iam_cache.local.clear()
+        self.tenant = Tenant.objects.create(name='Gen Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='hal')
+        self.role = Role.objects.create(tenant=self.tenant, name='reviewer')
+        self.perm = Permission.objects.create(name='grade.review')
+        RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=self.role)
+
+    def test_counters_survive_loss_monotonically(self):
+        t_gen, u_gen = CacheGenerations.get(str(self.tenant.id), str(self.user.id))
+        self.assertEqual(CacheGenerations.bump_tenant(str(self.tenant.id)), t_gen + 1)
+        cache.delete(TENANT_KEY.format(tenant=self.tenant.id))
+        time.sleep(0.001)
+        self.assertGreater(CacheGenerations.get(str(self.tenant.id), str(self.user.id))[0], t_gen + 1)
+
+    def test_tenant_invalidation_retires_cached_decisions(self):
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.review'))
+        RolePermission.objects.create(role=self.role, permission=self.perm, effect='allow')
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.review'))  # still cached
+        notify_invalidation(self.tenant.id)
+        self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.review'))
+
+    def test_user_invalidation_only_touches_that_user(self):
+        other = User.objects.create(tenant=self.tenant, username='ivy')
+        RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=other.id, role=self.role)
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.review'))
+        self.assertFalse(PermissionResolver.has_permission(other, 'grade.review'))
+        RolePermission.objects.create(role=self.role, permission=self.perm, effect='allow')
+        notify_invalidation(self.tenant.id, self.user.id)
+        self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.review'))
+        self.assertFalse(PermissionResolver.has_permission(other, 'grade.review'))
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    @override_settings(IAM_CACHE_TTL=3600, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_long_ttl_on_process_local_cache_warns(self):
+        self.assertEqual([w.id for w in check_shared_cache(None)], ['iam.W001'])
+
+    @override_settings(IAM_CACHE_TTL=60, IAM_SNAPSHOT_TTL=60, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_short_ttl_on_process_local_cache_is_fine(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(IAM_CACHE_TTL=3600, CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379'}})
+    def test_long_ttl_on_shared_cache_is_fine(self):
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from iam.generations import CacheGenerations
+from iam.local_cache import iam_cache
+from iam.models import Tenant, User, Role, Permission, RolePermission, RoleBinding, AttributePolicy, DelegatedGrant
+from iam.services import PermissionResolver
+from iam.snapshot import PermissionSnapshot
+
+
+class InvalidationSignalTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        iam_cache.local.clear()
+        self.tenant = Tenant.objects.create(name='Signal Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='kim', attrs={'dept': 'CS'})
+        self.other = User.objects.create(tenant=self.tenant, username='lee')
+        self.role = Role.objects.create(tenant=self.tenant, name='grader')
+        self.perm = Permission.objects.create(name='grade.publish')
+        with self.captureOnCommitCallbacks(execute=True):
+            RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=self.role)
+
+    def _generations(self, user):
+        return CacheGenerations.get(str(self.tenant.id), str(user.id))
+
+    def test_role_permission_change_bumps_bound_users_only(self):
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.publish'))
+        before_user, before_other = self._generations(self.user), self._generations(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            RolePermission.objects.create(role=self.role, permission=self.perm, effect='allow')
+        self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.publish'))
+        self.assertEqual(self._generations(self.user)[0], before_user[0])  # tenant untouched
+        self.assertGreater(self._generations(self.user)[1], before_user[1])
+        self.assertEqual(self._generations(self.other), before_other)
+
+    @override_settings(IAM_INVALIDATION_FANOUT=1)
+    def test_role_permission_fanout_bumps_tenant(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.other.id, role=self.role)
+        before = self._generations(self.other)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            RolePermission.objects.create(role=self.role, permission=self.perm, effect='allow')
+        self.assertGreater(self._generations(self.other)[0], before)
+
+    def test_invalidation_waits_for_commit(self):
+        before = self._generations(self.user)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            DelegatedGrant.objects.create(tenant=self.tenant, granter=self.other, grantee=self.user, permission=self.perm, expires_at=timezone.now() + timedelta(days=1))
+        self.assertEqual(self._generations(self.user), before)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.publish'))
+
+    def test_policy_and_user_attr_changes(self):
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.publish'))
+        with self.captureOnCommitCallbacks(execute=True):
+            AttributePolicy.objects.create(tenant=self.tenant, name='cs_publish', expression="user.attrs['dept'] == 'CS'")
+        self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.publish'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.attrs = {'dept': 'MATH'}
+            self.user.save()
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.publish'))
+
+    def test_saves_of_other_user_fields_keep_the_cache(self):
+        before = self._generations(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.email = 'kim@example.com'
+            self.user.save(update_fields=['email'])
+        self.assertEqual(self._generations(self.user), before)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.attrs = {'dept': 'MATH'}
+            self.user.save(update_fields=['attrs'])
+        self.assertNotEqual(self._generations(self.user), before)
+
+    def test_cache_ttl_capped_at_binding_expiry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            temp = Role.objects.create(tenant=self.tenant, name='temp')
+            RolePermission.objects.create(role=temp, permission=self.perm, effect='allow')
+            RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=temp, expires_at=timezone.now() + timedelta(minutes=5))
+        snapshot = PermissionSnapshot.build(self.tenant.id, self.user.id)
+        self.assertLessEqual(snapshot.ttl(3600), 300)
+        self.assertGreater(snapshot.ttl(3600), 250)
+
+    def test_moving_a_binding_invalidates_the_previous_subject(self):
+        RolePermission.objects.create(role=self.role, permission=self.perm, effect='allow')
+        self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.publish'))
+        binding = RoleBinding.objects.get(subject_id=self.user.id)
+        binding.subject_id = self.other.id
+        with self.captureOnCommitCallbacks(execute=True):
+            binding.save()
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.publish'))
+        self.assertTrue(PermissionResolver.has_permission(self.other, 'grade.publish'))
+
+    def test_reassigning_a_grant_invalidates_the_previous_grantee(self):
+        grant = DelegatedGrant.objects.create(
+            tenant=self.tenant, granter=self.other, grantee=self.other, permission=self.perm,
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+        self.assertTrue(PermissionResolver.has_permission(self.other, 'grade.publish'))
+        before = self._generations(self.other)
+        grant.grantee = self.user
+        with self.captureOnCommitCallbacks(execute=True):
+            grant.save()
+        self.assertGreater(self._generations(self.other)[1], before[1])
+        self.assertFalse(PermissionResolver.has_permission(self.other, 'grade.publish'))
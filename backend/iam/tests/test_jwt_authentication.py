@@ -0,0 +1,91 @@
+from django.test import TestCase, override_settings
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from iam.authentication import JWTAuthentication, TokenUser
+from iam.models import Tenant, User, Role, Permission, RolePermission, RoleBinding, RevokedToken
+from iam.services import JWTHelper, PermissionResolver
+from iam.tokens import RevocationFilter, verified_tokens
+
+
+class WhoAmIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'uid': str(request.user.id), 'tid': str(request.user.tenant_id), 'roles': request.user.roles})
+
+
+def _key_pair():
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives import serialization
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption())
+    public = key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return private, public.decode()
+
+
+PRIVATE_KEY, PUBLIC_KEY = _key_pair()
+
+
+@override_settings(IAM_PUBLIC_KEY_PEM=PUBLIC_KEY)
+class JWTAuthenticationTest(TestCase):
+    def setUp(self):
+        verified_tokens.clear()
+        RevocationFilter.reset()
+        self.tenant = Tenant.objects.create(name='Auth Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='gus', attrs={'dept': 'cs'})
+        self.factory = APIRequestFactory()
+        self.view = WhoAmIView.as_view()
+
+    def get(self, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        return self.view(self.factory.get('/whoami/', **headers))
+
+    def token(self, **kwargs):
+        return JWTHelper.create_token(PRIVATE_KEY, 'https://auth', f'user:{self.user.id}', self.tenant.id, self.user.id, roles=['proctor'], **kwargs)
+
+    def test_authenticates_from_claims_without_queries(self):
+        token = self.token()
+        self.assertEqual(self.get(token).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.get(token)
+        self.assertEqual(response.data, {'uid': str(self.user.id), 'tid': str(self.tenant.id), 'roles': ['proctor']})
+
+    def test_rejects_missing_invalid_and_revoked_tokens(self):
+        self.assertEqual(self.get().status_code, 401)
+        self.assertEqual(self.get('not-a-jwt').status_code, 401)
+        token = self.token(jti='revoked-jti')
+        RevokedToken.objects.create(jti='revoked-jti')
+        response = self.get(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+    def test_token_user_drives_permission_checks(self):
+        role = Role.objects.create(tenant=self.tenant, name='proctor')
+        perm = Permission.objects.create(name='integrity.ingest')
+        RolePermission.objects.create(role=role, permission=perm, effect='allow')
+        RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=role)
+        principal = TokenUser(JWTHelper.validate_token(self.token(), PUBLIC_KEY))
+        self.assertTrue(PermissionResolver.has_permission(principal, 'integrity.ingest'))
+        self.assertEqual(principal.db_user, self.user)
+
+
+
+class DefaultAuthView(WhoAmIView):
+    authentication_classes = APIView.authentication_classes  # settings.REST_FRAMEWORK defaults
+
+
+@override_settings(IAM_PUBLIC_KEY_PEM=PUBLIC_KEY)
+class DefaultAuthenticationTest(TestCase):
+    def test_bearer_token_authenticates_with_default_classes(self):
+        tenant = Tenant.objects.create(name='Default Auth Uni')
+        user = User.objects.create(tenant=tenant, username='hal')
+        token = JWTHelper.create_token(PRIVATE_KEY, 'https://auth', f'user:{user.id}', tenant.id, user.id)
+        view = DefaultAuthView.as_view()
+        factory = APIRequestFactory()
+        self.assertEqual(view(factory.get('/whoami/')).status_code, 403)
+        response = view(factory.get('/whoami/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['uid'], str(user.id))
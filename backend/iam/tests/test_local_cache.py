@@ -0,0 +1,95 @@
+from unittest import mock
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from iam.local_cache import LocalCache, handle_invalidation_message, iam_cache
+from iam.models import Tenant, User, Role, Permission, RolePermission, RoleBinding
+from iam.services import PermissionResolver
+
+
+class LocalCacheTest(TestCase):
+    def test_lru_bound_ttl_and_counters(self):
+        local = LocalCache(maxsize=2, ttl=60)
+        local.set('a', 1)
+        local.set('b', 2)
+        self.assertEqual(local.get('a'), 1)  # 'a' becomes most recent
+        local.set('c', 3)                    # evicts 'b'
+        self.assertIsNone(local.get('b'))
+        local.set('d', 4, timeout=0)         # not stored: expires immediately
+        stats = local.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['size']), (1, 1, 1, 2))
+
+    def test_invalidation_evicts_scope(self):
+        local = LocalCache(maxsize=10, ttl=60)
+        local.set('iam:perm:t1:5:u1:9:x', True, scope=('t1', 'u1'))
+        local.set('iam:perm:t1:5:u2:9:x', True, scope=('t1', 'u2'))
+        local.set('iam:gen:t:t1', 5, scope=('t1', None))
+        local.set('iam:perm:t2:5:u1:9:x', True, scope=('t2', 'u1'))
+        local.set('jwt:t1', True)  # unscoped entries only leave by TTL, LRU or delete
+        self.assertEqual(local.evict('t1', 'u1'), 1)
+        self.assertEqual(local.evict('t1'), 2)
+        self.assertEqual(local.evict('t1'), 0)
+        self.assertEqual(local.stats()['size'], 2)
+
+    def test_scope_index_follows_lru_and_overwrites(self):
+        local = LocalCache(maxsize=2, ttl=60)
+        local.set('a', 1, scope=('t1', 'u1'))
+        local.set('a', 2, scope=('t2', 'u1'))  # rescoped by the overwrite
+        local.set('b', 3, scope=('t1', 'u1'))
+        local.set('c', 4, scope=('t1', 'u2'))  # pushes 'a' out
+        self.assertEqual(local.evict('t2'), 0)
+        self.assertEqual(local.evict('t1'), 2)
+        self.assertEqual(local._scopes, {})
+
+    def test_listener_runs_once_per_process(self):
+        from iam import local_cache
+        thread = mock.Mock()
+        with mock.patch.object(local_cache, '_listener', None), \
+                mock.patch.object(local_cache, 'start_invalidation_listener', return_value=thread) as start:
+            thread.is_alive.return_value = True
+            local_cache.ensure_invalidation_listener()
+            local_cache.ensure_invalidation_listener()
+            self.assertEqual(start.call_count, 1)
+            # After a fork the inherited thread is not alive in the child, which starts its own
+            thread.is_alive.return_value = False
+            local_cache.ensure_invalidation_listener()
+            self.assertEqual(start.call_count, 2)
+
+
+class TieredPermissionCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        iam_cache.local.clear()
+        self.tenant = Tenant.objects.create(name='Tier Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='jo')
+        role = Role.objects.create(tenant=self.tenant, name='viewer')
+        perm = Permission.objects.create(name='exam.view')
+        RolePermission.objects.create(role=role, permission=perm, effect='allow')
+        RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=role)
+
+    def test_repeat_decision_served_from_process(self):
+        self.assertTrue(PermissionResolver.has_permission(self.user, 'exam.view'))
+        with patch('iam.local_cache.cache') as shared:
+            self.assertTrue(PermissionResolver.has_permission(self.user, 'exam.view'))
+        shared.get.assert_not_called()
+        shared.get_many.assert_not_called()
+
+    def test_pubsub_message_evicts_local_tier(self):
+        PermissionResolver.has_permission(self.user, 'exam.view')
+        self.assertGreater(handle_invalidation_message(f"{self.tenant.id}:{self.user.id}"), 0)
+        with patch('iam.local_cache.cache') as shared:
+            shared.get_many.return_value = {}
+            shared.get.return_value = None
+            iam_cache.get_many([f'iam:gen:u:{self.tenant.id}:{self.user.id}'])
+        shared.get_many.assert_called_once()
+
+    def test_stats_endpoint(self):
+        url = reverse('iam:iam-cache-stats')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        get_user_model().objects.create_superuser('cacheadmin', 'cache@example.com', 'pass')
+        self.client.login(username='cacheadmin', password='pass')
+        body = self.client.get(url).json()
+        self.assertIn('evictions', body['local'])
+        self.assertIn('hits', body['shared'])
@@ -0,0 +1,162 @@
+import io
+import json
+import re
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from django.conf import settings
+from django.core.cache import cache
+from iam.local_cache import iam_cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from iam.local_policies import LocalPolicyRegistry, check_parity
+from iam.models import Tenant, TenantPolicy, User, AttributePolicy
+from iam.opa_client import OPAClient
+from iam.rego import RegoTranslationError, translate
+from iam.services import PermissionResolver
+
+EXAM_POLICY = '''package tenant.exam
+import rego.v1
+
+default allow := false
+
+allow if {
+    input.user.attrs.role == "proctor"
+    not input.resource.locked
+}
+
+allow if is_admin
+
+is_admin if input.user.attrs.level >= 3
+
+deny = true if eq(input["permission"], "grade.delete")
+'''
+
+PATHS = ['tenant/exam/allow', 'tenant/exam/deny', 'tenant/exam/is_admin']
+
+# Decisions as OPA returns them for EXAM_POLICY (None = undefined)
+RECORDED = [
+    ({'user': {'attrs': {'role': 'proctor'}}, 'resource': {}, 'permission': 'exam.monitor'},
+     {'tenant/exam/allow': True, 'tenant/exam/deny': None, 'tenant/exam/is_admin': None}),
+    ({'user': {'attrs': {'role': 'proctor', 'level': 1}}, 'resource': {'locked': True}, 'permission': 'exam.monitor'},
+     {'tenant/exam/allow': False, 'tenant/exam/deny': None, 'tenant/exam/is_admin': None}),
+    ({'user': {'attrs': {'level': 5}}, 'resource': {}, 'permission': 'grade.delete'},
+     {'tenant/exam/allow': True, 'tenant/exam/deny': True, 'tenant/exam/is_admin': True}),
+    # strings sort after numbers in Rego, so "high" >= 3 holds
+    ({'user': {'attrs': {'level': 'high'}}, 'resource': {}, 'permission': 'grade.read'},
+     {'tenant/exam/allow': True, 'tenant/exam/deny': None, 'tenant/exam/is_admin': True}),
+]
+
+
+class _StubOPAHandler(BaseHTTPRequestHandler):
+    """Answers /v1/data and batched /v1/query requests from RECORDED decisions."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        decisions = next(d for i, d in RECORDED if i == body['input'])
+        if self.path == '/v1/query':
+            paths = re.findall(r'(p\d+) := \[v \| v := data((?:\["[^"]+"\])+)\]', body['query'])
+            bindings = {}
+            for var, ref in paths:
+                value = decisions['/'.join(json.loads(f'[{ref[1:-1].replace("][", ",")}]'))]
+                bindings[var] = [] if value is None else [value]
+            payload = {'result': [bindings]}
+        else:
+            value = decisions[self.path[len('/v1/data/'):]]
+            payload = {} if value is None else {'result': value}
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class RegoTranslatorTest(TestCase):
+    def test_translates_supported_subset(self):
+        ir = translate(EXAM_POLICY)
+        self.assertEqual(ir['package'], ['tenant', 'exam'])
+        self.assertEqual(set(ir['rules']), {'allow', 'is_admin', 'deny'})
+        self.assertEqual(len(ir['rules']['allow']['definitions']), 2)
+
+    def test_rejects_unsupported_rego(self):
+        for source in [
+            'package x\nallow if { some i; input.roles[i] == "admin" }',
+            'package x\nallow if data.other.allow',
+            'package x\nallow if count(input.roles) > 1',
+            'package x\nallow if missing_rule',
+            'package x\na if b\nb if a',
+        ]:
+            with self.assertRaises(RegoTranslationError, msg=source):
+                translate(source)
+
+
+class LocalPolicyModeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        iam_cache.local.clear()
+        OPAClient.reset()
+        LocalPolicyRegistry.invalidate()
+        self.tenant = Tenant.objects.create(name='Local Policy Uni')
+        self.policy = TenantPolicy.objects.create(tenant=self.tenant, name='exam', rego=EXAM_POLICY, mode='local')
+
+    def test_deploy_compiles_local_policies_without_opa(self):
+        with override_settings(OPA_URL=None):
+            call_command('deploy_opa_policies', stdout=io.StringIO(), stderr=io.StringIO())
+        self.policy.refresh_from_db()
+        self.assertEqual(self.policy.last_deploy_status, 'ok')
+        self.assertEqual(self.policy.compiled_ir['package'], ['tenant', 'exam'])
+
+    @override_settings(OPA_URL='http://opa.invalid')
+    def test_opa_attribute_policies_evaluated_in_process(self):
+        call_command('deploy_opa_policies', stdout=io.StringIO(), stderr=io.StringIO())
+        user = User.objects.create(tenant=self.tenant, username='gina', attrs={'role': 'proctor'})
+        AttributePolicy.objects.create(tenant=self.tenant, name='exam_allow', policy_type='opa', expression='tenant/exam/allow')
+        with patch.object(OPAClient, '_get_session') as session:
+            self.assertTrue(PermissionResolver.has_permission(user, 'exam.monitor', resource={'id': 'exam:1'}))
+            self.assertFalse(PermissionResolver.has_permission(user, 'exam.monitor', resource={'id': 'exam:2', 'locked': True}))
+        session.assert_not_called()
+
+    def test_deploys_by_other_processes_are_picked_up(self):
+        from iam.generations import CacheGenerations
+        from iam.local_cache import handle_invalidation_message
+        path, allowed = 'tenant/exam/allow', {'user': {'attrs': {'level': 3}}, 'resource': {}}
+        self.assertIsNone(LocalPolicyRegistry.evaluate(self.tenant.id, path, allowed))  # nothing compiled yet
+        # Another process compiles the policy: the row changes without signals here, the generation moves on
+        TenantPolicy.objects.filter(pk=self.policy.pk).update(compiled_ir=translate(EXAM_POLICY))
+        CacheGenerations.bump_tenant(self.tenant.id)
+        iam_cache.local.clear()
+        self.assertTrue(LocalPolicyRegistry.evaluate(self.tenant.id, path, allowed))
+
+        TenantPolicy.objects.filter(pk=self.policy.pk).update(compiled_ir=None)
+        handle_invalidation_message(str(self.tenant.id))
+        self.assertIsNone(LocalPolicyRegistry.evaluate(self.tenant.id, path, allowed))
+
+    def test_parity_with_stub_opa(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _StubOPAHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        call_command('deploy_opa_policies', stdout=io.StringIO(), stderr=io.StringIO())
+        with override_settings(OPA_URL=f'http://127.0.0.1:{server.server_port}', OPA_DECISION_TTL=0):
+            inputs = [i for i, _ in RECORDED]
+            self.assertEqual(check_parity(self.tenant.id, PATHS, inputs), [])
+            self.assertEqual(check_parity(self.tenant.id, PATHS[:1], inputs), [])
+
+
+@unittest.skipUnless(settings.OPA_URL, 'OPA_URL not configured')
+class LocalPolicyOPAParityTest(TestCase):
+    def test_parity_with_real_opa(self):
+        OPAClient.reset()
+        tenant = Tenant.objects.create(name='Parity Uni')
+        policy = TenantPolicy.objects.create(tenant=tenant, name='exam', rego=EXAM_POLICY, mode='local')
+        from iam.local_policies import deploy_local_policy
+        deploy_local_policy(policy)
+        OPAClient.push_policy('parity_exam', EXAM_POLICY)
+        with override_settings(OPA_DECISION_TTL=0):
+            self.assertEqual(check_parity(tenant.id, PATHS, [i for i, _ in RECORDED]), [])
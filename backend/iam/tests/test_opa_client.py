@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock, patch
+from django.core.cache import cache
+from iam.local_cache import iam_cache
+from django.test import TestCase, override_settings
+from iam.models import Tenant, User, AttributePolicy
+from iam.opa_client import OPAClient
+from iam.services import PermissionResolver
+
+
+def _response(status=200, body=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.json.return_value = body
+    return resp
+
+
+@override_settings(OPA_URL='http://opa.test', OPA_BREAKER_THRESHOLD=2, OPA_BREAKER_COOLDOWN=60, OPA_DECISION_TTL=30)
+class OPAClientTest(TestCase):
+    def setUp(self):
+        OPAClient.reset()
+        self.session = MagicMock()
+        patcher = patch.object(OPAClient, '_get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(OPAClient.reset)
+
+    def test_batch_evaluates_paths_in_one_request(self):
+        self.session.post.return_value = _response(body={'result': [{'p0': [True], 'p1': [], 'p2': [{'allow': False}]}]})
+        result = OPAClient.evaluate_many(['a/allow', 'b/allow', 'c/rules'], {'user': {}})
+        self.assertEqual(result, {'a/allow': True, 'b/allow': False, 'c/rules': False})
+        self.assertEqual(self.session.post.call_count, 1)
+        url, = self.session.post.call_args[0]
+        self.assertTrue(url.endswith('/v1/query'))
+        self.assertIn('data["a"]["allow"]', self.session.post.call_args[1]['json']['query'])
+
+    def test_decisions_cached_on_normalized_input(self):
+        self.session.post.return_value = _response(body={'result': True})
+        self.assertTrue(OPAClient.evaluate('a/allow', {'user': {'x': 1, 'y': 2}}))
+        self.assertTrue(OPAClient.evaluate('a/allow', {'user': {'y': 2, 'x': 1}}))
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_circuit_breaker_fails_fast(self):
+        self.session.post.side_effect = ConnectionError('down')
+        for i in range(5):
+            self.assertFalse(OPAClient.evaluate('a/allow', {'n': i}))
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def test_resolver_batches_opa_policies(self):
+        cache.clear()
+        iam_cache.local.clear()
+        tenant = Tenant.objects.create(name='OPA Batch Uni')
+        user = User.objects.create(tenant=tenant, username='frank')
+        AttributePolicy.objects.create(tenant=tenant, name='one', policy_type='opa', expression='t/one/allow')
+        AttributePolicy.objects.create(tenant=tenant, name='two', policy_type='opa', expression='t/two/allow')
+        self.session.post.return_value = _response(body={'result': [{'p0': [False], 'p1': [True]}]})
+        self.assertTrue(PermissionResolver.has_permission(user, 'grade.read', resource={}))
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_unavailable_opa_fails_closed_and_is_not_cached(self):
+        from iam.models import Permission, Role, RoleBinding, RolePermission
+        cache.clear()
+        iam_cache.local.clear()
+        tenant = Tenant.objects.create(name='OPA Down Uni')
+        user = User.objects.create(tenant=tenant, username='gina')
+        role = Role.objects.create(tenant=tenant, name='grader')
+        RolePermission.objects.create(role=role, permission=Permission.objects.create(name='grade.write'))
+        RoleBinding.objects.create(tenant=tenant, subject_type='user', subject_id=user.id, role=role)
+        AttributePolicy.objects.create(tenant=tenant, name='block', policy_type='opa', expression='t/block/deny', effect='deny')
+
+        self.session.post.side_effect = ConnectionError('down')
+        self.assertIsNone(OPAClient.evaluate_many(['t/block/deny'], {})['t/block/deny'])
+        self.assertFalse(PermissionResolver.has_permission(user, 'grade.write', resource={}))
+        self.assertEqual(PermissionResolver.has_permissions(user, [('grade.write', {})]), [False])
+
+        # Once OPA answers, the deny policy is evaluated instead of the cached fail-closed outcome
+        OPAClient.reset()
+        self.session.post.side_effect = None
+        self.session.post.return_value = _response(body={'result': False})
+        self.assertTrue(PermissionResolver.has_permission(user, 'grade.write', resource={}))
+        self.assertEqual(PermissionResolver.has_permissions(user, [('grade.write', {})]), [True])
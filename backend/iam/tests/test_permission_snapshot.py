@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from iam.local_cache import iam_cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from iam.models import Tenant, User, Role, Permission, RolePermission, RoleBinding, AttributePolicy, EmergencyAccess
+from iam.services import PermissionResolver
+from iam.snapshot import PermissionSnapshot
+
+
+class PermissionSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        iam_cache.local.clear()
+        self.tenant = Tenant.objects.create(name='Snapshot Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='bob', attrs={'dept': 'CS'})
+        self.role = Role.objects.create(tenant=self.tenant, name='instructor')
+        self.read = Permission.objects.create(name='grade.read')
+        self.write = Permission.objects.create(name='grade.write')
+        RolePermission.objects.create(role=self.role, permission=self.read, resource_pattern='course:*', effect='allow')
+        RolePermission.objects.create(role=self.role, permission=self.write, effect='allow')
+        RolePermission.objects.create(role=self.role, permission=self.write, resource_pattern='course:999', effect='deny')
+        RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=self.role)
+
+    def test_snapshot_groups_entries_by_permission(self):
+        snapshot = PermissionSnapshot.build(self.tenant.id, self.user.id)
+        self.assertEqual(len(snapshot.entries['grade.read']), 1)
+        self.assertEqual(sorted(e[0] for e in snapshot.entries['grade.write']), ['allow', 'deny'])
+
+    def test_role_permissions_loaded_once_per_user(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.read', resource={'id': 'course:101'}))
+            self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.write', resource={'id': 'course:101'}))
+            self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.write', resource={'id': 'course:999'}))
+            self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.read', resource={'id': 'exam:1'}))
+        role_queries = [q for q in ctx.captured_queries if 'iam_rolepermission' in q['sql']]
+        self.assertEqual(len(role_queries), 1)
+
+    def test_expired_binding_ignored(self):
+        other = Role.objects.create(tenant=self.tenant, name='former')
+        perm = Permission.objects.create(name='assessment.delete')
+        RolePermission.objects.create(role=other, permission=perm, effect='allow')
+        RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=other, expires_at=timezone.now() - timedelta(hours=1))
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'assessment.delete'))
+
+    def test_attribute_policy_deny_and_emergency_allow(self):
+        AttributePolicy.objects.create(tenant=self.tenant, name='no_cs_reads', expression="user['attrs']['dept'] == 'CS'", effect='deny')
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.read', resource={'id': 'course:101'}))
+
+        EmergencyAccess.objects.create(tenant=self.tenant, requester=self.user, permission=self.read, justification='incident', expires_at=timezone.now() + timedelta(hours=1))
+        PermissionSnapshot.invalidate(self.tenant.id, self.user.id)
+        self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.read', resource={'id': 'course:202'}))
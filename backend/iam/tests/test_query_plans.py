@@ -0,0 +1,57 @@
+import re
+import uuid
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from exam_integrity.models import Evidence
+from grade_integrity.models import GradeRecord
+from iam.audit import AuditWriter
+from iam.models import Tenant, User, Role, Permission, RolePermission, RoleBinding, AuditLog, ExamSession
+from iam.snapshot import PermissionSnapshot
+
+# SQLite reports full scans as 'SCAN <table>' (also for full index scans); PostgreSQL as 'Seq Scan'
+FULL_SCAN = re.compile(r'\bSCAN\b|Seq Scan')
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'plan format is backend specific')
+class HotQueryPlanTest(TestCase):
+    """EXPLAIN the hot-path lookups and fail when any of them needs a full table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants = [Tenant.objects.create(name=f'Plan Uni {i}') for i in range(3)]
+        perm = Permission.objects.create(name='grade.read')
+        cls.users = []
+        for tenant in cls.tenants:
+            role = Role.objects.create(tenant=tenant, name='marker')
+            RolePermission.objects.create(role=role, permission=perm, resource_pattern='course:*', effect='allow')
+            for i in range(20):
+                user = User.objects.create(tenant=tenant, username=f'{tenant.name}-{i}')
+                RoleBinding.objects.create(tenant=tenant, subject_type='user', subject_id=user.id, role=role)
+                cls.users.append(user)
+            AuditWriter.write_batch([(tenant.id, None, 'permission.check', {'n': i}, timezone.now()) for i in range(50)])
+
+    def assertNoFullScan(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Tiny tables would be seq scanned anyway; with seq scans disabled one only remains without an index
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIsNone(FULL_SCAN.search(plan), f'{queryset.model.__name__} query does a full scan:\n{plan}')
+
+    def test_snapshot_role_lookup(self):
+        user = self.users[7]
+        self.assertNoFullScan(PermissionSnapshot.role_rows(user.tenant_id, user.id, timezone.now()))
+
+    def test_audit_chain_tail(self):
+        self.assertNoFullScan(AuditLog.objects.filter(tenant_id=self.tenants[1].id).order_by('-id').values_list('hash', flat=True)[:1])
+
+    def test_final_grade_lookup(self):
+        self.assertNoFullScan(GradeRecord.objects.filter(attempt_id=uuid.uuid4(), is_final=True))
+
+    def test_session_ingestion_lookup(self):
+        self.assertNoFullScan(ExamSession.objects.filter(proctoring_session_id='session-42'))
+
+    def test_evidence_cleanup(self):
+        self.assertNoFullScan(Evidence.objects.filter(tenant=self.tenants[0], retention_until__lt=timezone.now(), auto_delete=True))
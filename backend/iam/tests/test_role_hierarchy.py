@@ -0,0 +1,143 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from iam.hierarchy import RoleHierarchy
+from iam.local_cache import iam_cache
+from iam.models import Tenant, User, Role, Permission, RolePermission, RoleBinding, RoleClosure, RoleInheritance
+from iam.services import PermissionResolver
+from iam.snapshot import PermissionSnapshot
+
+
+class RoleHierarchyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        iam_cache.local.clear()
+        self.tenant = Tenant.objects.create(name='Hierarchy Uni')
+        self.roles = {name: Role.objects.create(tenant=self.tenant, name=name) for name in ('dean', 'head', 'lecturer', 'marker', 'viewer')}
+        self.user = User.objects.create(tenant=self.tenant, username='dana')
+
+    def include(self, role, includes):
+        return RoleInheritance.objects.create(role=self.roles[role], includes=self.roles[includes])
+
+    def closure(self):
+        names = {r.id: name for name, r in self.roles.items()}
+        return {
+            (names[a], names[d]): depth
+            for a, d, depth in RoleClosure.objects.filter(ancestor__tenant=self.tenant).values_list('ancestor_id', 'descendant_id', 'depth')
+            if a != d
+        }
+
+    def test_new_roles_include_themselves(self):
+        self.assertEqual(RoleClosure.objects.filter(ancestor_id=self.roles['dean'].id).get().descendant_id, self.roles['dean'].id)
+
+    def test_links_are_closed_transitively_with_shortest_depth(self):
+        self.include('dean', 'head')
+        self.include('lecturer', 'marker')
+        self.include('head', 'lecturer')  # joins the two chains
+        self.include('marker', 'viewer')
+        self.assertEqual(self.closure(), {
+            ('dean', 'head'): 1, ('dean', 'lecturer'): 2, ('dean', 'marker'): 3, ('dean', 'viewer'): 4,
+            ('head', 'lecturer'): 1, ('head', 'marker'): 2, ('head', 'viewer'): 3,
+            ('lecturer', 'marker'): 1, ('lecturer', 'viewer'): 2, ('marker', 'viewer'): 1,
+        })
+        self.include('dean', 'viewer')
+        self.assertEqual(self.closure()[('dean', 'viewer')], 1)
+
+    def test_unlink_keeps_pairs_reachable_another_way(self):
+        self.include('dean', 'head')
+        self.include('head', 'marker')
+        self.include('dean', 'lecturer')
+        link = self.include('lecturer', 'marker')
+        self.roles['head'].inherits.get().delete()
+        self.assertEqual(self.closure(), {('dean', 'head'): 1, ('dean', 'lecturer'): 1, ('dean', 'marker'): 2, ('lecturer', 'marker'): 1})
+        link.delete()
+        self.assertEqual(self.closure(), {('dean', 'head'): 1, ('dean', 'lecturer'): 1})
+
+    def test_deleting_a_middle_role_detaches_its_descendants(self):
+        self.include('dean', 'head')
+        self.include('head', 'marker')
+        self.roles.pop('head').delete()
+        self.assertEqual(self.closure(), {})
+        self.assertEqual(RoleClosure.objects.filter(ancestor__tenant=self.tenant).count(), 4)
+
+    def test_cycles_and_cross_tenant_links_are_rejected(self):
+        self.include('dean', 'head')
+        self.include('head', 'marker')
+        with self.assertRaises(ValidationError):
+            self.include('marker', 'dean')
+        with self.assertRaises(ValidationError):
+            self.include('marker', 'marker')
+        other = Role.objects.create(tenant=Tenant.objects.create(name='Other'), name='dean')
+        with self.assertRaises(ValidationError):
+            RoleInheritance.objects.create(role=self.roles['dean'], includes=other)
+
+    def test_rebuild_repairs_the_closure(self):
+        self.include('dean', 'head')
+        self.include('head', 'marker')
+        expected = self.closure()
+        RoleClosure.objects.filter(ancestor_id=self.roles['dean'].id).delete()
+        RoleHierarchy.rebuild(self.tenant.id)
+        self.assertEqual(self.closure(), expected)
+
+    def test_fixture_loaded_roles_include_themselves(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fixture:
+            json.dump([{'model': 'iam.role', 'pk': '5f0c1d7e-3b8a-4a52-9d2e-6b1f2c3d4e5f', 'fields': {
+                'tenant': str(self.tenant.id), 'name': 'auditor', 'created_at': '2026-01-01T00:00:00Z',
+            }}], fixture)
+            fixture.flush()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('loaddata', fixture.name, verbosity=0)
+        self.assertTrue(RoleClosure.objects.filter(
+            ancestor_id='5f0c1d7e-3b8a-4a52-9d2e-6b1f2c3d4e5f', descendant_id='5f0c1d7e-3b8a-4a52-9d2e-6b1f2c3d4e5f', depth=0
+        ).exists())
+
+    def test_rebuild_command_closes_bulk_inserted_roles(self):
+        proctor, invigilator = Role.objects.bulk_create([
+            Role(tenant=self.tenant, name='proctor'), Role(tenant=self.tenant, name='invigilator')
+        ])
+        RoleInheritance.objects.bulk_create([RoleInheritance(role=proctor, includes=invigilator)])
+        self.assertFalse(RoleClosure.objects.filter(ancestor=proctor).exists())
+        call_command('rebuild_role_closure', tenant=str(self.tenant.id), stdout=StringIO())
+        self.assertEqual(
+            dict(RoleClosure.objects.filter(ancestor=proctor).values_list('descendant_id', 'depth')),
+            {proctor.id: 0, invigilator.id: 1},
+        )
+
+    def test_inherited_permissions_resolve_in_one_query(self):
+        grade = Permission.objects.create(name='grade.write')
+        view = Permission.objects.create(name='course.view')
+        RolePermission.objects.create(role=self.roles['marker'], permission=grade)
+        RolePermission.objects.create(role=self.roles['viewer'], permission=view)
+        self.include('dean', 'head')
+        self.include('head', 'marker')
+        self.include('marker', 'viewer')
+        RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=self.roles['dean'], resource_scope='course:1')
+        with self.assertNumQueries(1):
+            rows = list(PermissionSnapshot.role_rows(self.tenant.id, self.user.id, self.user.created_at))
+        # Entries name the bound role for the audit trail
+        self.assertEqual(sorted((r[0], r[4]) for r in rows), [('course.view', 'dean'), ('grade.write', 'dean')])
+        self.assertTrue(PermissionResolver.has_permission(self.user, 'grade.write', resource={'id': 'course:1'}))
+        self.assertFalse(PermissionResolver.has_permission(self.user, 'grade.write', resource={'id': 'course:2'}))
+
+    def test_hierarchy_changes_invalidate_the_tenant(self):
+        with mock.patch('iam.signals.notify_invalidation') as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                link = self.include('dean', 'head')
+            notify.assert_called_once_with(self.tenant.id, None)
+            notify.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                link.delete()
+            notify.assert_called_once_with(self.tenant.id, None)
+
+    def test_role_permission_change_invalidates_holders_of_including_roles(self):
+        self.include('dean', 'marker')
+        RoleBinding.objects.create(tenant=self.tenant, subject_type='user', subject_id=self.user.id, role=self.roles['dean'])
+        with mock.patch('iam.signals.notify_invalidation') as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                RolePermission.objects.create(role=self.roles['marker'], permission=Permission.objects.create(name='x.y'))
+        notify.assert_called_once_with(self.tenant.id, self.user.id)
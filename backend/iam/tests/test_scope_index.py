@@ -0,0 +1,50 @@
+import random
+from datetime import timedelta
+from django.test import SimpleTestCase
+from django.utils import timezone
+from iam.services import PermissionResolver
+from iam.snapshot import PermissionSnapshot, ScopeIndex
+
+
+class ScopeIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_agrees_with_match_scope(self):
+        rng = random.Random(50)
+        patterns = [None, '', 'course:*', 'course:1*', 'course:1', 'course:12', 'exam:*', ':*', 'course', 'course:1:*']
+        scopes = [None, '', 'course:1', 'course:12', 'exam:7', 'course:*']
+        resources = [None, {}, {'id': None}, {'id': ''}, {'id': 'course:1'}, {'id': 'course:12'}, {'id': 'course:123'},
+                     {'id': 'course'}, {'id': 'courses:1'}, {'id': 'exam:7'}, {'id': 'course:1:x'}, {'name': 'x'}]
+        for _ in range(300):
+            entries = [('allow', rng.choice(patterns), rng.choice(scopes), f'r{i}', None) for i in range(rng.randint(1, 6))]
+            index = ScopeIndex(entries)
+            for resource in resources:
+                expected = any(PermissionResolver._match_scope(p, resource, s) for _, p, s, _, _ in entries)
+                self.assertEqual(index.match(resource, self.now) is not None, expected, (entries, resource))
+
+    def test_reports_a_live_matching_role(self):
+        past, future = self.now - timedelta(minutes=1), self.now + timedelta(minutes=1)
+        index = ScopeIndex([
+            ('deny', 'course:*', None, 'expired', past),
+            ('deny', 'course:9', None, 'lapsed', past),
+            ('deny', None, 'course:9', 'marker', future),
+        ])
+        self.assertEqual(index.match({'id': 'course:9'}, self.now), 'marker')
+        self.assertIsNone(index.match({'id': 'course:8'}, self.now))
+        self.assertEqual(index.match({'id': 'course:8'}, past - timedelta(seconds=1)), 'expired')
+
+    def test_many_scoped_bindings(self):
+        # A teaching assistant bound in 500 course scopes
+        entries = {'grade.write': [('allow', f'course:{i}:*', f'course:{i}', 'ta', None) for i in range(500)]}
+        entries['grade.write'].append(('deny', None, 'course:250:final', 'ta', None))
+        snapshot = PermissionSnapshot(None, None, entries, {}, {}, {})
+        self.assertEqual(snapshot.matching_role('grade.write', 'allow', {'id': 'course:499:quiz'}, self.now), 'ta')
+        self.assertIsNone(snapshot.matching_role('grade.write', 'allow', {'id': 'course:x:quiz'}, self.now))
+        self.assertEqual(snapshot.matching_role('grade.write', 'deny', {'id': 'course:250:final'}, self.now), 'ta')
+        self.assertIsNone(snapshot.matching_role('grade.read', 'allow', {'id': 'course:1:quiz'}, self.now))
+
+    def test_snapshot_cached_without_index(self):
+        snapshot = PermissionSnapshot(None, None, {'p': [('allow', 'x:*', None, 'r', None)]}, {}, {}, {})
+        del snapshot.scopes
+        self.assertEqual(snapshot.matching_role('p', 'allow', {'id': 'x:1'}, self.now), 'r')
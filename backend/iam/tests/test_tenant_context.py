@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from assessment_core.models import Institution
+from exam_integrity.models import RiskRule
+from iam.context import get_current_tenant_id, tenant_context
+from iam.models import Tenant
+
+
+class TenantContextTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Ctx Uni')
+        self.other = Tenant.objects.create(name='Other Uni')
+        self.institution = Institution.objects.create(name='Ctx Uni', code='CTX', tenant=self.tenant)
+        self.user = get_user_model().objects.create_user(
+            username='ctxuser', email='ctx@example.com', institution_id=self.institution.id
+        )
+        for tenant in (self.tenant, self.other):
+            RiskRule.all_tenants.create(tenant=tenant, name=f'rule {tenant.name}', rule_type='threshold')
+
+    def test_manager_is_unscoped_outside_a_context(self):
+        self.assertIsNone(get_current_tenant_id())
+        self.assertEqual(RiskRule.objects.count(), 2)
+
+    def test_manager_scopes_to_the_active_tenant(self):
+        with tenant_context(self.tenant.id):
+            self.assertEqual(list(RiskRule.objects.values_list('tenant_id', flat=True)), [self.tenant.id])
+            self.assertEqual(RiskRule.all_tenants.count(), 2)
+        with tenant_context(unrestricted=True):
+            self.assertEqual(RiskRule.objects.count(), 2)
+        with tenant_context():
+            self.assertEqual(RiskRule.objects.count(), 0)
+
+    def test_request_lists_only_its_tenant(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/exam-integrity/risk-rules/')
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        rows = rows.get('results', rows) if isinstance(rows, dict) else rows
+        self.assertEqual([r['name'] for r in rows], ['rule Ctx Uni'])
+
+    def test_tenant_is_resolved_once_per_session(self):
+        self.client.force_login(self.user)
+        self.client.get('/api/exam-integrity/risk-rules/')
+        with self.assertNumQueries(3):  # session, user, risk rules (no tenant or institution lookups)
+            self.client.get('/api/exam-integrity/risk-rules/')
+
+    def test_request_without_tenant_is_forbidden_to_write(self):
+        user = get_user_model().objects.create_user(username='loose', email='loose@example.com')
+        self.client.force_login(user)
+        response = self.client.get('/api/exam-integrity/risk-rules/')
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual(len(rows.get('results', rows) if isinstance(rows, dict) else rows), 0)
+        response = self.client.post('/api/exam-integrity/evidence/cleanup_expired/')
+        self.assertEqual(response.status_code, 403)
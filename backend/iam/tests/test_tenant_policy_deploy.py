@@ -1,21 +1,52 @@
-from django.test import TestCase
+import io
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from unittest.mock import patch
 from iam.models import Tenant, TenantPolicy
+from iam.opa_client import OPAClient
 
 
+@override_settings(OPA_URL='http://opa.invalid')
 class TenantPolicyDeployTest(TestCase):
 
-    @patch('iam.management.commands.deploy_opa_policies.OPAClient')
-    def test_deploy_command_pushes_policies(self, mock_opa_client):
+    @patch.object(OPAClient, 'push_policy')
+    def test_deploy_command_pushes_policies(self, push_policy):
         t = Tenant.objects.create(name='Test T')
         TenantPolicy.objects.create(tenant=t, name='policy1', rego='package x\nallow = true')
 
         # Run command
-        from django.core.management import call_command
         call_command('deploy_opa_policies')
 
         # Ensure push_policy called with expected path and source
-        mock_opa_client.push_policy.assert_called()
-        args, kwargs = mock_opa_client.push_policy.call_args
+        push_policy.assert_called()
+        args, kwargs = push_policy.call_args
         self.assertIn('policy1', args[0])
         self.assertIn('package x', args[1])
+
+    @patch.object(OPAClient, 'push_policy')
+    def test_untranslatable_local_policy_is_pushed_to_opa(self, push_policy):
+        t = Tenant.objects.create(name='Test T')
+        policy = TenantPolicy.objects.create(
+            tenant=t, name='counting', mode='local', rego='package x\nallow if count(input.roles) > 1',
+        )
+        out = io.StringIO()
+        call_command('deploy_opa_policies', stdout=out)
+
+        push_policy.assert_called_once()
+        self.assertIn('counting', push_policy.call_args[0][0])
+        policy.refresh_from_db()
+        self.assertIsNone(policy.compiled_ir)
+        self.assertEqual(policy.last_deploy_status, 'remote: untranslatable')
+        self.assertIsNotNone(policy.last_deployed_at)
+        self.assertIn('not translatable', out.getvalue())
+
+    @override_settings(OPA_URL=None)
+    def test_untranslatable_local_policy_without_opa_keeps_the_error(self):
+        t = Tenant.objects.create(name='Test T')
+        policy = TenantPolicy.objects.create(
+            tenant=t, name='counting', mode='local', rego='package x\nallow if count(input.roles) > 1',
+        )
+        call_command('deploy_opa_policies', stdout=io.StringIO(), stderr=io.StringIO())
+        policy.refresh_from_db()
+        self.assertTrue(policy.last_deploy_status.startswith('error: '))
+        self.assertNotIn('OPA_URL', policy.last_deploy_status)
@@ -0,0 +1,92 @@
+import time
+from unittest import mock
+from django.test import TestCase
+from iam.local_cache import handle_invalidation_message
+from iam.models import Tenant, User, RevokedToken
+from iam.services import JWTHelper
+from iam.tokens import RevocationFilter, TokenKeys, verified_tokens
+
+
+class TokenCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.hazmat.primitives import serialization
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.private_key = key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        cls.public_key = key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+
+    def setUp(self):
+        verified_tokens.clear()
+        RevocationFilter.reset()
+        self.tenant = Tenant.objects.create(name='Token Uni')
+        self.user = User.objects.create(tenant=self.tenant, username='fay')
+
+    def token(self, jti, exp_seconds=900):
+        return JWTHelper.create_token(self.private_key, 'https://auth', f'user:{self.user.id}', self.tenant.id, self.user.id, jti=jti, exp_seconds=exp_seconds)
+
+    def test_signature_verified_once_and_no_queries_when_not_revoked(self):
+        token = self.token('jti-ok')
+        with mock.patch.object(JWTHelper.jwt, 'decode', wraps=JWTHelper.jwt.decode) as decode:
+            JWTHelper.validate_token(token, self.public_key)
+            with self.assertNumQueries(0):
+                payload = JWTHelper.validate_token(token, self.public_key)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(payload['jti'], 'jti-ok')
+        self.assertIs(TokenKeys.load(self.public_key)[0], TokenKeys.load(self.public_key.decode())[0])
+
+    def test_revocation_after_caching_is_enforced(self):
+        token = self.token('jti-revoke')
+        JWTHelper.validate_token(token, self.public_key)
+        RevokedToken.objects.create(jti='jti-revoke')
+        with self.assertRaisesMessage(Exception, 'token_revoked'):
+            JWTHelper.validate_token(token, self.public_key)
+
+    def test_filter_is_rebuilt_from_table_and_updated_by_messages(self):
+        RevokedToken.objects.create(jti='jti-old')
+        RevocationFilter.reset()
+        self.assertTrue(RevocationFilter.might_contain('jti-old'))
+        self.assertFalse(RevocationFilter.might_contain('jti-remote'))
+        handle_invalidation_message('revoked:jti-remote')
+        self.assertTrue(RevocationFilter.might_contain('jti-remote'))
+
+        # A probable hit without a row is a false positive: the table decides
+        token = self.token('jti-remote')
+        self.assertEqual(JWTHelper.validate_token(token, self.public_key)['jti'], 'jti-remote')
+
+    def test_cached_payload_expires_with_token(self):
+        token = self.token('jti-short', exp_seconds=1)
+        JWTHelper.validate_token(token, self.public_key)
+        time.sleep(1.1)
+        with self.assertRaises(JWTHelper.jwt.ExpiredSignatureError):
+            JWTHelper.validate_token(token, self.public_key)
+
+    def test_stale_filter_is_served_while_another_thread_rebuilds(self):
+        RevokedToken.objects.create(jti='jti-listed')
+        self.assertTrue(RevocationFilter.might_contain('jti-listed'))
+        RevocationFilter._built_at -= 3600
+        self.assertTrue(RevocationFilter._rebuild_lock.acquire(blocking=False))  # a rebuild in flight
+        try:
+            with self.assertNumQueries(0):
+                self.assertTrue(RevocationFilter.might_contain('jti-listed'))
+        finally:
+            RevocationFilter._rebuild_lock.release()
+        with mock.patch.object(RevokedToken.objects, 'count', side_effect=RuntimeError('db down')):
+            self.assertTrue(RevocationFilter.might_contain('jti-listed'))  # failed rebuild keeps the old filter
+        self.assertIsNone(RevocationFilter._pending)
+
+    def test_tokens_without_exp_are_rejected(self):
+        token = JWTHelper.jwt.encode(
+            {'aud': 'caex-app', 'tid': str(self.tenant.id), 'uid': str(self.user.id), 'jti': 'jti-noexp'},
+            self.private_key, algorithm='RS256'
+        )
+        with self.assertRaises(JWTHelper.jwt.MissingRequiredClaimError):
+            JWTHelper.validate_token(token, self.public_key)
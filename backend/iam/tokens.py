@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from django.conf import settings
+from .local_cache import LocalCache, ensure_invalidation_listener
+from .models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+REVOKED_PREFIX = 'revoked:'
+
+
+class TokenKeys:
+    """Parsed public keys, keyed by their PEM; PyJWT would otherwise re-parse the PEM on every decode."""
+
+    _keys = {}  # pem bytes -> (key object, fingerprint)
+    _lock = threading.Lock()
+
+    @classmethod
+    def load(cls, public_key):
+        """Return (key, fingerprint) for a PEM (str or bytes); key objects are passed through."""
+        if not isinstance(public_key, (str, bytes)):
+            return public_key, f'obj:{id(public_key)}'
+        pem = public_key.encode() if isinstance(public_key, str) else public_key
+        loaded = cls._keys.get(pem)
+        if loaded is None:
+            from cryptography.hazmat.primitives.serialization import load_pem_public_key
+            loaded = (load_pem_public_key(pem), hashlib.sha256(pem).hexdigest()[:16])
+            with cls._lock:
+                cls._keys[pem] = loaded
+        return loaded
+
+
+# Verified payloads by (key fingerprint, token hash); entries expire at the token's `exp`
+verified_tokens = LocalCache(
+    maxsize=getattr(settings, 'IAM_JWT_CACHE_SIZE', 10000),
+    ttl=3600,  # upper bound only; each entry's TTL is the token's remaining lifetime
+)
+
+
+def verified_token_key(fingerprint, token):
+    return f'{fingerprint}:{hashlib.sha256(token.encode() if isinstance(token, str) else token).hexdigest()}'
+
+
+class RevocationFilter:
+    """In-memory bloom filter of revoked token jtis.
+
+    A negative answer is definitive, so validation only queries RevokedToken on a
+    probable hit. The filter is rebuilt from the table every
+    IAM_REVOCATION_REBUILD_INTERVAL seconds (sized for twice the current count and
+    IAM_REVOCATION_FILTER_FP_RATE); revocations in between are added by the
+    RevokedToken receiver and, in other processes, by 'revoked:<jti>' messages on
+    the IAM invalidation channel. Rebuilds are single-flight: once the interval
+    has passed, one caller rebuilds while every other thread keeps answering from
+    the previous filter.
+    """
+
+    _filter = None  # (bits, size, hashes), swapped as one tuple
+    _built_at = 0.0
+    _pending = None  # jtis added while a rebuild is reading the table
+    _lock = threading.Lock()
+    _rebuild_lock = threading.Lock()  # held for the whole of a rebuild
+
+    @classmethod
+    def might_contain(cls, jti):
+        # Other processes' revocations arrive as 'revoked:<jti>' messages on the invalidation channel
+        ensure_invalidation_listener()
+        cls._ensure_fresh()
+        bits, size, hashes = cls._filter
+        return all(bits[i >> 3] & (1 << (i & 7)) for i in cls._positions(jti, size, hashes))
+
+    @classmethod
+    def add(cls, jti):
+        with cls._lock:
+            if cls._pending is not None:
+                cls._pending.append(jti)
+            if cls._filter is not None:
+                cls._set(*cls._filter, jti)
+
+    @classmethod
+    def rebuild(cls):
+        with cls._rebuild_lock:
+            cls._build()
+
+    @classmethod
+    def _build(cls):
+        with cls._lock:
+            cls._pending = []
+        try:
+            count = RevokedToken.objects.count()
+            capacity = max(2 * count, getattr(settings, 'IAM_REVOCATION_FILTER_CAPACITY', 100000))
+            fp_rate = getattr(settings, 'IAM_REVOCATION_FILTER_FP_RATE', 0.01)
+            size = max(8, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+            hashes = max(1, round(size / capacity * math.log(2)))
+            bits = bytearray((size + 7) // 8)
+            for jti in RevokedToken.objects.values_list('jti', flat=True).iterator(chunk_size=10000):
+                cls._set(bits, size, hashes, jti)
+        except Exception:
+            with cls._lock:
+                cls._pending = None
+            raise
+        with cls._lock:
+            pending, cls._pending = cls._pending, None
+            for jti in pending:
+                cls._set(bits, size, hashes, jti)
+            cls._filter = (bits, size, hashes)
+            cls._built_at = time.monotonic()
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._filter = None
+            cls._built_at = 0.0
+
+    @classmethod
+    def _ensure_fresh(cls):
+        if cls._filter is None:
+            # Nothing to answer from yet: wait for whichever thread builds the first filter
+            with cls._rebuild_lock:
+                if cls._filter is None:
+                    cls._build()
+            return
+        interval = getattr(settings, 'IAM_REVOCATION_REBUILD_INTERVAL', 300)
+        if time.monotonic() - cls._built_at <= interval or not cls._rebuild_lock.acquire(blocking=False):
+            return
+        try:
+            cls._build()
+        except Exception:
+            # The previous filter stays valid (receivers and messages keep adding to it); retry on the next call
+            logger.exception('Rebuilding the token revocation filter failed')
+        finally:
+            cls._rebuild_lock.release()
+
+    @staticmethod
+    def _positions(jti, size, hashes):
+        # Double hashing over one sha256 digest
+        digest = hashlib.sha256(str(jti).encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return ((h1 + i * h2) % size for i in range(hashes))
+
+    @classmethod
+    def _set(cls, bits, size, hashes, jti):
+        for i in cls._positions(jti, size, hashes):
+            bits[i >> 3] |= 1 << (i & 7)
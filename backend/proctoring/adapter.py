@@ -10,6 +10,20 @@ def request_session(exam_instance, dry_run: bool = True) -> str:
     return "proctor-session-id"
 
 
+def start_session(exam_instance, user, attempt=None, dry_run: bool = True):
+    """Open a candidate's ExamSession with its own proctoring session id, under which events are ingested."""
+    from django.utils import timezone
+    from iam.models import ExamSession
+    session = ExamSession(exam_instance=exam_instance, user=user, attempt=attempt, start_time=timezone.now())
+    if dry_run:
+        session.proctoring_session_id = f"dry-proctor-{exam_instance.id}-{session.id}"
+    else:
+        # TODO: call proctoring vendor
+        session.proctoring_session_id = request_session(exam_instance, dry_run=False)
+    session.save()
+    return session
+
+
 def check_session_status(session_id: str, dry_run: bool = True) -> dict:
     if dry_run:
         return {'status': 'ready'}